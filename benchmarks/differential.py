@@ -0,0 +1,65 @@
+"""
+Differential test of the engines of Case against the reference 'pairwise' engine on random
+synthetic cases, run from the repository root with:
+    python -m benchmarks.differential --cases 200 --engines batch table --reproducers failures
+
+Every case has a random wake cutoff, wake model and slowdown model, the same for the reference
+and every engine. The default 100 to 500 parts per case are where the vectorised engines pay off,
+use --min-parts 2 --max-parts 30 for many small cases instead.
+The drag, drag area, centre of pressure and the V/V_flow of every part are compared within the
+tolerances, and the total run time of every engine is reported as a speedup over the reference.
+Every mismatch is shrunk to the fewest parts that still reproduce it, and written as a case file
+to the reproducers folder. The exit status is 1 if any engine differs from the reference.
+"""
+
+import argparse
+import os
+import sys
+
+from tool.case import Case
+from tool.differential import case_engine, default_tolerances, differential_test
+
+
+engines = {**{engine: {'engine': engine} for engine in Case.engines if engine != 'pairwise'},
+           'cache': {'cache': True}}
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Compare the engines of the drag tool with the "
+                                                 "reference on random synthetic cases")
+    parser.add_argument('--engines', nargs='+', default=['batch', 'table', 'cache'],
+                        choices=list(engines), help="engines to compare with the reference")
+    parser.add_argument('--cases', type=int, default=100, help="number of random cases")
+    parser.add_argument('--min-parts', type=int, default=100,
+                        help="smallest number of parts of a random case")
+    parser.add_argument('--max-parts', type=int, default=500,
+                        help="largest number of parts of a random case")
+    parser.add_argument('--fixed-options', action='store_true',
+                        help="run every case with the default wake cutoff, wake model and "
+                             "slowdown model of Case")
+    parser.add_argument('--seed', type=int, default=0)
+    for name, tolerance in default_tolerances.items():
+        parser.add_argument(f"--{name.replace('_', '-')}-tolerance", type=float,
+                            default=tolerance, help=f"largest absolute difference of {name}")
+    parser.add_argument('--reproducers', help="folder to write the shrunk failing cases to")
+    options = parser.parse_args(arguments)
+
+    tolerances = {name: getattr(options, f'{name}_tolerance') for name in default_tolerances}
+    report = differential_test({name: case_engine(**engines[name]) for name in options.engines},
+                               cases=options.cases, seed=options.seed,
+                               max_parts=options.max_parts, tolerances=tolerances,
+                               min_parts=options.min_parts,
+                               random_options=not options.fixed_options)
+    print(report.report())
+
+    if options.reproducers is not None and report.mismatches:
+        os.makedirs(options.reproducers, exist_ok=True)
+        for mismatch in report.mismatches:
+            mismatch.write(os.path.join(options.reproducers,
+                                        f"{mismatch.engine}_{mismatch.index}.csv"))
+
+    return 1 if report.mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Benchmarks of the drag tool on synthetic assemblies, run from the repository root with:
+    python -m benchmarks.run --sizes 10 100 1000 --output benchmark.json
+
+Every case is timed in separate phases: loading the case file, run_case and write_to_file.
+The peak memory of every phase is measured with tracemalloc in a second, untimed run, as
+tracing slows the code down. The intersection functions of tool/shapes.py are timed on random
+pairs of surfaces. The results are written as JSON, with one record per measurement.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from tool.case import Case
+from tool.geometry import clear_geometry_cache
+from tool.synthetic import write_synthetic_case
+from tool import shapes
+
+
+def measure(function, memory: bool):
+    """
+    Call function once, and measure its wall time or its peak memory
+    :return: (return value of function, seconds or peak memory in bytes)
+    """
+    if memory:
+        tracemalloc.start()
+        value = function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return value, peak
+
+    start = time.perf_counter()
+    value = function()
+    return value, time.perf_counter() - start
+
+
+def benchmark_case(name: str, engine: str, memory: bool):
+    """
+    Run the phases of one case
+    :return: Dictionary of phase name to seconds or peak memory in bytes, and the error that
+             stopped the case, if any
+    """
+    results = {}
+    clear_geometry_cache()
+
+    try:
+        case, results['load_case'] = measure(lambda: Case(name, engine=engine), memory)
+        _, results['run_case'] = measure(case.run_case, memory)
+        _, results['write_to_file'] = measure(case.write_to_file, memory)
+    except Exception as error:
+        return results, f"{type(error).__name__}: {error}"[:200]
+
+    return results, None
+
+
+def case_records(sizes, engines, repeat: int, seed: int):
+    records = []
+    for size in sizes:
+        name = f"synthetic_{size}"
+        write_synthetic_case(os.path.join('data', f'{name}.csv'), size, seed=seed)
+
+        for engine in engines:
+            # Stop at the first error, whose repeat holds the phases completed by every repeat
+            times = []
+            for _ in range(repeat):
+                phases, error = benchmark_case(name, engine, memory=False)
+                times.append(phases)
+                if error is not None:
+                    break
+            best = {phase: min(t[phase] for t in times) for phase in times[-1]}
+
+            memory, _ = benchmark_case(name, engine, memory=True)
+
+            for phase, seconds in best.items():
+                records.append({'benchmark': 'case', 'parts': size, 'engine': engine,
+                                'phase': phase, 'seconds': seconds,
+                                'peak_bytes': memory.get(phase), 'error': None})
+
+            if error is not None:
+                records.append({'benchmark': 'case', 'parts': size, 'engine': engine,
+                                'phase': None, 'seconds': None, 'peak_bytes': None,
+                                'error': error})
+
+            print(f"case {size} {engine}: "
+                  f"{', '.join(f'{k}={v:.4f}s' for k, v in best.items())}"
+                  f"{'' if error is None else ', ' + error}", file=sys.stderr)
+
+    return records
+
+
+def random_surfaces(size: int, rng):
+    """
+    Random rectangles and circles around the origin, so that most pairs overlap
+    :return: (rectangles, circles) as arrays with rows [left, right, top, bottom] and
+             [x, y, radius]
+    """
+    centres = rng.uniform(-.5, .5, (size, 2))
+    half = rng.uniform(.1, .5, (size, 2))
+    rectangles = np.column_stack((centres[:, 0] - half[:, 0], centres[:, 0] + half[:, 0],
+                                  centres[:, 1] + half[:, 1], centres[:, 1] - half[:, 1]))
+    circles = np.column_stack((rng.uniform(-.5, .5, (size, 2)), rng.uniform(.1, .5, size)))
+
+    return rectangles.round(3), circles.round(3)
+
+
+def intersection_records(size: int, repeat: int, seed: int):
+    rng = np.random.default_rng(seed)
+    rectangles_1, circles_1 = random_surfaces(size, rng)
+    rectangles_2, circles_2 = random_surfaces(size, rng)
+
+    rect_1 = [shapes.Rectangle(*row) for row in rectangles_1.tolist()]
+    rect_2 = [shapes.Rectangle(*row) for row in rectangles_2.tolist()]
+    circ_1 = [shapes.Circle(*row) for row in circles_1.tolist()]
+    circ_2 = [shapes.Circle(*row) for row in circles_2.tolist()]
+
+    scalar = {'intersection_rectangles': (shapes.intersection_rectangles, rect_1, rect_2),
+              'intersection_rectangle_circle': (shapes.intersection_rectangle_circle,
+                                                rect_1, circ_2),
+              'intersection_circle_circle': (shapes.intersection_circle_circle, circ_1, circ_2)}
+    vectorised = {'overlap_rectangles': (shapes.overlap_rectangles, rectangles_1, rectangles_2),
+                  'overlap_rectangle_circle': (shapes.overlap_rectangle_circle,
+                                               rectangles_1, circles_2),
+                  'overlap_circles': (shapes.overlap_circles, circles_1, circles_2)}
+
+    def run_scalar(function, surfaces_1, surfaces_2):
+        errors = 0
+        for surface_1, surface_2 in zip(surfaces_1, surfaces_2):
+            try:
+                function(surface_1, surface_2)
+            except Exception:
+                errors += 1
+        return errors
+
+    records = []
+    for name, (function, surfaces_1, surfaces_2) in list(scalar.items()) + \
+            list(vectorised.items()):
+        if name in scalar:
+            call = lambda: run_scalar(function, surfaces_1, surfaces_2)
+        else:
+            call = lambda: function(surfaces_1, surfaces_2)
+
+        seconds = []
+        for _ in range(repeat):
+            errors, elapsed = measure(call, memory=False)
+            seconds.append(elapsed)
+
+        records.append({'benchmark': 'intersection', 'function': name, 'pairs': size,
+                        'seconds': min(seconds), 'seconds_per_pair': min(seconds) / size,
+                        'errors': errors if name in scalar else 0})
+        print(f"{name} x {size}: {min(seconds):.4f}s", file=sys.stderr)
+
+    return records
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the drag tool on synthetic cases")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                        help="numbers of parts of the synthetic cases")
+    parser.add_argument('--engines', nargs='+', default=list(Case.engines),
+                        choices=Case.engines, help="intersection engines to run")
+    parser.add_argument('--pairs', type=int, default=10000,
+                        help="number of surface pairs for the intersection functions")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="repetitions of every timing, the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON file for the results, defaults to stdout")
+    options = parser.parse_args(arguments)
+
+    results = {'python': platform.python_version(), 'numpy': np.__version__,
+               'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'records': intersection_records(options.pairs, options.repeat, options.seed)}
+
+    # The cases read and write relative to a data folder, so they run in a temporary one
+    cwd, directory = os.getcwd(), tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(directory, 'data'))
+        os.chdir(directory)
+        results['records'] += case_records(options.sizes, options.engines, options.repeat,
+                                           options.seed)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory)
+
+    if options.output is None:
+        json.dump(results, sys.stdout, indent=1)
+    else:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,9 @@
+import argparse
+
 from tool.case import Case
-import matplotlib.pyplot as plt
+from tool.batch import run_batch
+from tool.cache import ResultCache
+from tool.results import ResultSink
 
 
 validation_cases = ('validation-12_95', 'validation-13_34', 'validation-13_71',
@@ -17,6 +21,8 @@ scaled_dimensions = {'quadcopter': 'Body Radius',
 
 
 def validation_plotter(velocities, results, percent_errors, percent_errors2):
+    import matplotlib.pyplot as plt
+
     plt.subplots(figsize=(8, 3), dpi=150)
     # Results vs validation data
     ax1 = plt.subplot(121)
@@ -47,6 +53,8 @@ def validation_plotter(velocities, results, percent_errors, percent_errors2):
 
 
 def sensitivity_plotter(results):
+    import matplotlib.pyplot as plt
+
     plt.subplots(figsize=(8, 3), dpi=180)
     for index, concept in enumerate(('quadcopter', 'helipack', 'icecream')):
         ax = plt.subplot(1, 3, index + 1)
@@ -59,61 +67,162 @@ def sensitivity_plotter(results):
     plt.show()
 
 
-if __name__ == '__main__':
-    case = input('Enter the case name: ')
-
-    if case == 'validation' or case == 'v':
-        velocities = []
-        results = []
-        drag_errors = []
-        drag_percent_errors = []
-        drag_error2s = []
-        drag_percent_error2s = []
-
-        for index, validation_case in enumerate(validation_cases):
-            runner = Case("validation/" + validation_case)
-            velocity, result = runner.run_case()
-
-            velocities.append(velocity)
-            results.append(result[0])
-
-            drag_error = round(result[0] - validation_results[index], 3)
-            drag_percent_error = round(drag_error / validation_results[index] * 100, 1)
-            drag_errors.append(drag_error)
-            drag_percent_errors.append(drag_percent_error)
-
-            acd_error = round(result[1] - validation_results[index] /
-                              (0.5 * 1.225 * velocity ** 2), 3)
-            acd_percent_error = round(acd_error / (validation_results[index] /
-                                      (0.5 * 1.225 * velocity ** 2)) * 100, 1)
-
-            drag_error2 = round(result[0] - 0.143 * velocity ** 2, 3)
-            drag_percent_error2 = round(drag_error2 / (0.143 * velocity ** 2) * 100, 1)
-            drag_error2s.append(drag_error2)
-            drag_percent_error2s.append(drag_percent_error2)
-
-            print(f"Drag at {velocity} m/s: {round(result[0], 3)} N, {round(result[1], 3)}")
-            print(f"Drag Error from exact experiment: {drag_error} N "
-                  f"({drag_percent_error} %)")
-            print(f"AC_d Error from exact experiment: {acd_error} [-] "
-                  f"({acd_percent_error} %)")
-            print(f"Drag Error from experimental fit curve: {drag_error2} N "
-                  f"({drag_percent_error2} %)\n")
-
-            runner.write_to_file()
-
+def run_validation(workers: int = None, plot: bool = False, cache: ResultCache = None):
+    velocities = []
+    results = []
+    drag_errors = []
+    drag_percent_errors = []
+    drag_error2s = []
+    drag_percent_error2s = []
+
+    batch = run_batch(["validation/" + validation_case for validation_case in validation_cases],
+                      workers=workers, result_cache=cache)
+
+    for index, (_, velocity, result) in enumerate(batch):
+        velocities.append(velocity)
+        results.append(result[0])
+
+        drag_error = round(result[0] - validation_results[index], 3)
+        drag_percent_error = round(drag_error / validation_results[index] * 100, 1)
+        drag_errors.append(drag_error)
+        drag_percent_errors.append(drag_percent_error)
+
+        acd_error = round(result[1] - validation_results[index] /
+                          (0.5 * 1.225 * velocity ** 2), 3)
+        acd_percent_error = round(acd_error / (validation_results[index] /
+                                  (0.5 * 1.225 * velocity ** 2)) * 100, 1)
+
+        drag_error2 = round(result[0] - 0.143 * velocity ** 2, 3)
+        drag_percent_error2 = round(drag_error2 / (0.143 * velocity ** 2) * 100, 1)
+        drag_error2s.append(drag_error2)
+        drag_percent_error2s.append(drag_percent_error2)
+
+        print(f"Drag at {velocity} m/s: {round(result[0], 3)} N, {round(result[1], 3)}")
+        print(f"Drag Error from exact experiment: {drag_error} N "
+              f"({drag_percent_error} %)")
+        print(f"AC_d Error from exact experiment: {acd_error} [-] "
+              f"({acd_percent_error} %)")
+        print(f"Drag Error from experimental fit curve: {drag_error2} N "
+              f"({drag_percent_error2} %)\n")
+
+    if plot:
         validation_plotter(velocities, results, drag_percent_errors, drag_percent_error2s)
 
-    elif case == 'slowdown':
+
+def run_final_concept(workers: int = None, output: str = None, cache: ResultCache = None):
+    """
+    Run the final concept for all velocities and flow directions, and write the averaged drag
+    area and centre of pressure per flow direction
+    :param workers: Number of worker processes, see run_batch
+    :param output: .csv file for the averaged results, instead of data/result_final_concept.csv
+            and a result file per case
+    :param cache: ResultCache to look the results up in and store them to
+    """
+    velocities = ('0-1', '2-5', '5', '7-5', '10', '11-1')
+    batch = run_batch([(f'sub_main/{velocity}_{direction}',
+                        'final_concept_1' if direction == 1 else 'final_concept')
+                       for direction in (0, 1, 2) for velocity in velocities], workers=workers,
+                      write=output is None, result_cache=cache)
+
+    results = []
+    for direction in (0, 1, 2):
+        data = [result for _, _, result in
+                batch[direction * len(velocities):(direction + 1) * len(velocities)]]
+        drag_area = [d[1] for d in data]
+        cop = [d[2] for d in data]
+
+        drag_area_final = sum(drag_area) / len(drag_area)
+        cop_final = (round(sum(c[0] for c in cop) / len(cop), 3),
+                     round(sum(c[1] for c in cop) / len(cop), 3),
+                     round(sum(c[2] for c in cop) / len(cop), 3)
+                     )
+
+        results.append((drag_area_final, cop_final))
+
+    lines = [f'Flow direction, Drag Area [m2], CoP (x) [m], CoP (y) [m], CoP (z) [m],\n',
+             f'x, {results[0][0]}, {results[0][1][0]}, {results[0][1][1]}, {results[0][1][2]},\n',
+             f'y, {results[1][0]}, {results[1][1][0]}, {results[1][1][1]}, {results[1][1][2]},\n',
+             f'z, {results[2][0]}, {results[2][1][0]}, {results[2][1][1]}, {results[2][1][2]},\n']
+
+    f = open('data/result_final_concept.csv' if output is None else output, 'w')
+    f.writelines(lines)
+    f.close()
+
+
+def run_cases(cases, geometry: str = None, output: str = None, workers: int = None,
+              cache: ResultCache = None):
+    """
+    Run cases and write a result file per case, or all results to one output file
+    :param cases: Case names or glob patterns, relative to the data folder
+    :param geometry: Geometry file used by all cases, instead of the geometry in the case files
+    :param output: .npz or .csv file for all results, see ResultSink.save
+    :param workers: Number of worker processes, see run_batch
+    :param cache: ResultCache to look the results up in and store them to
+    """
+    sink = None if output is None else ResultSink()
+    batch = run_batch([(case, geometry) for case in cases], workers=workers,
+                      write=output is None, sink=sink, result_cache=cache)
+
+    for name, velocity, result in batch:
+        print(f"{name}: drag at {velocity} m/s: {result[0]} N, drag area: {result[1]} m2, "
+              f"centre of pressure: {tuple(float(c) for c in result[2])}")
+
+    if sink is not None:
+        sink.save(output)
+
+
+def parse_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Estimate the drag of the cases in the data "
+                                                 "folder")
+    parser.add_argument('cases', nargs='*',
+                        help="Case names or glob patterns relative to the data folder, "
+                             "'validation' to compare with the validation data or 'slowdown' to "
+                             "plot the slowdown curve. Without cases, the final concept is run "
+                             "for all flow directions.")
+    parser.add_argument('-g', '--geometry', default=None,
+                        help="Geometry file in the data folder to use for all cases")
+    parser.add_argument('-o', '--output', default=None,
+                        help="File to write all results to, .npz or .csv, instead of a result "
+                             "file per case in the data folder. For the final concept, the .csv "
+                             "file of the averaged results.")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes, defaults to the number of cores")
+    parser.add_argument('-c', '--cache', nargs='?', const='data/cache', default=None,
+                        help="Folder of the result cache, data/cache if no folder is given. "
+                             "Cases with the same inputs as a cached case are not run again.")
+    parser.add_argument('-p', '--plot', action='store_true',
+                        help="Plot the validation results")
+
+    parsed = parser.parse_args(arguments)
+    special = parsed.cases in (['validation'], ['v'], ['slowdown'])
+    if parsed.geometry is not None and (special or not parsed.cases):
+        parser.error("--geometry only applies to named cases")
+    if parsed.output is not None and special:
+        parser.error("--output only applies to named cases and the final concept")
+    if parsed.output is not None and not parsed.cases and not parsed.output.endswith('.csv'):
+        parser.error("--output of the final concept should be a .csv file")
+
+    return parsed
+
+
+def main(arguments=None):
+    arguments = parse_arguments(arguments)
+    cases = arguments.cases
+    cache = None if arguments.cache is None else ResultCache(arguments.cache)
+
+    if cases in (['validation'], ['v']):
+        run_validation(arguments.workers, arguments.plot, cache)
+
+    elif cases == ['slowdown']:
         Case('template_case').plot_slowdown()
 
-    # elif case == 'all' or case == 'a':
+    # elif cases in (['all'], ['a']):
     #     for case in ('all_concepts/quadcopter', 'all_concepts/helipack', 'all_concepts/icecream'):
     #         runner = Case(case)
     #         runner.run_case()
     #         runner.write_to_file()
     #
-    # elif case == 'sensitivity' or case == 's':
+    # elif cases in (['sensitivity'], ['s']):
     #     results = {}
     #     for name in ('quadcopter', 'helipack', 'icecream'):
     #         results[name] = []
@@ -127,41 +236,12 @@ if __name__ == '__main__':
     #
     #     sensitivity_plotter(results)
 
-    elif case == 'q':
-        exit()
-
-    elif case == '':
-        results = []
-        for direction in (0, 1, 2):
-            drag_area = []
-            cop = []
-            for velocity in ('0-1', '2-5', '5', '7-5', '10', '11-1'):
-                geometry = 'final_concept_1' if direction == 1 else 'final_concept'
-                case = Case(f'sub_main/{velocity}_{direction}', geometry=geometry)
-                _, data = case.run_case()
-                case.write_to_file()
+    elif not cases:
+        run_final_concept(arguments.workers, arguments.output, cache)
 
-                drag_area.append(data[1])
-                cop.append(data[2])
-
-            drag_area_final = sum(drag_area) / len(drag_area)
-            cop_final = (round(sum(c[0] for c in cop) / len(cop), 3),
-                         round(sum(c[1] for c in cop) / len(cop), 3),
-                         round(sum(c[2] for c in cop) / len(cop), 3)
-                         )
-
-            results.append((drag_area_final, cop_final))
-
-        lines = [f'Flow direction, Drag Area [m2], CoP (x) [m], CoP (y) [m], CoP (z) [m],\n',
-                 f'x, {results[0][0]}, {results[0][1][0]}, {results[0][1][1]}, {results[0][1][2]},\n',
-                 f'y, {results[1][0]}, {results[1][1][0]}, {results[1][1][1]}, {results[1][1][2]},\n',
-                 f'z, {results[2][0]}, {results[2][1][0]}, {results[2][1][1]}, {results[2][1][2]},\n']
+    else:
+        run_cases(cases, arguments.geometry, arguments.output, arguments.workers, cache)
 
-        f = open('data/result_final_concept.csv', 'w')
-        f.writelines(lines)
-        f.close()
 
-    else:
-        case = Case(case)
-        _ = case.run_case()
-        case.write_to_file()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Drag at arbitrary flow angles, with the silhouettes of the parts projected onto the plane normal
+to the flow for a batch of flow directions at once
+"""
+
+import numpy as np
+
+from .index import candidate_pairs
+from .objects import Sphere, Cylinder, Cuboid, IceCreamCone, Disk
+from .table import PartTable
+
+
+def flow_vectors(alpha, beta):
+    """
+    :param alpha: Array of angles of incidence in degrees, turning the flow from the x axis
+            towards the y axis
+    :param beta: Array of sideslip angles in degrees, turning the flow out of the x-y plane
+            towards the z axis
+    :return: Array of unit flow vectors, with shape of the broadcast angles + (3, )
+    """
+    alpha, beta = np.broadcast_arrays(np.radians(alpha), np.radians(beta))
+    return np.stack((np.cos(alpha) * np.cos(beta), np.sin(alpha) * np.cos(beta), np.sin(beta)),
+                    axis=-1)
+
+
+def _plane_bases(vectors):
+    """
+    :return: (Array of first unit vectors, Array of second unit vectors) of the planes normal
+             to the flow vectors
+    """
+    axis = np.eye(3)[np.argmin(np.abs(vectors), axis=1)]
+    first = axis - np.sum(axis * vectors, axis=1)[:, None] * vectors
+    first /= np.linalg.norm(first, axis=1)[:, None]
+    return first, np.cross(vectors, first)
+
+
+def _support(table: PartTable, u):
+    """
+    Support function of the parts: the largest value of x . u over every part
+    :param u: Array of unit vectors, with the parts along the second to last axis, shape (..., n, 3)
+    :return: Array of support values, shape (..., n)
+    """
+    r, length, length_cone = table.radius, table.length, table.length_cone
+    axis = np.where(table.orientation[:, 0] >= 0, table.orientation[:, 0], 0)
+    normal = 3 - table.orientation[:, 0] - table.orientation[:, 1]
+    normal = np.where(table.is_kind(Disk), normal, 0)
+
+    along = np.take_along_axis(u, np.broadcast_to(axis[:, None], u.shape[:-1] + (1,)), -1)[..., 0]
+    across = r * np.sqrt(np.clip(1 - along ** 2, 0, None))
+    along_normal = np.take_along_axis(u, np.broadcast_to(normal[:, None],
+                                                         u.shape[:-1] + (1,)), -1)[..., 0]
+
+    # An IceCreamCone is a hemisphere behind its position, a cylinder and a cone ahead of it
+    cone = np.maximum(np.where(along <= 0, r, length * along + across),
+                      (length + length_cone) * along)
+
+    shape = np.select(
+        (table.is_kind(Sphere), table.is_kind(Cylinder), table.is_kind(Cuboid),
+         table.is_kind(IceCreamCone)),
+        (r, length / 2 * np.abs(along) + across,
+         np.sum(table.dimensions / 2 * np.abs(u), axis=-1), cone),
+        r * np.sqrt(np.clip(1 - along_normal ** 2, 0, None)) + 0.005 * np.abs(along_normal))
+
+    return np.sum(table.position * u, axis=-1) + shape
+
+
+def _silhouette_bounds(support, sines, cosines, y):
+    """
+    Left and right edge of the silhouettes at heights y, where every silhouette is the
+    intersection of the half planes x cos(theta) + y sin(theta) <= support(theta)
+    :param support: Array of support values of every silhouette, shape (m, k)
+    :param y: Array of heights per silhouette, shape (m, s)
+    :return: (Array of left edges, Array of right edges), shape (m, s)
+    """
+    right, left = cosines > 1e-12, cosines < -1e-12
+    edges_right = ((support[:, None, right] - y[..., None] * sines[right]) /
+                   cosines[right]).min(axis=-1)
+    edges_left = ((support[:, None, left] - y[..., None] * sines[left]) /
+                  cosines[left]).max(axis=-1)
+    return edges_left, edges_right
+
+
+def silhouette_overlaps(support, index_1, index_2, strips: int = 64, chunk: int = 4096):
+    """
+    Overlap areas of pairs of silhouettes, integrated over horizontal strips
+    :param support: Array of the support values of the silhouettes at angles theta evenly
+            spaced from 0, with a multiple of 4 angles, shape (m, k)
+    :param index_1: Array with the index of the first silhouette of every pair
+    :param index_2: Array with the index of the second silhouette of every pair
+    :param strips: Number of strips per pair, spanning the heights both silhouettes cover
+    :param chunk: Largest number of pairs integrated at once, to limit memory use
+    :return: Array of overlap areas, one per pair
+    """
+    angles = support.shape[1]
+    theta = 2 * np.pi * np.arange(angles) / angles
+    sines, cosines = np.sin(theta), np.cos(theta)
+
+    areas = np.zeros(len(index_1))
+    for start in range(0, len(index_1), chunk):
+        pair_1, pair_2 = index_1[start:start + chunk], index_2[start:start + chunk]
+        bottom = np.maximum(-support[pair_1, 3 * angles // 4], -support[pair_2, 3 * angles // 4])
+        top = np.minimum(support[pair_1, angles // 4], support[pair_2, angles // 4])
+        height = np.clip(top - bottom, 0, None) / strips
+        y = bottom[:, None] + (np.arange(strips) + .5) * height[:, None]
+
+        left_1, right_1 = _silhouette_bounds(support[pair_1], sines, cosines, y)
+        left_2, right_2 = _silhouette_bounds(support[pair_2], sines, cosines, y)
+        width = np.clip(np.minimum(right_1, right_2) - np.maximum(left_1, left_2), 0, None)
+        areas[start:start + chunk] = width.sum(axis=1) * height
+
+    return areas
+
+
+def run_flow_vectors(case, vectors, angles: int = 48, strips: int = 64):
+    """
+    Determine the drag of a case for a batch of flow directions. The silhouette of every part
+    on the plane normal to the flow is the polygon of the tangent lines at the given number of
+    angles, found from the support function of the part. The parts, their drag models and the
+    wake model are shared by all directions, the overlaps of all directions are integrated at
+    once.
+        The base drag area of a part is the average of its drag areas along the axes, weighted
+        with the squared components of the flow vector. The characteristic length of a part is
+        its extent along the flow. Disks have no drag normal to their plane, as along the axes.
+        Along the axes the result approaches run_case, up to the polygons of the circles.
+    :param case: Case with the parts, flow conditions, slowdown model and wake model
+    :param vectors: Array of flow vectors, shape (..., 3)
+    :param angles: Number of tangent lines of every silhouette, a multiple of 4
+    :param strips: Number of strips to integrate every overlap over
+    :return: (drag, drag area, centre of pressure) arrays with the shape of the vectors, with the
+             centre of pressure in a last axis of length 3
+    """
+    if angles % 4:
+        raise ValueError(f"The number of angles should be a multiple of 4, got {angles}")
+
+    vectors = np.asarray(vectors, dtype=float)
+    shape = vectors.shape[:-1]
+    vectors = vectors.reshape(-1, 3) / np.linalg.norm(vectors.reshape(-1, 3), axis=1)[:, None]
+    table = PartTable.from_parts(case.parts)
+    size = len(table)
+
+    # Support values of the silhouettes at every angle, and along and against the flow
+    first, second = _plane_bases(vectors)
+    theta = 2 * np.pi * np.arange(angles) / angles
+    u = np.cos(theta)[None, :, None] * first[:, None, :] + \
+        np.sin(theta)[None, :, None] * second[:, None, :]
+    support = _support(table, np.broadcast_to(u[:, :, None, :], u.shape[:2] + (size, 3)))
+    support = support.transpose(0, 2, 1).reshape(-1, angles)
+
+    ahead = _support(table, np.broadcast_to(vectors[:, None, :], (len(vectors), size, 3)))
+    behind = _support(table, np.broadcast_to(-vectors[:, None, :], (len(vectors), size, 3)))
+    smallest, lengths = -behind, ahead + behind
+    boxes = np.stack((-support[:, angles // 2], support[:, 0], support[:, angles // 4],
+                      -support[:, 3 * angles // 4]), axis=1).reshape(len(vectors), size, 4)
+
+    # Pairs of every direction, with rows of the silhouettes as direction * size + part
+    ranks, pairs = [], []
+    for direction, vector in enumerate(vectors):
+        order = np.argsort(smallest[direction], kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(size)
+
+        index_1, index_2 = candidate_pairs(boxes[direction])
+        index_1, index_2 = (np.where(rank[index_1] < rank[index_2], index_1, index_2),
+                            np.where(rank[index_1] < rank[index_2], index_2, index_1))
+        distance = (table.position[index_2] - table.position[index_1]) @ vector
+        if case.wake_cutoff is not None:
+            keep = distance <= case.wake_cutoff * lengths[direction, index_1]
+            index_1, index_2, distance = index_1[keep], index_2[keep], distance[keep]
+
+        ranks.append((order, rank))
+        pairs.append((index_1, index_2, distance))
+
+    counts = [index_1.size for index_1, _, _ in pairs]
+    offsets = np.repeat(np.arange(len(vectors)) * size, counts)
+    overlaps = silhouette_overlaps(
+        support, np.concatenate([index_1 for index_1, _, _ in pairs]).astype(int) + offsets,
+        np.concatenate([index_2 for _, index_2, _ in pairs]).astype(int) + offsets, strips)
+    overlaps = np.split(overlaps, np.cumsum(counts)[:-1])
+    frontal_areas = silhouette_overlaps(support, np.arange(support.shape[0]),
+                                        np.arange(support.shape[0]), strips).reshape(-1, size)
+
+    # Drag areas of the parts along the axes, where disks normal to the axis have none
+    disk = table.is_kind(Disk)
+    axis_drag_areas = np.zeros((3, size))
+    for axis in (0, 1, 2):
+        rows = ~(disk & ~table.aligned(axis))
+        axis_drag_areas[axis, rows] = table.take(rows).base_drag_areas(axis)
+    friction_drag_areas = table.friction_coefficients() * table.wet_areas()
+
+    slowdown = case.get_slowdown_model()
+    wake = table.superpose_wake if case.wake_model == 'superposition' else table.assign_wake
+    drag_areas = np.empty((len(vectors), size))
+    for direction, ((order, rank), (index_1, index_2, distance)) in enumerate(zip(ranks, pairs)):
+        table.order = order
+        wake(index_1, index_2, distance, overlaps[direction], lengths[direction],
+             frontal_areas[direction], rank, slowdown)
+
+        base_drag_areas = vectors[direction] ** 2 @ axis_drag_areas
+        friction = np.minimum(friction_drag_areas, base_drag_areas)
+        drag_areas[direction] = friction + table.wake_factor * (base_drag_areas - friction)
+
+    rotor = np.array(['rotor' in name for name in table.name], dtype=bool)
+    moment_arms = table.position[None, :, :] - \
+        (table.position @ vectors.T).T[:, :, None] * vectors[:, None, :]
+    moment_arms[:, rotor] = 0.
+
+    dynamic_pressure = 0.5 * case.density * case.velocity ** 2
+    drag_area = drag_areas.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cop = np.round(np.einsum('dn,dni->di', drag_areas, moment_arms) / drag_area[:, None],
+                       3) + 0.
+
+    return (np.round(dynamic_pressure * drag_area, 3).reshape(shape),
+            np.round(drag_area, 3).reshape(shape), cop.reshape(shape + (3,)))
+
+
+def run_flow_angles(case, alpha, beta, angles: int = 48, strips: int = 64):
+    """
+    Determine the drag of a case for a grid of flow angles in one batch, see run_flow_vectors
+    :param alpha: Array of angles of incidence in degrees, see flow_vectors
+    :param beta: Array of sideslip angles in degrees, broadcast with alpha
+    :return: (drag, drag area, centre of pressure) arrays with the broadcast shape of the angles,
+             with the centre of pressure in a last axis of length 3
+    """
+    return run_flow_vectors(case, flow_vectors(alpha, beta), angles, strips)
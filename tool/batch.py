@@ -0,0 +1,128 @@
+"""
+Running many independent cases over a pool of worker processes, with the file I/O in separate
+stages, see tool/pipeline.py
+"""
+
+import glob
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .case import Case
+from .geometry import CaseFiles, read_case_files
+from .pipeline import BackgroundWriter, prefetch
+from .results import part_results
+
+
+def expand_cases(cases):
+    """
+    Expand glob patterns in a list of case names, relative to the data folder
+    :param cases: A case name or pattern, or a sequence of names, patterns and
+            (name, geometry) tuples
+    :return: List of (name, geometry) tuples in input order, patterns sorted by name
+    """
+    if isinstance(cases, str):
+        cases = [cases]
+
+    expanded = []
+    for case in cases:
+        name, geometry = (case, None) if isinstance(case, str) else case
+
+        if glob.has_magic(name):
+            paths = sorted(glob.glob(os.path.join('data', f'{name}.csv')))
+            expanded += [(os.path.relpath(path, 'data')[:-4].replace(os.sep, '/'), geometry)
+                         for path in paths]
+        else:
+            expanded.append((name, geometry))
+
+    return expanded
+
+
+def run_single(name: str, geometry: str = None, write: bool = True, options: dict = None,
+               parts: bool = False, files: CaseFiles = None):
+    """
+    Run one case, and write its result file
+    :param parts: Also return the results of the parts, see part_results
+    :param files: CaseFiles of the case already read, see Case
+    :return: (name, velocity, result) as returned by Case.run_case, with the part results
+             appended if requested
+    """
+    case = Case(name, geometry=geometry, files=files, **(options or {}))
+    velocity, result = case.run_case()
+
+    if write:
+        case.write_to_file()
+
+    if parts:
+        return name, velocity, result, part_results(case)
+    return name, velocity, result
+
+
+def _compute(name: str, geometry: str, files: CaseFiles, write: bool, options: dict,
+             parts: bool):
+    """
+    Compute stage of run_batch: run one case from its files, leaving the writing of the result
+    file to the writer stage
+    :return: (name, velocity, result, (path, lines) of the result file or None,
+              part results or None)
+    """
+    case = Case(name, geometry=geometry, files=files, **options)
+    velocity, result = case.run_case()
+
+    output = (case.result_path(), case.result_lines()) if write else None
+    return name, velocity, result, output, part_results(case) if parts else None
+
+
+def run_batch(cases, workers: int = None, write: bool = True, sink=None, readers: int = 4,
+              queue_size: int = 16, **options):
+    """
+    Run a batch of cases as a pipeline of three stages: a pool of reader threads reads the case
+    and geometry files ahead, the cases are run on a pool of worker processes, and a background
+    thread writes the result files. Bounded queues between the stages limit the files and
+    results held in memory, while the file I/O overlaps with the computation.
+    :param cases: A case name or pattern, or a sequence of names, patterns and
+            (name, geometry) tuples, see expand_cases
+    :param workers: Number of worker processes, defaults to the number of cores.
+            With 1 worker the cases are run in this process.
+    :param write: Write the result file of every case
+    :param sink: ResultSink to add the results of every case and its parts to
+    :param readers: Number of threads reading case and geometry files
+    :param queue_size: Largest number of cases read or run ahead of the case being collected,
+            and of result files waiting to be written
+    :param options: Keyword arguments passed on to every Case
+    :return: List of (name, velocity, result) tuples, in the order of the input cases
+    """
+    cases = expand_cases(cases)
+
+    if write:
+        duplicates = sorted(name for name, count in Counter(name for name, _ in cases).items()
+                            if count > 1)
+        if duplicates:
+            raise ValueError(f"Cases {duplicates} appear more than once and would overwrite "
+                             f"each other's result files")
+
+    executor = None
+    if workers != 1 and len(cases) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1,
+                                                       len(cases)))
+
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=readers) as reader, \
+                BackgroundWriter(queue_size) as writer:
+            files = prefetch(read_case_files, cases, reader, queue_size)
+            arguments = ((name, geometry, case_files, write, options, sink is not None)
+                         for (name, geometry), case_files in zip(cases, files))
+
+            for name, velocity, result, output, parts in prefetch(_compute, arguments, executor,
+                                                                  queue_size):
+                if output is not None:
+                    writer.write(*output)
+                if sink is not None:
+                    sink.add_result(name, velocity, result, parts)
+                results.append((name, velocity, result))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return results
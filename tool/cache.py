@@ -0,0 +1,202 @@
+"""
+Caches that let repeated cases skip work they have already done
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .objects import Part
+from .shapes import Rectangle, Circle
+from .slowdown import SlowdownCurve
+from .table import PartTable
+
+
+class IntersectionCache:
+    """
+    Bounded least recently used cache of intersection areas of frontal surfaces
+        Surfaces are keyed relative to a reference point of the first surface, so pairs with the
+        same relative geometry share one entry wherever they are in the plane
+    """
+    decimals = 9
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self._areas = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return f"IntersectionCache: [{len(self)}/{self.maxsize}, hits={self.hits}, " \
+               f"misses={self.misses}, evictions={self.evictions}]"
+
+    def __len__(self):
+        return len(self._areas)
+
+    def key(self, surface, other):
+        """
+        Canonical description of a pair of surfaces, translated to the reference point of the
+        first surface. Rectangles and ConeSideSurfaces intersect by their bounds only.
+        """
+        if isinstance(surface, Rectangle):
+            x, y = surface.left, surface.bottom
+        elif isinstance(surface, Circle):
+            x, y = surface.x_centre, surface.y_centre
+        else:
+            return None
+
+        key = []
+        for shape in (surface, other):
+            if isinstance(shape, Rectangle):
+                values = ('R', shape.left - x, shape.right - x, shape.top - y, shape.bottom - y)
+            elif isinstance(shape, Circle):
+                values = ('C', shape.x_centre - x, shape.y_centre - y, shape.radius)
+            else:
+                return None
+
+            key.append((values[0],) + tuple(round(value, self.decimals) for value in values[1:]))
+
+        return tuple(key)
+
+    def intersection(self, surface, other):
+        """
+        Determine surface.intersection(other), computing it only for a new pair
+        """
+        key = self.key(surface, other)
+        if key is None:
+            return surface.intersection(other)
+
+        if key in self._areas:
+            self.hits += 1
+            self._areas.move_to_end(key)
+            return self._areas[key]
+
+        self.misses += 1
+        area = surface.intersection(other)
+        self._areas[key] = area
+
+        while len(self._areas) > self.maxsize:
+            self._areas.popitem(last=False)
+            self.evictions += 1
+
+        return area
+
+    def stats(self):
+        return {'size': len(self), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+    def clear(self):
+        self._areas.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+# Process wide cache used by cases created with cache=True
+intersection_cache = IntersectionCache()
+
+
+class ResultCache:
+    """
+    Persistent cache of case results in a folder, with one JSON file per case named after the
+    hash of everything the result depends on: the flow conditions, the parts, the model constants,
+    the slowdown model, the wake and intersection options and the version of the model. Any change
+    to these gives a new key, so stale results are never found and need no invalidation.
+        Entries are written to a temporary file and renamed, so worker processes can share a
+        folder. The hit and miss counters only count the lookups of this process.
+    """
+    # Version stamp of the model, to be raised with every change to the results of run_case
+    version = 1
+
+    def __init__(self, directory: str = 'data/cache'):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"ResultCache: [{self.directory}, hits={self.hits}, misses={self.misses}]"
+
+    def __len__(self):
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(file.endswith('.json') for file in os.listdir(self.directory))
+
+    def key(self, case):
+        """
+        :param case: Case with its parts loaded, before or without run_case
+        :return: Hexadecimal SHA-256 hash of the inputs of the case
+        """
+        table = PartTable.from_parts(case.parts)
+        model = case.get_slowdown_model()
+        if isinstance(model, SlowdownCurve):
+            slowdown = [model.xp, model.fp, model.decimals]
+        else:
+            # Other models are identified by their values, as their code cannot be hashed
+            slowdown = [repr(model), model.decimals,
+                        model.evaluate(np.linspace(0, 100, 1001)).tolist()]
+
+        description = json.dumps({
+            'version': self.version, 'density': case.density, 'velocity': case.velocity,
+            'flow_direction': case.flow_direction, 'engine': case.engine,
+            'cell_size': case.cell_size if case.engine == 'raster' else None,
+            'wake_cutoff': case.wake_cutoff, 'wake_model': case.wake_model,
+            'slowdown': slowdown, 'friction_coefficient': Part.friction_coefficient,
+            'drag_coefficients': {kind.__name__: getattr(kind, 'drag_coefficient', None)
+                                  for kind in PartTable.kinds},
+            'name': table.name.tolist(), 'kind': table.kind.tolist(),
+            'friction_coefficients': table.friction_coefficients().tolist(),
+            **{column: getattr(table, column).tolist() for column in PartTable.columns[2:]}})
+
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def path(self, key: str):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str):
+        """
+        :return: (result, parts) stored with the key, see put, or None if it is not stored
+        """
+        try:
+            with open(self.path(key)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        drag, drag_area, cop = entry['result']
+        return (drag, drag_area, tuple(cop)), [tuple(part) for part in entry['parts']]
+
+    def put(self, key: str, result: tuple, parts):
+        """
+        Store the result of a case
+        :param result: (drag, drag area, centre of pressure) as returned by Case.run_case
+        :param parts: Sequence of (row, drag, V/V_flow) of the parts in the order after run_case,
+                with the row of every part in the order the case was loaded in
+        :return: None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {'result': [float(result[0]), float(result[1]), [float(c) for c in result[2]]],
+                 'parts': [[int(row), float(drag), float(wake_factor)]
+                           for row, drag, wake_factor in parts]}
+
+        temporary = f'{self.path(key)}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(entry, f)
+        os.replace(temporary, self.path(key))
+
+    def stats(self):
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        """
+        Remove all stored results and reset the counters
+        """
+        if os.path.isdir(self.directory):
+            for file in os.listdir(self.directory):
+                if file.endswith('.json'):
+                    os.remove(os.path.join(self.directory, file))
+        self.hits = self.misses = 0
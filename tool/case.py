@@ -3,18 +3,60 @@ Module with the Case class for the simulation case.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 
-from .objects import Part, Sphere, Cylinder, Cuboid, IceCreamCone, Disk
-from .shapes import ConeSideSurface
+from .objects import Part
+from .geometry import CaseFiles, load_geometry, read_case_files
+from .shapes import ConeSideSurface, pair_intersections
+from .index import bounding_boxes, candidate_pairs
+from .table import PartTable
+from .raster import raster_intersections
+from .cache import intersection_cache, ResultCache
+from .instrument import CaseProfile, surface_kinds, timer
+from .slowdown import SlowdownModel, SlowdownCurve
+from .wake import superpose_wakes
 
 
 class Case:
     """
-
+    Engines for the intersection areas of the frontal surfaces:
+        'pairwise' calls the scalar functions of tool/shapes.py for every pair of parts
+        'batch' computes the overlap areas of all candidate pairs in one vectorised call
+        'table' solves the wake on a columnar PartTable, with the same overlap areas as 'batch'
+        'raster' approximates the overlap areas on a grid with cells of cell_size by cell_size,
+                 see tool/raster.py
+    Only pairs with overlapping bounding boxes reach either engine. With a wake_cutoff, pairs
+    further apart along the flow than wake_cutoff times the characteristic length of the
+    upstream part are skipped as well.
+    With cache=True, the 'pairwise' engine looks the areas up in the process wide
+    IntersectionCache of tool/cache.py, so every distinct pair is only computed once. The other
+    engines compute all overlaps at once and raise a ValueError with cache=True.
+    With a ResultCache of tool/cache.py as result_cache, run_case returns the stored result of a
+    case with the same inputs, without solving it again, and stores every result it computes.
+    With profile=True, the wall time of every phase and the intersection counters are
+    accumulated on a CaseProfile in self.profile, see tool/instrument.py.
+    The wake slowdown follows the curve through slowdown_xp and slowdown_fp, unless another
+    SlowdownModel of tool/slowdown.py is given as slowdown_model.
+    Wake models:
+        'largest' gives every part the wake of the upstream part with the largest intersection
+        'superposition' combines the wakes of all intersecting upstream parts, see tool/wake.py
     """
-    def __init__(self, case: str, geometry: str = None):
+    engines = ('pairwise', 'batch', 'table', 'raster')
+    wake_models = ('largest', 'superposition')
+
+    def __init__(self, case: str, geometry: str = None, engine: str = 'pairwise',
+                 wake_cutoff: float = None, cache: bool = False,
+                 profile: bool = False, cell_size: float = 0.005,
+                 slowdown_model: SlowdownModel = None, wake_model: str = 'largest',
+                 result_cache: ResultCache = None, files: CaseFiles = None):
+        if engine not in self.engines:
+            raise ValueError(f"Unknown intersection engine {engine}, choose from {self.engines}")
+        if wake_model not in self.wake_models:
+            raise ValueError(f"Unknown wake model {wake_model}, choose from {self.wake_models}")
+        if cache and engine != 'pairwise':
+            raise ValueError(f"The intersection cache only applies to the 'pairwise' engine, "
+                             f"not {engine}")
+
         self.parts = list()
         self.density = float()
         self.velocity = float()
@@ -23,10 +65,19 @@ class Case:
 
         self.slowdown_xp = (0, 2, 10, 100)
         self.slowdown_fp = (0, .85, .95, 1)
+        self.slowdown_model = slowdown_model
+        self.wake_model = wake_model
 
         self.geometry = geometry
+        self.engine = engine
+        self.wake_cutoff = wake_cutoff
+        self.cache = cache
+        self.result_cache = result_cache
+        self.cell_size = cell_size
+        self.profile = CaseProfile() if profile else None
+        self.table = None
         self.name = case
-        self.load_case()
+        self.load_case(files)
 
         self.result = tuple()
         self.cop = tuple()
@@ -36,7 +87,16 @@ class Case:
                f"Re={self.reynolds_number}, flow direction={self.flow_direction}] " \
                f"with parts: {self.parts}"
 
-    def write_to_file(self, filename: str = None):
+    def result_path(self, filename: str = None):
+        """
+        :return: Path of the result file written by write_to_file
+        """
+        return f"data/result_{self.name}.csv" if filename is None else f"data/{filename}.csv"
+
+    def result_lines(self):
+        """
+        :return: List of the lines of the result file, including the line endings
+        """
         lines = [f"Case, {self.name},,,\n,,,,\n",
                  f"Drag [N], {self.result[0]},,,\n",
                  f"Drag Area [m2], {self.result[1]},,,\n,,,,\n",
@@ -48,13 +108,30 @@ class Case:
             lines.append(f"{part.__name__}, {round(part.drag, 3)}, "
                          f"{round(part.wake_factor, 3)},,\n")
 
-        path = f"data/result_{self.name}.csv" if filename is None else f"data/{filename}.csv"
-        f = open(path, "w")
-        f.writelines(lines)
+        return lines
+
+    def write_to_file(self, filename: str = None):
+        f = open(self.result_path(filename), "w")
+        f.writelines(self.result_lines())
         f.close()
 
+    def get_slowdown_model(self):
+        """
+        :return: The SlowdownModel of the case
+        """
+        if self.slowdown_model is None:
+            return SlowdownCurve(self.slowdown_xp, self.slowdown_fp)
+        return self.slowdown_model
+
     def plot_slowdown(self):
-        plt.plot(self.slowdown_xp, self.slowdown_fp, marker='o', markersize=5, linestyle='dashed')
+        import matplotlib.pyplot as plt
+
+        model = self.get_slowdown_model()
+        if isinstance(model, SlowdownCurve):
+            plt.plot(model.xp, model.fp, marker='o', markersize=5, linestyle='dashed')
+        else:
+            x = np.linspace(0, 100, 1001)
+            plt.plot(x, model.evaluate(x))
         plt.xlabel("$x/L_{char}$")
         plt.ylabel("$V/V_{flow}$")
         plt.ylim(0)
@@ -62,138 +139,303 @@ class Case:
         plt.grid()
         plt.show()
 
-    def load_case(self):
-        f = open(f"data/{self.name}.csv")
-        lines = [line.strip(",\n").split(", ") for line in f.readlines()]
-        f.close()
+    def load_case(self, files: CaseFiles = None):
+        """
+        :param files: CaseFiles already read from the case and geometry files, see
+                tool/pipeline.py. The files are read if not given.
+        :return: None
+        """
+        conditions, geometry = read_case_files(self.name, self.geometry) if files is None else files
+
+        self.density, self.velocity = conditions['Density'], conditions['Velocity']
+        self.flow_direction = conditions['flow_direction']
+        self.parts = geometry.build_parts(self.density, self.velocity)
+
+    def intersection_pairs(self):
+        """
+        Determine the intersection areas of the frontal surfaces of the parts, for the
+        pairs that pass the bounding box index and the wake cutoff
+        :return: (Array with the upstream index of every pair, Array with the downstream index,
+                  Array with the area of intersection)
+        """
+        surfaces = [part.get_frontal_surface() for part in self.parts]
+        index_1, index_2 = candidate_pairs(bounding_boxes(surfaces))
+
+        if self.wake_cutoff is not None:
+            position = np.array([part.position[self.flow_direction] for part in self.parts])
+            length = np.array([part.get_characteristic_length() for part in self.parts])
+            distance = position[index_2] - position[index_1]
+            keep = distance <= self.wake_cutoff * length[index_1]
+            index_1, index_2 = index_1[keep], index_2[keep]
+
+        if self.engine == 'batch':
+            areas = pair_intersections(surfaces, index_1, index_2)
+        elif self.engine == 'raster':
+            areas = raster_intersections(surfaces, index_1, index_2, self.cell_size)
+        else:
+            areas = self.pairwise_intersections(surfaces, index_1, index_2)
+
+        if self.profile is not None:
+            kinds = surface_kinds(surfaces)
+            self.profile.count_pairs(kinds[index_1], kinds[index_2], areas)
+
+        return index_1, index_2, areas
+
+    def pairwise_intersections(self, surfaces, index_1, index_2):
+        """
+        Compute the intersection areas of the given pairs with the scalar functions
+        :return: Array with the area of intersection of every pair
+        """
+        intersection = intersection_cache.intersection if self.cache else \
+            (lambda surface, other: surface.intersection(other))
+
+        areas = np.zeros(index_1.size)
+        for pair, (part_1, part_2) in enumerate(zip(index_1, index_2)):
+            surface, other_surface = surfaces[part_1], surfaces[part_2]
+            try:
+                areas[pair] = intersection(surface, other_surface)
+            except TypeError:
+                raise Exception(f'{self.parts[part_1].__name__, self.parts[part_2].__name__}'
+                                f'{surface, other_surface}')
+
+        return areas
+
+    def solve_wake(self):
+        """
+        Determine the frontal surfaces and the wake slowdown of all parts. These only depend on
+        the geometry and the flow direction, not on the density or velocity.
+        :return: None
+        """
+        if self.engine == 'table':
+            self.solve_wake_table()
+            return
 
-        self.density, self.velocity = (float(value) for value in lines[2][0:2])
-        self.flow_direction = int(lines[2][2])
-
-        if self.geometry is not None:
-            f = open(f"data/{self.geometry}.csv")
-            lines = [line.strip(",\n").split(", ") for line in f.readlines()]
-            f.close()
-
-        line = lines[5]
-        count = 5
-        while line[0] != 'Cylinders':
-            if "#" not in line[0]:
-                name = str(line[0])
-                position = tuple(float(value) for value in line[1:4])
-                radius = float(line[4])
-                self.parts.append(Sphere(self.density, self.velocity, position, radius, name=name))
-
-            count += 1
-            line = lines[count]
-
-        count += 2
-        line = lines[count]
-        while line[0] != 'Cuboids':
-            if "#" not in line[0]:
-                name = str(line[0])
-                position = tuple(float(value) for value in line[1:4])
-                radius, length = tuple(float(value) for value in line[4:6])
-                orientation = int(line[6])
-                self.parts.append(
-                    Cylinder(self.density, self.velocity, position, radius, length, orientation,
-                             name=name))
-
-            count += 1
-            line = lines[count]
-
-        count += 2
-        line = lines[count]
-        while line[0] != 'IceCream Cones':
-            if "#" not in line[0]:
-                name = str(line[0])
-                position = tuple(float(value) for value in line[1:4])
-                dimensions = tuple(float(value) for value in line[4:7])
-                self.parts.append(Cuboid(self.density, self.velocity, position, dimensions,
-                                         name=name))
-
-            count += 1
-            line = lines[count]
-
-        count += 2
-        line = lines[count]
-        while line[0] != 'Disks':
-            if "#" not in line[0]:
-                name = str(line[0])
-                position = tuple(float(value) for value in line[1:4])
-                radius, length_cylinder, length_cone = tuple(float(value) for value in line[4:7])
-                orientation = int(line[7])
-                self.parts.append(
-                    IceCreamCone(self.density, self.velocity, position, radius, length_cylinder,
-                                 length_cone, orientation, name=name))
-
-            count += 1
-            line = lines[count]
-
-        count += 2
-        line = lines[count]
-        while line[0] != '':
-            if "#" not in line[0]:
-                name = str(line[0])
-                position = tuple(float(value) for value in line[1:4])
-                radius = float(line[4])
-                orientation = tuple(int(value) for value in line[5:7])
-
-                self.parts.append(Disk(self.density, self.velocity, position, radius,
-                                       orientation, name=name))
-
-            count += 1
-            line = lines[count]
-
-    def run_case(self):
         perpendicular_plane = [0, 2, 1]
         perpendicular_plane.remove(self.flow_direction)
 
         part: Part
-        for part in self.parts:
-            part.set_frontal_surface(*perpendicular_plane)
-            part.set_characteristic_length(self.flow_direction)
-            part.set_smallest_coordinate(self.flow_direction)
-
-        self.parts.sort()
-
-        for index_1, part in enumerate(self.parts):
-            surface = part.get_frontal_surface()
-
-            other_part: Part
-            for index_2, other_part in enumerate(self.parts[index_1+1:]):
-                slowdown = part.wake_slowdown
-
-                other_surface = other_part.get_frontal_surface()
-                try:
-                    area = surface.intersection(other_surface)
-                except TypeError:
-                    raise Exception(f'{part.__name__, other_part.__name__}{surface, other_surface}')
+        with timer(self.profile, 'frontal_surfaces'):
+            for part in self.parts:
+                part.reset_slowdown()
+                part.set_frontal_surface(*perpendicular_plane)
+                part.set_characteristic_length(self.flow_direction)
+                part.set_smallest_coordinate(self.flow_direction)
+
+        with timer(self.profile, 'sort'):
+            self.parts.sort()
+
+        with timer(self.profile, 'intersections'):
+            pairs = self.intersection_pairs()
+
+        with timer(self.profile, 'slowdown'):
+            if self.wake_model == 'superposition':
+                self.superpose_wake(*pairs)
+            else:
+                self.apply_wake(*pairs)
+
+    def slowdown_factors(self, index_1, index_2):
+        """
+        Evaluate the slowdown model for all pairs of sorted parts at once
+        :return: Array with the slowdown factor of every pair
+        """
+        position = np.array([part.position[self.flow_direction] for part in self.parts])
+        length = np.array([part.get_characteristic_length() for part in self.parts])
+        return self.get_slowdown_model()((position[index_2] - position[index_1]) /
+                                         length[index_1])
+
+    def apply_wake(self, index_1, index_2, areas):
+        """
+        Give every part the slowdown of the first upstream part with the largest intersection.
+        The slowdown factors of all pairs are evaluated at once, before the parts are solved.
+        :return: None
+        """
+        index_1, index_2 = np.asarray(index_1, dtype=int), np.asarray(index_2, dtype=int)
+        factors = self.slowdown_factors(index_1, index_2)
+
+        for part_1, part_2, area, factor in zip(index_1.tolist(), index_2.tolist(),
+                                                np.asarray(areas).tolist(), factors):
+            part, other_part = self.parts[part_1], self.parts[part_2]
+
+            if area > other_part.largest_intersection:
+                slowdown = part.wake_slowdown * factor
+
+                other_part.set_slowdown(slowdown, area)
+                other_part.set_largest_intersection(area)
+
+    def superpose_wake(self, index_1, index_2, areas):
+        """
+        Give every part the combined wake of all upstream parts it intersects with, see
+        tool/wake.py. The largest intersection of a part is its area covered by wakes.
+        :return: None
+        """
+        index_1, index_2 = np.asarray(index_1, dtype=int), np.asarray(index_2, dtype=int)
+        frontal_areas = np.array([part.get_frontal_surface().area for part in self.parts],
+                                 dtype=float)
+
+        wakes = superpose_wakes(index_1, index_2, areas, self.slowdown_factors(index_1, index_2),
+                                frontal_areas, np.arange(len(self.parts)))
+        for part, slowdown, wake_slowdown, wake_factor, area in zip(
+                self.parts, *(values.tolist() for values in wakes)):
+            part.slowdown, part.wake_slowdown = slowdown, wake_slowdown
+            part.wake_factor, part.largest_intersection = wake_factor, area
+
+    def solve_wake_table(self, table: PartTable = None):
+        """
+        Solve the wake on a PartTable of the parts, then sort the parts along the flow and copy
+        the wake results to them
+        :param table: PartTable with the rows in the order of self.parts, built from the parts
+                if not given
+        :return: None
+        """
+        with timer(self.profile, 'table'):
+            self.table = PartTable.from_parts(self.parts) if table is None else table
+
+        self.table.solve_wake(self.flow_direction, self.get_slowdown_model(),
+                              self.wake_cutoff, self.profile, self.wake_model)
+
+        table = self.table
+        self.parts = [self.parts[row] for row in table.order]
+        for part, slowdown, wake_slowdown, wake_factor, area in zip(
+                self.parts, table.slowdown[table.order].tolist(),
+                table.wake_slowdown[table.order].tolist(), table.wake_factor[table.order].tolist(),
+                table.largest_intersection[table.order].tolist()):
+            part.slowdown, part.wake_slowdown = slowdown, wake_slowdown
+            part.wake_factor, part.largest_intersection = wake_factor, area
+
+    def drag_areas(self):
+        """
+        Determine the drag area of every part after solving the wake, in the order of self.parts
+        :return: Array of drag areas
+        """
+        if self.engine == 'table':
+            return self.table.drag_areas(self.flow_direction)[self.table.order]
+
+        return np.array([part.drag_area(self.flow_direction) for part in self.parts])
+
+    def run_sweep(self, velocities, densities=None):
+        """
+        Determine the drag for a range of flow conditions, solving the wake only once
+        :param velocities: Array of flow velocities
+        :param densities: Array of densities with the same length, or one density for all
+                velocities. Defaults to the density of the case.
+        :return: (velocities, (drag, drag area, centre of pressure)) with one row per velocity
+        """
+        velocities = np.asarray(velocities, dtype=float).reshape(-1)
+        densities = np.broadcast_to(self.density if densities is None else densities,
+                                    velocities.shape).astype(float)
+
+        self.solve_wake()
+
+        perpendicular_plane = [axis for axis in (0, 1, 2) if axis != self.flow_direction]
+        drag_areas = self.drag_areas()
+        moment_arms = np.array([[part.position[axis] if axis in perpendicular_plane and
+                                 'rotor' not in part.__name__ else 0. for axis in (0, 1, 2)]
+                                for part in self.parts]).reshape(-1, 3)
+
+        dynamic_pressure = 0.5 * densities * velocities ** 2
+        drag = dynamic_pressure[:, None] * drag_areas[None, :]
+        total_drag = drag.sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cop = np.round((drag @ moment_arms) / total_drag[:, None], 3) + 0.
+            drag_area = total_drag / dynamic_pressure
+
+        return velocities, (np.round(total_drag, 3), np.round(drag_area, 3), cop)
+
+    def run_directions(self, directions=(0, 1, 2), geometries: dict = None):
+        """
+        Determine the drag for several flow directions on the same parts, without loading the
+        case again. The table engine builds the PartTable of the parts once for all directions.
+        :param directions: Flow directions to evaluate
+        :param geometries: Dictionary of flow direction to the name of a geometry file in the
+                data folder, whose parts replace those of the case for that direction. Disks only
+                have a drag along their axis, so the final concept uses final_concept_1 without
+                rotors along the y axis.
+        :return: Dictionary of flow direction to (drag, drag area, centre of pressure), as the
+                 result of run_case
+        """
+        flow_direction, parts = self.flow_direction, list(self.parts)
+        geometries = {} if geometries is None else geometries
+        table = PartTable.from_parts(parts) if self.engine == 'table' else None
+
+        results = {}
+        try:
+            for direction in directions:
+                self.flow_direction, self.parts = direction, list(parts)
+                if direction in geometries:
+                    self.parts = load_geometry(f"data/{geometries[direction]}.csv").build_parts(
+                        self.density, self.velocity)
+                    _, results[direction] = self.run_case()
+                else:
+                    _, results[direction] = self.run_case(table)
+        finally:
+            self.flow_direction, self.parts = flow_direction, parts
+
+        return results
+
+    def run_case(self, table: PartTable = None):
+        """
+        Determine the drag of the case, or look it up in the result_cache
+        :param table: PartTable of the parts to reuse with the table engine, see run_directions
+        :return: (velocity, (drag, drag area, centre of pressure))
+        """
+        if self.result_cache is None:
+            return self.solve_case(table)
+
+        key = self.result_cache.key(self)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            self.load_result(*cached)
+            return self.velocity, self.result
+
+        rows = {id(part): row for row, part in enumerate(self.parts)}
+        self.solve_case(table)
+        self.result_cache.put(key, self.result, [(rows[id(part)], part.drag, part.wake_factor)
+                                                 for part in self.parts])
+        return self.velocity, self.result
 
-                if area > other_part.largest_intersection:
-                    # print(part.__name__, other_part.__name__, area / other_surface.area)
-                    # print("\t", surface, other_surface)
-                    distance = (other_part.position[self.flow_direction] -
-                                part.position[self.flow_direction])
-                    x = distance / part.get_characteristic_length()
+    def load_result(self, result: tuple, parts):
+        """
+        Restore the result of run_case stored by a ResultCache, with the parts in the order and
+        with the drag and V/V_flow of the stored run
+        :param result: (drag, drag area, centre of pressure)
+        :param parts: Sequence of (row, drag, V/V_flow), see ResultCache.put
+        :return: None
+        """
+        self.result, self.cop = result, result[2]
+        self.parts = [self.parts[row] for row, _, _ in parts]
+        for part, (_, drag, wake_factor) in zip(self.parts, parts):
+            part.drag, part.wake_factor = drag, wake_factor
+
+    def solve_case(self, table: PartTable = None):
+        """
+        Determine the drag of the case, see run_case
+        """
+        perpendicular_plane = [0, 2, 1]
+        perpendicular_plane.remove(self.flow_direction)
 
-                    slowdown *= round(np.interp(x, self.slowdown_xp, self.slowdown_fp), 4)
-                    # print("\t", distance, x, slowdown)
+        if table is None:
+            self.solve_wake()
+        else:
+            self.solve_wake_table(table)
 
-                    other_part.set_slowdown(slowdown, area)
-                    other_part.set_largest_intersection(area)
+        with timer(self.profile, 'drag'):
+            if self.engine == 'table':
+                for part, drag_area in zip(self.parts, self.drag_areas().tolist()):
+                    part.drag = part.dynamic_pressure * drag_area
 
-        total_drag = 0.
+            total_drag = 0.
 
-        total_moments = [0., 0., 0.]
+            total_moments = [0., 0., 0.]
 
-        for part in self.parts:
-            part.apply_slowdown(self.flow_direction)
-            total_drag += part.drag
+            for part in self.parts:
+                if self.engine != 'table':
+                    part.apply_slowdown(self.flow_direction)
+                total_drag += part.drag
 
-            if 'rotor' not in part.__name__:
-                for direction in perpendicular_plane:
-                    total_moments[direction] += part.drag * part.position[direction]
+                if 'rotor' not in part.__name__:
+                    for direction in perpendicular_plane:
+                        total_moments[direction] += part.drag * part.position[direction]
 
         self.cop = tuple(round(moment / total_drag, 3) for moment in total_moments)
 
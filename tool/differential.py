@@ -0,0 +1,286 @@
+"""
+Differential testing of alternative engines against the reference Case.run_case on random
+synthetic cases, with shrinking of failing geometries and the speedup of every engine
+"""
+
+import time
+
+import numpy as np
+
+from .case import Case
+from .geometry import CaseFiles, Geometry
+from .slowdown import SlowdownCurve, SlowdownFunction
+from .synthetic import case_lines, geometry_sections, synthetic_case_files
+
+
+# Largest absolute differences accepted from the reference. The results of run_case are
+# rounded to 3 decimals, so values on either side of a rounding boundary differ by 0.001.
+default_tolerances = {'drag': 1.5e-3, 'drag_area': 1.5e-3, 'cop': 1.5e-3, 'wake_factor': 1e-6}
+
+
+def case_engine(**options):
+    """
+    Engine running a Case with the given keyword arguments, such as engine='table'
+    :return: Function of CaseFiles and the keyword arguments of Case of the random case, see
+             random_case_options, returning (result of run_case, dictionary of part name to
+             V/V_flow)
+    """
+    def run(files: CaseFiles, **case_options):
+        case = Case('differential', files=files, **{**case_options, **options})
+        _, result = case.run_case()
+        return result, {part.__name__: part.wake_factor for part in case.parts}
+
+    run.options = options
+    return run
+
+
+def random_case_files(rng, max_parts: int = 30, min_parts: int = 2):
+    """
+    Synthetic case with a random number of parts, flow conditions and spacing
+    :param rng: numpy Generator
+    :param max_parts: Largest number of parts
+    :param min_parts: Smallest number of parts
+    :return: CaseFiles of the case
+    """
+    return synthetic_case_files(int(rng.integers(min_parts, max_parts + 1)),
+                                int(rng.integers(2 ** 31)),
+                                round(float(rng.uniform(1., 1.3)), 3),
+                                round(float(rng.uniform(1., 30.)), 2), int(rng.integers(3)),
+                                round(float(rng.uniform(.3, 1.5)), 2))
+
+
+def random_slowdown(rng):
+    """
+    The slowdown curve of Case, a random increasing SlowdownCurve, or a SlowdownFunction of a
+    random exponential recovery of the flow
+    :param rng: numpy Generator
+    :return: SlowdownModel, or None for the curve of Case
+    """
+    choice = int(rng.integers(3))
+    if choice == 1:
+        xp = np.sort(np.round(rng.uniform(.5, 50., 2), 2))
+        fp = np.sort(np.round(rng.uniform(.5, 1., 2), 3))
+        return SlowdownCurve((0., *xp, 100.), (0., *fp, 1.))
+    elif choice == 2:
+        scale = round(float(rng.uniform(1., 10.)), 2)
+
+        def recovery(x):
+            return 1 - np.exp(-x / scale)
+
+        return SlowdownFunction(recovery)
+
+    return None
+
+
+def random_case_options(rng):
+    """
+    Random wake_cutoff, wake_model and slowdown_model of a case, which the reference and every
+    other engine run with
+    :param rng: numpy Generator
+    :return: Dictionary of keyword arguments of Case
+    """
+    return {'wake_cutoff': round(float(rng.uniform(1., 20.)), 2) if rng.random() < .5 else None,
+            'wake_model': Case.wake_models[int(rng.integers(len(Case.wake_models)))],
+            'slowdown_model': random_slowdown(rng)}
+
+
+def compare(reference, output, tolerances: dict = None):
+    """
+    :param reference: Output of the reference engine, see case_engine
+    :param output: Output of the other engine, or the exception it raised
+    :param tolerances: Largest accepted absolute differences, see default_tolerances
+    :return: List of the differences beyond the tolerances, as messages
+    """
+    if isinstance(output, Exception):
+        return [f"{type(output).__name__}: {output}"]
+
+    tolerances = {**default_tolerances, **(tolerances or {})}
+    (drag, drag_area, cop), wake_factors = reference
+    (other_drag, other_drag_area, other_cop), other_wake_factors = output
+
+    messages = []
+    for name, value, other in (('drag', drag, other_drag), ('drag_area', drag_area,
+                                                            other_drag_area)):
+        if not np.isclose(value, other, rtol=0, atol=tolerances[name], equal_nan=True):
+            messages.append(f"{name}: {other} instead of {value}")
+    if not np.allclose(cop, other_cop, rtol=0, atol=tolerances['cop'], equal_nan=True):
+        messages.append(f"cop: {tuple(other_cop)} instead of {tuple(cop)}")
+
+    if set(wake_factors) != set(other_wake_factors):
+        messages.append(f"parts: {sorted(other_wake_factors)} instead of {sorted(wake_factors)}")
+        return messages
+
+    for name, value in wake_factors.items():
+        if abs(other_wake_factors[name] - value) > tolerances['wake_factor']:
+            messages.append(f"wake_factor of {name}: {other_wake_factors[name]} instead of "
+                            f"{value}")
+
+    return messages
+
+
+def _run(engine, files: CaseFiles, options: dict):
+    """
+    :return: (output of the engine or the exception it raised, seconds)
+    """
+    start = time.perf_counter()
+    try:
+        output = engine(files, **options)
+    except Exception as error:
+        output = error
+    return output, time.perf_counter() - start
+
+
+def shrink(files: CaseFiles, fails):
+    """
+    Remove parts from a case while it keeps failing, first in large blocks, then one by one
+    :param files: CaseFiles of the failing case
+    :param fails: Function of CaseFiles returning True while the case fails
+    :return: CaseFiles of the smallest failing case found
+    """
+    definitions = list(files.geometry.definitions)
+    block = max(len(definitions) // 2, 1)
+
+    while True:
+        start = 0
+        while start < len(definitions) and len(definitions) > 1:
+            candidate = definitions[:start] + definitions[start + block:]
+            if candidate and fails(CaseFiles(files.conditions, Geometry(candidate))):
+                definitions = candidate
+            else:
+                start += block
+
+        if block == 1:
+            return CaseFiles(files.conditions, Geometry(definitions))
+        block //= 2
+
+
+class Mismatch:
+    """
+    Case on which an engine differs from the reference
+        engine: Name of the engine
+        index: Index of the random case
+        messages: Differences of the shrunk case, see compare
+        files: CaseFiles of the shrunk case
+        parts: Number of parts before shrinking
+        options: Keyword arguments of Case of the random case, see random_case_options
+    """
+    def __init__(self, engine: str, index: int, messages, files: CaseFiles, parts: int,
+                 options: dict = None):
+        self.engine = engine
+        self.index = index
+        self.messages = messages
+        self.files = files
+        self.parts = parts
+        self.options = {} if options is None else options
+
+    def __repr__(self):
+        return f"Mismatch of {self.engine} on case {self.index} with " \
+               f"{len(self.files.geometry)}/{self.parts} parts and {self.options}: " \
+               f"{self.messages}"
+
+    def lines(self):
+        """
+        :return: The shrunk case in the case file format, as a generator of lines
+        """
+        conditions = self.files.conditions
+        return case_lines(geometry_sections(self.files.geometry), conditions['Density'],
+                          conditions['Velocity'], conditions['flow_direction'])
+
+    def write(self, path: str):
+        """
+        Write the shrunk case as a case file, to reproduce the mismatch with Case and the
+        options of the mismatch
+        :return: None
+        """
+        with open(path, "w") as f:
+            f.writelines(self.lines())
+
+
+class DifferentialReport:
+    """
+    Outcome of differential_test
+        cases: Number of random cases
+        seconds: Dictionary of engine name to the total run time over all cases, with the
+                 reference as 'reference'
+        mismatches: List of Mismatch objects
+    """
+    def __init__(self, cases: int, seconds: dict, mismatches):
+        self.cases = cases
+        self.seconds = seconds
+        self.mismatches = mismatches
+
+    def __repr__(self):
+        return f"DifferentialReport of {self.cases} cases with {len(self.mismatches)} mismatches"
+
+    def speedups(self):
+        """
+        :return: Dictionary of engine name to the run time of the reference over its run time
+        """
+        return {name: self.seconds['reference'] / seconds
+                for name, seconds in self.seconds.items() if name != 'reference'}
+
+    def report(self):
+        """
+        :return: Text table of the run time, speedup and mismatches of every engine
+        """
+        lines = [f"{'Engine':>12} {'Time [s]':>10} {'Speedup':>8} {'Mismatches':>11}",
+                 f"{'reference':>12} {self.seconds['reference']:>10.4f} {1:>8.2f} {'':>11}"]
+        for name, speedup in self.speedups().items():
+            count = sum(mismatch.engine == name for mismatch in self.mismatches)
+            lines.append(f"{name:>12} {self.seconds[name]:>10.4f} {speedup:>8.2f} {count:>11}")
+
+        return "\n".join(lines + [repr(mismatch) for mismatch in self.mismatches])
+
+
+def differential_test(engines: dict, reference=None, cases: int = 100, seed: int = 0,
+                      max_parts: int = 30, tolerances: dict = None, shrink_failures: bool = True,
+                      min_parts: int = 2, random_options: bool = True):
+    """
+    Run random synthetic cases through a reference engine and every other engine, and compare
+    their drag, drag area, centre of pressure and the V/V_flow of every part
+    :param engines: Dictionary of engine name to engine, a function of CaseFiles and keyword
+            arguments of Case returning the result and the V/V_flow of the parts as case_engine
+    :param reference: Reference engine, defaults to the 'pairwise' engine of Case
+    :param cases: Number of random cases
+    :param seed: Seed of the random cases
+    :param max_parts: Largest number of parts of a random case
+    :param tolerances: Largest accepted absolute differences, see default_tolerances
+    :param shrink_failures: Remove the parts that are not needed to reproduce a mismatch
+    :param min_parts: Smallest number of parts of a random case
+    :param random_options: Run every case with a random wake_cutoff, wake_model and
+            slowdown_model, the same for the reference and every engine, see random_case_options
+    :return: DifferentialReport
+    """
+    reference = case_engine() if reference is None else reference
+    rng = np.random.default_rng(seed)
+
+    seconds = dict.fromkeys(['reference', *engines], 0.)
+    mismatches = []
+    for index in range(cases):
+        files = random_case_files(rng, max_parts, min_parts)
+        options = random_case_options(rng) if random_options else {}
+        expected, elapsed = _run(reference, files, options)
+        seconds['reference'] += elapsed
+        if isinstance(expected, Exception):
+            raise RuntimeError(f"The reference engine failed on case {index}") from expected
+
+        for name, engine in engines.items():
+            output, elapsed = _run(engine, files, options)
+            seconds[name] += elapsed
+            if not compare(expected, output, tolerances):
+                continue
+
+            def fails(candidate):
+                output_reference = _run(reference, candidate, options)[0]
+                return not isinstance(output_reference, Exception) and \
+                    bool(compare(output_reference, _run(engine, candidate, options)[0],
+                                 tolerances))
+
+            shrunk = shrink(files, fails) if shrink_failures else files
+            messages = compare(reference(shrunk, **options), _run(engine, shrunk, options)[0],
+                               tolerances)
+            mismatches.append(Mismatch(name, index, messages, shrunk, len(files.geometry),
+                                       options))
+
+    return DifferentialReport(cases, seconds, mismatches)
+
@@ -0,0 +1,290 @@
+"""
+Parsed part definitions of case and geometry files, shared between cases through a process wide
+cache. The density and velocity are only bound when the parts are built for a case.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .objects import Sphere, Cylinder, Cuboid, IceCreamCone, Disk
+
+
+PartDefinition = namedtuple('PartDefinition', ('part_type', 'name', 'parameters'))
+CaseFiles = namedtuple('CaseFiles', ('conditions', 'geometry'))
+Column = namedtuple('Column', ('name', 'dtype', 'width'))
+Section = namedtuple('Section', ('part_type', 'columns'))
+
+# The columns after name and centre x, y, z in every part section of a case file
+SECTIONS = {'Spheres': Section(Sphere, (Column('radius', float, 1),)),
+            'Cylinders': Section(Cylinder, (Column('radius', float, 1),
+                                            Column('length', float, 1),
+                                            Column('orientation', int, 1))),
+            'Cuboids': Section(Cuboid, (Column('dimensions', float, 3),)),
+            'IceCream Cones': Section(IceCreamCone, (Column('radius', float, 1),
+                                                     Column('length_cylinder', float, 1),
+                                                     Column('length_cone', float, 1),
+                                                     Column('orientation', int, 1))),
+            'Disks': Section(Disk, (Column('radius', float, 1),
+                                    Column('orientation', int, 2))),
+            }
+
+
+class CaseFileError(ValueError):
+    """
+    Raised for case and geometry files that are truncated or malformed
+    """
+    def __init__(self, path: str, line_number: int, message: str):
+        super().__init__(f"{path}, line {line_number}: {message}")
+        self.path = path
+        self.line_number = line_number
+
+
+class Geometry:
+    """
+    Immutable collection of part definitions, parsed from a case or geometry file
+        columns holds the typed column arrays of every part section in the file
+    """
+    def __init__(self, definitions, columns=None):
+        self._definitions = tuple(definitions)
+        self.columns = {} if columns is None else columns
+
+    def __repr__(self):
+        return f"Geometry with {len(self)} parts: {[d.name for d in self._definitions]}"
+
+    def __len__(self):
+        return len(self._definitions)
+
+    def __iter__(self):
+        return iter(self._definitions)
+
+    @property
+    def definitions(self):
+        return self._definitions
+
+    def build_parts(self, density: float, velocity: float):
+        """
+        Create the Part objects of this geometry for the given flow conditions
+        :param density: Density of the flow
+        :param velocity: Velocity of the flow
+        :return: List of new Part objects
+        """
+        return [definition.part_type(density, velocity, *definition.parameters,
+                                     name=definition.name)
+                for definition in self._definitions]
+
+
+def tokenize(stream):
+    """
+    Split the lines of a case file into fields, skipping blank lines
+    :param stream: Iterable of lines
+    :return: Generator of (line number, tuple of fields)
+    """
+    for line_number, line in enumerate(stream, start=1):
+        fields = [field.strip() for field in line.strip().split(",")]
+        while len(fields) > 1 and fields[-1] == '':
+            fields.pop()
+
+        if fields != [''] or ',' in line:
+            yield line_number, tuple(fields)
+
+
+class _CaseFileReader:
+    """
+    Single pass reader of a case file, from a stream of tokenized lines
+    """
+    def __init__(self, stream, path: str):
+        self.path = path
+        self.tokens = tokenize(stream)
+        self.line_number = 0
+
+    def error(self, message: str):
+        return CaseFileError(self.path, self.line_number, message)
+
+    def next(self, expected: str):
+        try:
+            self.line_number, fields = next(self.tokens)
+        except StopIteration:
+            raise CaseFileError(self.path, self.line_number,
+                                f"file ends early, expected {expected}") from None
+        return fields
+
+    def number(self, value: str, dtype, column: str):
+        try:
+            return dtype(value)
+        except ValueError:
+            raise self.error(f"invalid value '{value}' for {column}") from None
+
+    def read_conditions(self):
+        if self.next("'Case Definition'")[0] != 'Case Definition':
+            raise self.error("expected 'Case Definition'")
+
+        header = self.next("the case definition header")
+        values = self.next("the case definition values")
+
+        if len(values) < len(header):
+            raise self.error(f"expected {len(header)} case definition values, got {len(values)}")
+
+        conditions = {column: value for column, value in zip(header, values)}
+        for key, dtype in (('Density', float), ('Velocity', float), ('flow_direction', int)):
+            if key not in conditions:
+                raise CaseFileError(self.path, self.line_number - 1, f"missing column {key}")
+            conditions[key] = self.number(conditions[key], dtype, key)
+
+        return conditions
+
+    def read_section(self, section: Section):
+        header = self.next("the section header")
+        if header[0] != 'name':
+            raise self.error(f"expected a column header starting with 'name', got '{header[0]}'")
+
+        width = 4 + sum(column.width for column in section.columns)
+        names, positions = [], []
+        values = {column.name: [] for column in section.columns}
+
+        while True:
+            fields = self.next("a part, a section or the closing ',' line")
+
+            if fields[0] in SECTIONS or fields[0] == '':
+                break
+            elif '#' in fields[0]:
+                continue
+            elif len(fields) != width:
+                raise self.error(f"expected {width} values for part '{fields[0]}', "
+                                 f"got {len(fields)}")
+
+            names.append(fields[0])
+            positions.append(tuple(self.number(value, float, 'centre') for value in fields[1:4]))
+
+            index = 4
+            for column in section.columns:
+                row = tuple(self.number(value, column.dtype, column.name)
+                            for value in fields[index:index + column.width])
+                values[column.name].append(row[0] if column.width == 1 else row)
+                index += column.width
+
+        columns = {'name': np.array(names, dtype=str),
+                   'position': np.array(positions, dtype=float).reshape(-1, 3)}
+        for column in section.columns:
+            columns[column.name] = np.array(values[column.name], dtype=column.dtype)
+            if column.width > 1:
+                columns[column.name] = columns[column.name].reshape(-1, column.width)
+
+        for array in columns.values():
+            array.flags.writeable = False
+
+        definitions = [PartDefinition(section.part_type, name,
+                                      (positions[index],) + tuple(values[column.name][index]
+                                                                  for column in section.columns))
+                       for index, name in enumerate(names)]
+
+        return fields, columns, definitions
+
+    def read_geometry(self):
+        definitions, columns = [], {}
+        fields = self.next("the first part section")
+
+        while fields[0] != '':
+            if fields[0] not in SECTIONS:
+                raise self.error(f"unknown section '{fields[0]}', expected one of "
+                                 f"{tuple(SECTIONS)}")
+            elif fields[0] in columns:
+                raise self.error(f"section '{fields[0]}' appears twice")
+
+            name = fields[0]
+            fields, columns[name], section_definitions = self.read_section(SECTIONS[name])
+            definitions += section_definitions
+
+        return Geometry(definitions, columns)
+
+
+def read_conditions(path: str):
+    """
+    Read the flow conditions from the case definition at the start of a case file
+    :param path: Path to the file
+    :return: Dictionary with the case definition values, with Density, Velocity and
+             flow_direction converted to numbers
+    """
+    with open(path) as f:
+        return _CaseFileReader(f, path).read_conditions()
+
+
+def parse_geometry(stream, path: str = '<stream>'):
+    """
+    Parse the part sections of a case or geometry file in a single pass
+    :param stream: Iterable of the lines of the file
+    :param path: Name of the file in error messages
+    :return: Geometry with the parsed part definitions
+    """
+    return parse_case(stream, path).geometry
+
+
+def parse_case(stream, path: str = '<stream>'):
+    """
+    Parse the flow conditions and the part sections of a case file in a single pass
+    :param stream: Iterable of the lines of the file
+    :param path: Name of the file in error messages
+    :return: CaseFiles with the dictionary of conditions, see read_conditions, and the Geometry
+    """
+    reader = _CaseFileReader(stream, path)
+    conditions = reader.read_conditions()
+    return CaseFiles(conditions, reader.read_geometry())
+
+
+_geometry_cache = {}
+
+
+def _geometry_key(path: str):
+    return os.path.abspath(path), os.stat(path).st_mtime_ns
+
+
+def _store_geometry(key, geometry: Geometry):
+    # Other threads may load the same file at the same time, see tool/pipeline.py
+    for old_key in [old_key for old_key in list(_geometry_cache) if old_key[0] == key[0]]:
+        _geometry_cache.pop(old_key, None)
+    _geometry_cache[key] = geometry
+    return geometry
+
+
+def load_geometry(path: str):
+    """
+    Load the geometry of a case or geometry file, reusing the parsed geometry as long as the
+    file is not modified
+    :param path: Path to the file
+    :return: The shared Geometry of the file
+    """
+    key = _geometry_key(path)
+
+    if key not in _geometry_cache:
+        with open(path) as f:
+            return _store_geometry(key, parse_geometry(f, path))
+
+    return _geometry_cache[key]
+
+
+def read_case_files(name: str, geometry: str = None):
+    """
+    Read the flow conditions and the geometry of a case from the data folder. Without a separate
+    geometry file, the case file is read once: only its case definition if its geometry is in
+    the cache, both in a single pass otherwise.
+    :param name: Name of the case file, relative to the data folder
+    :param geometry: Name of the geometry file, the geometry of the case file if not given
+    :return: CaseFiles with the dictionary of conditions, see read_conditions, and the Geometry
+    """
+    path = f"data/{name}.csv"
+    if geometry is not None:
+        return CaseFiles(read_conditions(path), load_geometry(f"data/{geometry}.csv"))
+
+    key = _geometry_key(path)
+    if key in _geometry_cache:
+        return CaseFiles(read_conditions(path), _geometry_cache[key])
+
+    with open(path) as f:
+        files = parse_case(f, path)
+    _store_geometry(key, files.geometry)
+    return files
+
+
+def clear_geometry_cache():
+    _geometry_cache.clear()
@@ -0,0 +1,231 @@
+"""
+Incremental re-evaluation of a case after moving or resizing single parts
+"""
+
+import heapq
+import math
+
+import numpy as np
+
+from .index import candidate_pairs
+from .shapes import overlap_pairs
+from .table import PartTable
+from .sensitivity import check_parameter, parameter_columns
+
+
+class IncrementalCase:
+    """
+    Wake and drag of a case that can be updated one part at a time. Every part keeps the parts
+    its frontal surface overlaps with, so an update only recomputes the overlaps of the changed
+    part. Only the parts that overlap it, and the parts in their wake, are solved again. The
+    totals are updated with the change in drag area of those parts.
+        The parts are the rows of self.table, in the order of the parts of the case.
+        The wake model is that of the 'table' engine of Case.
+    """
+    def __init__(self, case):
+        if case.wake_model != 'largest':
+            raise ValueError(f"IncrementalCase only supports the 'largest' wake model, "
+                             f"got {case.wake_model}")
+
+        self.flow_direction = case.flow_direction
+        self.slowdown_model = case.get_slowdown_model()
+        self.wake_cutoff = case.wake_cutoff
+        self.velocity = case.velocity
+        self.dynamic_pressure = 0.5 * case.density * case.velocity ** 2
+        self.plane = [axis for axis in (0, 2, 1) if axis != self.flow_direction]
+
+        self.table = PartTable.from_parts(case.parts)
+        size = len(self.table)
+
+        self.circle, self.rectangles, self.circles, self.areas = \
+            self.table.frontal_surfaces(*self.plane)
+        self.lengths = self.table.characteristic_lengths(self.flow_direction)
+        self.smallest = self.table.smallest_coordinates(self.flow_direction)
+        self.base_drag_areas = self.table.base_drag_areas(self.flow_direction)
+        self.friction_drag_areas = np.minimum(
+            self.table.friction_coefficients() * self.table.wet_areas(), self.base_drag_areas)
+        self.rotor = np.array(['rotor' in name for name in self.table.name], dtype=bool)
+
+        # Positive overlaps of every part with the other parts
+        self.neighbours = [{} for _ in range(size)]
+        index_1, index_2 = candidate_pairs(self.rectangles)
+        overlap = overlap_pairs(self.circle, self.rectangles, self.circles, index_1, index_2)
+        for part_1, part_2, area in zip(index_1.tolist(), index_2.tolist(), overlap.tolist()):
+            if area > 0:
+                self.neighbours[part_1][part_2] = area
+                self.neighbours[part_2][part_1] = area
+
+        self.upstream = [-1] * size
+        self.downstream = [set() for _ in range(size)]
+        self.slowdown = [1.] * size
+        self.wake_slowdown = [1.] * size
+        self.largest_intersection = [0.] * size
+        self.drag_areas = [0.] * size
+
+        self.total_drag_area = 0.
+        self.total_moments = [0., 0., 0.]
+
+        self.resolve(range(size))
+
+    def __repr__(self):
+        return f"IncrementalCase with {len(self.table)} parts: {self.result}"
+
+    def key(self, row: int):
+        """
+        Position of a part along the flow, as the stable sort of the parts in Case
+        """
+        return self.smallest[row], row
+
+    def moment_arms(self, row: int):
+        if self.rotor[row]:
+            return 0., 0., 0.
+        return tuple(position if axis in self.plane else 0.
+                     for axis, position in enumerate(self.table.position[row].tolist()))
+
+    def add_drag_area(self, row: int, drag_area: float):
+        self.total_drag_area += drag_area - self.drag_areas[row]
+        for axis, arm in enumerate(self.moment_arms(row)):
+            self.total_moments[axis] += (drag_area - self.drag_areas[row]) * arm
+        self.drag_areas[row] = drag_area
+
+    def recompute_totals(self):
+        """
+        Sum the totals over all parts again, without the rounding errors that updating them by
+        differences accumulates
+        :return: None
+        """
+        arms = [self.moment_arms(row) for row in range(len(self.drag_areas))]
+        self.total_drag_area = math.fsum(self.drag_areas)
+        self.total_moments = [math.fsum(drag_area * arm[axis] for drag_area, arm in
+                                        zip(self.drag_areas, arms)) for axis in (0, 1, 2)]
+
+    def solve_part(self, row: int):
+        """
+        Give a part the slowdown of the first upstream part with the largest overlap
+        :return: True if the wake slowdown of the part changed
+        """
+        key = self.key(row)
+        position = self.table.position[:, self.flow_direction]
+
+        upstream, largest = -1, 0.
+        for other, area in self.neighbours[row].items():
+            if self.key(other) > key:
+                continue
+            if self.wake_cutoff is not None and \
+                    position[row] - position[other] > self.wake_cutoff * self.lengths[other]:
+                continue
+            if area > largest or (area == largest and upstream >= 0 and
+                                  self.key(other) < self.key(upstream)):
+                upstream, largest = other, area
+
+        self.downstream[self.upstream[row]].discard(row)
+        self.upstream[row] = upstream
+
+        slowdown = 1.
+        wake_slowdown = 1.
+        if upstream >= 0:
+            self.downstream[upstream].add(row)
+            factor = self.slowdown_model.factor((position[row] - position[upstream]) /
+                                                float(self.lengths[upstream]))
+            slowdown = self.wake_slowdown[upstream] * factor
+            wake_slowdown = ((slowdown * largest + self.areas[row] - largest) / self.areas[row])
+
+        changed = wake_slowdown != self.wake_slowdown[row]
+        self.slowdown[row], self.wake_slowdown[row] = slowdown, wake_slowdown
+        self.largest_intersection[row] = largest
+
+        wake_factor = (slowdown ** 2 * largest + self.areas[row] - largest) / self.areas[row]
+        friction = self.friction_drag_areas[row]
+        self.add_drag_area(row, float(friction + wake_factor *
+                                      (self.base_drag_areas[row] - friction)))
+
+        return changed
+
+    def resolve(self, rows):
+        """
+        Solve the given parts in order along the flow, and the parts in the wake of every part
+        whose wake slowdown changes
+        :return: None
+        """
+        heap = [(self.key(row), row) for row in set(rows)]
+        heapq.heapify(heap)
+        queued = set(rows)
+
+        while heap:
+            _, row = heapq.heappop(heap)
+            queued.discard(row)
+
+            if self.solve_part(row):
+                for other in self.downstream[row] - queued:
+                    heapq.heappush(heap, (self.key(other), other))
+                    queued.add(other)
+
+    def row(self, part):
+        """
+        :param part: Row index or unique name of a part
+        :return: Row index of the part
+        """
+        if isinstance(part, str):
+            rows = np.flatnonzero(self.table.name == part)
+            if rows.size != 1:
+                raise KeyError(f"{rows.size} parts named '{part}'")
+            return int(rows[0])
+
+        return int(part)
+
+    def update(self, part, **parameters):
+        """
+        Move or resize a part, and update the wake and the totals
+        :param part: Row index or unique name of the part
+        :param parameters: New values of position, radius, length, length_cylinder,
+                length_cone or dimensions of the part, those of its kind, see check_parameter
+        :return: (velocity, (drag, drag area, centre of pressure)) as Case.run_case
+        """
+        row = self.row(part)
+        for parameter in parameters:
+            check_parameter(self.table, [row], parameter)
+
+        # Remove the part with its old moment arms, before adding it back with the new ones
+        self.add_drag_area(row, 0.)
+        for parameter, value in parameters.items():
+            getattr(self.table, parameter_columns[parameter])[row] = value
+
+        changed = self.table.take([row])
+        (self.circle[row], self.rectangles[row], self.circles[row],
+         self.areas[row]) = (column[0] for column in changed.frontal_surfaces(*self.plane))
+        self.lengths[row] = changed.characteristic_lengths(self.flow_direction)[0]
+        self.smallest[row] = changed.smallest_coordinates(self.flow_direction)[0]
+        self.base_drag_areas[row] = changed.base_drag_areas(self.flow_direction)[0]
+        self.friction_drag_areas[row] = min(
+            (changed.friction_coefficients() * changed.wet_areas())[0], self.base_drag_areas[row])
+
+        old_neighbours = set(self.neighbours[row])
+        for other in old_neighbours:
+            del self.neighbours[other][row]
+
+        box, boxes = self.rectangles[row], self.rectangles
+        others = np.flatnonzero((box[0] < boxes[:, 1]) & (boxes[:, 0] < box[1]) &
+                                (box[3] < boxes[:, 2]) & (boxes[:, 3] < box[2]))
+        others = others[others != row]
+        overlap = overlap_pairs(self.circle, self.rectangles, self.circles,
+                                np.full(others.size, row), others)
+
+        self.neighbours[row] = {other: area for other, area in
+                                zip(others.tolist(), overlap.tolist()) if area > 0}
+        for other, area in self.neighbours[row].items():
+            self.neighbours[other][row] = area
+
+        self.resolve({row} | old_neighbours | set(self.neighbours[row]) |
+                     self.downstream[row])
+
+        return self.result
+
+    @property
+    def result(self):
+        """
+        (velocity, (drag, drag area, centre of pressure)) as Case.run_case
+        """
+        total_drag = self.dynamic_pressure * self.total_drag_area
+        cop = tuple(round(moment / self.total_drag_area, 3) for moment in self.total_moments)
+
+        return self.velocity, (round(total_drag, 3), round(self.total_drag_area, 3), cop)
@@ -0,0 +1,55 @@
+"""
+Spatial index over the frontal surfaces, to find the pairs of parts that can overlap
+"""
+
+import numpy as np
+
+from .shapes import surface_arrays
+
+
+def bounding_boxes(surfaces):
+    """
+    Determine the axis aligned bounding box of every frontal surface
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :return: Array with rows [left, right, top, bottom], shape (n, 4)
+    """
+    rectangle_index, rectangles, circle_index, circles = surface_arrays(surfaces)
+
+    boxes = np.empty((len(surfaces), 4))
+    boxes[rectangle_index] = rectangles
+    boxes[circle_index, 0] = circles[:, 0] - circles[:, 2]
+    boxes[circle_index, 1] = circles[:, 0] + circles[:, 2]
+    boxes[circle_index, 2] = circles[:, 1] + circles[:, 2]
+    boxes[circle_index, 3] = circles[:, 1] - circles[:, 2]
+
+    return boxes
+
+
+def candidate_pairs(boxes):
+    """
+    Sort and sweep along the first axis of the plane to find all pairs of boxes with a
+    non-zero overlap. Boxes that only touch are left out, as their surfaces cannot overlap.
+    :param boxes: Array with rows [left, right, top, bottom], shape (n, 4)
+    :return: (Array with the lower index of every pair, Array with the higher index),
+             sorted by the lower index first and the higher index second
+    """
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    order = np.argsort(boxes[:, 0], kind='stable')
+    left = boxes[order, 0]
+
+    # Every box overlaps in the sweep direction with the following boxes that start before it ends
+    end = np.searchsorted(left, boxes[order, 1], side='left')
+    counts = np.clip(end - np.arange(1, order.size + 1), 0, None)
+
+    first = np.repeat(np.arange(order.size), counts)
+    offsets = np.arange(first.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    box_1, box_2 = order[first], order[first + 1 + offsets]
+
+    overlap = ((boxes[box_1, 0] < boxes[box_2, 1]) & (boxes[box_2, 0] < boxes[box_1, 1]) &
+               (boxes[box_1, 3] < boxes[box_2, 2]) & (boxes[box_2, 3] < boxes[box_1, 2]))
+    box_1, box_2 = box_1[overlap], box_2[overlap]
+
+    index_1, index_2 = np.minimum(box_1, box_2), np.maximum(box_1, box_2)
+    order = np.lexsort((index_2, index_1))
+
+    return index_1[order], index_2[order]
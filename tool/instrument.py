@@ -0,0 +1,94 @@
+"""
+Optional instrumentation of the phases of a case: wall time per phase, and the number of
+intersections by type of surface pair
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+from .shapes import ConeSideSurface, Circle
+
+
+# Codes of the surface kinds in surface_kinds
+RECTANGLE, CIRCLE, CONE_SIDE = 0, 1, 2
+
+
+def surface_kinds(surfaces):
+    """
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :return: Array with the kind code of every surface
+    """
+    return np.array([CONE_SIDE if isinstance(surface, ConeSideSurface) else
+                     CIRCLE if isinstance(surface, Circle) else RECTANGLE
+                     for surface in surfaces], dtype=int)
+
+
+class CaseProfile:
+    """
+    Wall time per phase and intersection counters, accumulated over every wake solution
+        times: Dictionary of phase name to seconds, in the order the phases first ran
+        calls: Dictionary of surface pair type to the number of intersections computed
+        overlaps: Dictionary of surface pair type to the number of those with a nonzero area
+    Any pair with the side view of an IceCreamCone counts as 'cone side'.
+    """
+    pair_types = ('rectangle/rectangle', 'rectangle/circle', 'circle/circle', 'cone side')
+
+    def __init__(self):
+        self.times = {}
+        self.calls = dict.fromkeys(self.pair_types, 0)
+        self.overlaps = dict.fromkeys(self.pair_types, 0)
+
+    def __repr__(self):
+        return f"CaseProfile: [times={self.times}, calls={self.calls}, overlaps={self.overlaps}]"
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.) + time.perf_counter() - start
+
+    def count_pairs(self, kinds_1, kinds_2, areas):
+        """
+        Count the intersections of a set of surface pairs
+        :param kinds_1: Array with the kind code of the first surface of every pair
+        :param kinds_2: Array with the kind code of the second surface of every pair
+        :param areas: Array with the intersection area of every pair
+        :return: None
+        """
+        kinds_1, kinds_2 = np.asarray(kinds_1), np.asarray(kinds_2)
+        pair_type = np.where((kinds_1 == CONE_SIDE) | (kinds_2 == CONE_SIDE), 3, kinds_1 + kinds_2)
+
+        calls = np.bincount(pair_type, minlength=4).tolist()
+        overlaps = np.bincount(pair_type[np.asarray(areas) > 0], minlength=4).tolist()
+        for index, name in enumerate(self.pair_types):
+            self.calls[name] += calls[index]
+            self.overlaps[name] += overlaps[index]
+
+    def as_dict(self):
+        return {'times': dict(self.times), 'calls': dict(self.calls),
+                'overlaps': dict(self.overlaps)}
+
+    def report(self):
+        """
+        :return: Table of the phase times and intersection counters, as text
+        """
+        total = sum(self.times.values())
+        lines = ["Phase, Time [s], Share [%]"]
+        lines += [f"{name}, {seconds:.6f}, {100 * seconds / total if total else 0.:.1f}"
+                  for name, seconds in self.times.items()]
+        lines += ["", "Pair type, Intersections, Nonzero overlaps"]
+        lines += [f"{name}, {self.calls[name]}, {self.overlaps[name]}"
+                  for name in self.pair_types]
+
+        return "\n".join(lines)
+
+
+def timer(profile, name: str):
+    """
+    Time a phase on profile, or do nothing without a profile
+    """
+    return nullcontext() if profile is None else profile.phase(name)
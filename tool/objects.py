@@ -36,6 +36,12 @@ class Part:
 
         self.__name__ = "Part"
 
+    def reset_slowdown(self):
+        self.slowdown = 1
+        self.wake_slowdown = 1
+        self.wake_factor = 1
+        self.largest_intersection = 0
+
     def set_slowdown(self, slowdown: float, area: float):
         self.slowdown = slowdown
         self.wake_slowdown = ((self.slowdown * area +
@@ -53,6 +59,18 @@ class Part:
 
         self.drag = friction_drag + pressure_drag
 
+    def drag_area(self, direction: int):
+        """
+        Determine the drag per unit dynamic pressure, including the wake of upstream parts
+        :param direction: Axis along which the flow is directed
+        :return: The drag area of the part
+        """
+        base_drag_area = self.calculate_base_drag_area(direction)
+        friction_drag_area = min(self.friction_coefficient * self.wet_area, base_drag_area)
+        pressure_drag_area = self.wake_factor * (base_drag_area - friction_drag_area)
+
+        return friction_drag_area + pressure_drag_area
+
     def set_largest_intersection(self, area):
         self.largest_intersection = area if area > self.largest_intersection \
             else self.largest_intersection
@@ -76,6 +94,9 @@ class Part:
         return self._characteristic_length
 
     def calculate_base_drag(self, direction: int):
+        return self.calculate_base_drag_area(direction) * self.dynamic_pressure
+
+    def calculate_base_drag_area(self, direction: int):
         raise NotImplementedError("Cannot execute for base class Part")
 
     def __lt__(self, other):
@@ -128,8 +149,8 @@ class Sphere(Part):
     def set_characteristic_length(self, axis: int):
         self._characteristic_length = 2 * self.radius
 
-    def calculate_base_drag(self, direction: int):
-        return self.drag_coefficient * (np.pi * self.radius ** 2) * self.dynamic_pressure
+    def calculate_base_drag_area(self, direction: int):
+        return self.drag_coefficient * (np.pi * self.radius ** 2)
 
 
 class Cylinder(Part):
@@ -199,11 +220,11 @@ class Cylinder(Part):
         else:
             self._characteristic_length = 2 * self.radius
 
-    def calculate_base_drag(self, direction: int):
+    def calculate_base_drag_area(self, direction: int):
         if direction == self.orientation:
-            return Cuboid.drag_coefficient * (np.pi * self.radius ** 2) * self.dynamic_pressure
+            return Cuboid.drag_coefficient * (np.pi * self.radius ** 2)
         else:
-            return self.drag_coefficient * (2 * self.length * self.radius) * self.dynamic_pressure
+            return self.drag_coefficient * (2 * self.length * self.radius)
 
 
 class Cuboid(Part):
@@ -243,10 +264,10 @@ class Cuboid(Part):
     def set_characteristic_length(self, axis: int):
         self._characteristic_length = self.dimensions[axis]
 
-    def calculate_base_drag(self, direction: int):
+    def calculate_base_drag_area(self, direction: int):
         [axis_1, axis_2] = [axis for axis in [0, 1, 2] if axis != direction]
         area = self.dimensions[axis_1] * self.dimensions[axis_2]
-        return self.drag_coefficient * area * self.dynamic_pressure
+        return self.drag_coefficient * area
 
 
 class IceCreamCone(Part):
@@ -292,21 +313,26 @@ class IceCreamCone(Part):
             centroid = sum([a * x[i] for i, a in enumerate(area)]) / sum(area)
 
             if self.orientation == axis_1:
+                axis = 0
                 left = self.position[axis_1] - self.radius
                 right = self.position[axis_1] + self.length_cylinder + self.length_cone
                 top = self.position[axis_2] + self.radius
                 bottom = self.position[axis_2] - self.radius
 
             elif self.orientation == axis_2:
+                axis = 1
                 bottom = self.position[axis_1] - self.radius
                 top = self.position[axis_1] + self.length_cylinder + self.length_cone
                 right = self.position[axis_2] + self.radius
                 left = self.position[axis_2] - self.radius
 
             else:
+                axis = None
                 left, right, top, bottom = 0., 0., 0., 0.
 
-            self._frontal_surface = ConeSideSurface(centroid, sum(area), left, right, top, bottom)
+            self._frontal_surface = ConeSideSurface(centroid, sum(area), left, right, top, bottom,
+                                                    self.radius, self.length_cylinder,
+                                                    self.length_cone, axis)
 
         else:
             raise ValueError(f"Frontal surface calculation in {axis_1}{axis_2} plane not "
@@ -322,16 +348,16 @@ class IceCreamCone(Part):
         else:
             self._characteristic_length = 2 * self.radius
 
-    def calculate_base_drag(self, direction: int):
+    def calculate_base_drag_area(self, direction: int):
         if self.orientation == direction:
             volume = (2 * np.pi * self.radius ** 3) / 3 + \
                      (np.pi * self.radius ** 2) * self.length_cylinder + \
                      (np.pi * self.length_cone * self.radius ** 2) / 3
 
-            return self.drag_coefficient * (volume ** (2 / 3)) * self.dynamic_pressure
+            return self.drag_coefficient * (volume ** (2 / 3))
 
         else:
-            return Cylinder.drag_coefficient * self._frontal_surface.area * self.dynamic_pressure
+            return Cylinder.drag_coefficient * self._frontal_surface.area
 
 
 class Disk(Part):
@@ -385,9 +411,9 @@ class Disk(Part):
         else:
             self._characteristic_length = 0.01
 
-    def calculate_base_drag(self, direction: int):
+    def calculate_base_drag_area(self, direction: int):
         if direction in self.orientation:
-            return self.friction_coefficient * self.wet_area * self.dynamic_pressure
+            return self.friction_coefficient * self.wet_area
         else:
             raise ValueError(f"Drag calculation along {direction} axis not supported for "
                              f"Disk")
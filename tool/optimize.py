@@ -0,0 +1,196 @@
+"""
+Derivative free optimisation of the positions of parts, to minimise the drag of a layout
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .incremental import IncrementalCase
+
+
+OptimizationResult = namedtuple('OptimizationResult',
+                                ('positions', 'objective', 'evaluations', 'history'))
+
+
+class LayoutEvaluator:
+    """
+    Objective of a layout, kept up to date with an IncrementalCase per flow direction
+        Without velocities the objective is the drag area averaged over the directions,
+        with velocities it is the drag averaged over the directions and velocities.
+    """
+    def __init__(self, case, directions, velocities=None):
+        flow_direction = case.flow_direction
+        self.cases = []
+        try:
+            for direction in directions:
+                case.flow_direction = direction
+                self.cases.append(IncrementalCase(case))
+        finally:
+            case.flow_direction = flow_direction
+
+        self.scale = 1. if velocities is None else \
+            float(np.mean(0.5 * case.density * np.asarray(velocities, dtype=float) ** 2))
+
+    def objective(self):
+        return self.scale * sum(case.total_drag_area for case in self.cases) / len(self.cases)
+
+    def position(self, row: int):
+        return tuple(self.cases[0].table.position[row].tolist())
+
+    def move(self, row: int, position):
+        for case in self.cases:
+            case.update(row, position=position)
+
+    def accept(self, row: int, position):
+        """
+        Move a part to a new position of the layout, with the totals summed again over all parts
+        """
+        self.move(row, position)
+        for case in self.cases:
+            case.recompute_totals()
+
+    def sync(self, positions: dict):
+        """
+        Move the parts that are not at the given positions
+        :param positions: Dictionary of row to position
+        """
+        moved = False
+        for row, position in positions.items():
+            if self.position(row) != tuple(position):
+                self.move(row, position)
+                moved = True
+
+        if moved:
+            for case in self.cases:
+                case.recompute_totals()
+
+    def evaluate(self, candidates):
+        """
+        Determine the objective of layouts that each move one part from the current layout
+        :param candidates: Sequence of (row, position)
+        :return: List of objective values
+        """
+        values = []
+        for row, position in candidates:
+            # Moving back restores the drag area of every part, the totals are restored as well,
+            # so the rounding errors of their updates do not build up over the trials
+            totals = [(case.total_drag_area, list(case.total_moments)) for case in self.cases]
+            old_position = self.position(row)
+            self.move(row, position)
+            values.append(self.objective())
+            self.move(row, old_position)
+
+            for case, (total_drag_area, total_moments) in zip(self.cases, totals):
+                case.total_drag_area, case.total_moments = total_drag_area, total_moments
+
+        return values
+
+
+_evaluator = None
+
+
+def _init_worker(case, directions, velocities):
+    global _evaluator
+    _evaluator = LayoutEvaluator(case, directions, velocities)
+
+
+def _evaluate(arguments):
+    positions, candidates = arguments
+    _evaluator.sync(positions)
+    return _evaluator.evaluate(candidates)
+
+
+def optimize_layout(case, bounds: dict, directions=None, velocities=None, workers: int = 1,
+                    initial_step: float = 0.25, min_step: float = 1e-3,
+                    max_evaluations: int = 10000):
+    """
+    Minimise the drag of a case by moving parts within bounds, using a compass search: every
+    iteration tries moving each coordinate one step in both directions, takes the best
+    improvement, and halves the steps when nothing improves. Every candidate moves a single
+    part, so it is evaluated incrementally from the current layout.
+    :param case: Case with the initial layout
+    :param bounds: Dictionary of part name to a (lower, upper) tuple or None per axis,
+            None keeps the part fixed along that axis
+    :param directions: Flow directions to average over, defaults to the direction of the case
+    :param velocities: Velocities to average the drag over, or None to minimise the drag area
+    :param workers: Number of worker processes evaluating the candidates of an iteration
+    :param initial_step: Initial step as a fraction of the range of every coordinate
+    :param min_step: Smallest step, in metres
+    :param max_evaluations: Largest number of evaluated layouts
+    :return: OptimizationResult with the dictionary of part name to optimal position, the
+             optimal objective, the number of evaluations and the objective per iteration
+    """
+    directions = (case.flow_direction,) if directions is None else tuple(directions)
+    evaluator = LayoutEvaluator(case, directions, velocities)
+    base = evaluator.cases[0]
+
+    variables = []
+    for name, axes in bounds.items():
+        row = base.row(name)
+        for axis, bound in enumerate(axes):
+            if bound is not None:
+                variables.append((row, axis) + tuple(sorted(bound)))
+
+    rows = sorted({row for row, *_ in variables})
+    lower = np.array([bound for _, _, bound, _ in variables], dtype=float)
+    upper = np.array([bound for _, _, _, bound in variables], dtype=float)
+    step = initial_step * (upper - lower)
+
+    positions = {row: list(evaluator.position(row)) for row in rows}
+    for index, (row, axis, _, _) in enumerate(variables):
+        positions[row][axis] = float(min(max(positions[row][axis], lower[index]), upper[index]))
+    evaluator.sync(positions)
+
+    best = evaluator.objective()
+    history = [best]
+    evaluations = 1
+
+    executor = None
+    workers = workers or os.cpu_count() or 1
+    if workers != 1:
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_worker,
+                                       initargs=(case, directions, velocities))
+    try:
+        while evaluations < max_evaluations and np.any(step >= min_step):
+            candidates = []
+            for index, (row, axis, _, _) in enumerate(variables):
+                if step[index] < min_step:
+                    continue
+                for sign in (-1, 1):
+                    value = float(min(max(positions[row][axis] + sign * step[index],
+                                          lower[index]), upper[index]))
+                    if value != positions[row][axis]:
+                        position = list(positions[row])
+                        position[axis] = value
+                        candidates.append((row, tuple(position)))
+
+            candidates = candidates[:max_evaluations - evaluations]
+            if executor is None:
+                values = evaluator.evaluate(candidates)
+            else:
+                chunks = np.array_split(np.arange(len(candidates)), workers)
+                arguments = [({row: tuple(position) for row, position in positions.items()},
+                              [candidates[index] for index in chunk])
+                             for chunk in chunks if chunk.size]
+                values = [value for chunk in executor.map(_evaluate, arguments) for value in chunk]
+            evaluations += len(candidates)
+
+            if values and min(values) < best:
+                row, position = candidates[int(np.argmin(values))]
+                positions[row] = list(position)
+                evaluator.accept(row, position)
+                best = evaluator.objective()
+            else:
+                step /= 2
+
+            history.append(best)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return OptimizationResult({str(base.table.name[row]): tuple(positions[row]) for row in rows},
+                              best, evaluations, history)
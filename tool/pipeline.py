@@ -0,0 +1,101 @@
+"""
+Stages of a batch of cases that overlap the file I/O with the computation: files are read ahead
+on a pool of threads, and result files are written by a background thread
+"""
+
+import queue
+import threading
+from collections import deque
+
+
+def prefetch(function, arguments, executor=None, size: int = 16):
+    """
+    Call a function for every tuple of arguments on an executor, keeping at most size calls
+    submitted ahead of the result that is consumed
+    :param function: Function to call
+    :param arguments: Iterable of tuples of arguments, consumed as the results are
+    :param executor: concurrent.futures Executor to submit the calls to, without an executor
+            the function is called when its result is consumed
+    :param size: Largest number of calls submitted ahead, which bounds the results held in memory
+    :return: Generator of the results, in the order of the arguments
+    """
+    if executor is None:
+        for argument in arguments:
+            yield function(*argument)
+        return
+
+    pending = deque()
+    for argument in arguments:
+        pending.append(executor.submit(function, *argument))
+        if len(pending) >= size:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+class BackgroundWriter:
+    """
+    Thread writing files from a bounded queue, so writing overlaps with the computation of the
+    next results. An error of the thread is raised by the next call to write or close.
+    """
+    def __init__(self, size: int = 16):
+        self._queue = queue.Queue(maxsize=size)
+        self._error = None
+        self.written = 0
+
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def __repr__(self):
+        return f"BackgroundWriter: [{self._queue.qsize()} queued, {self.written} written]"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(raise_error=exc_type is None)
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            if self._error is None:
+                path, lines = item
+                try:
+                    with open(path, "w") as f:
+                        f.writelines(lines)
+                    self.written += 1
+                except Exception as error:
+                    self._error = error
+
+    def _raise(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def write(self, path: str, lines):
+        """
+        Queue a file to write, waiting while the queue is full
+        :param path: Path of the file
+        :param lines: Lines of the file, including the line endings
+        :return: None
+        """
+        self._raise()
+        if not self._thread.is_alive():
+            raise RuntimeError("Cannot write to a closed BackgroundWriter")
+        self._queue.put((path, lines))
+
+    def close(self, raise_error: bool = True):
+        """
+        Write the remaining files and stop the thread
+        :param raise_error: Raise the error of a failed write
+        :return: None
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if raise_error:
+            self._raise()
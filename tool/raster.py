@@ -0,0 +1,153 @@
+"""
+Approximate overlap areas of frontal surfaces, by rasterising them onto a shared grid
+"""
+
+import numpy as np
+
+from .shapes import ConeSideSurface, surface_arrays, pair_intersections
+from .index import bounding_boxes, candidate_pairs
+
+
+def _pixel_rows(surfaces, cell_size: float):
+    """
+    Rasterise the surfaces onto a grid of square cells, of which the cells with their centre
+    inside a surface belong to it. As every surface is convex, it covers a single run of
+    cells in every row of the grid.
+    :return: (boxes of the surfaces, origin of the grid, first row and last row of every surface)
+    """
+    boxes = bounding_boxes(surfaces)
+    origin = boxes[:, 0].min(), boxes[:, 3].min()
+
+    first = np.ceil((boxes[:, 3] - origin[1]) / cell_size - .5).astype(int)
+    last = np.floor((boxes[:, 2] - origin[1]) / cell_size - .5).astype(int)
+
+    return boxes, origin, first, last
+
+
+def _cone_arrays(surfaces, boxes):
+    """
+    Silhouettes of the ConeSideSurfaces with known cone dimensions, placed in their bounding
+    rectangles as the other engines place the surfaces
+    :return: Array with rows [x base, y base, radius, cylinder length, cone length, axis] of
+             every surface, with a radius of 0 for the surfaces that are not such cones
+    """
+    cones = np.zeros((len(surfaces), 6))
+    for index, surface in enumerate(surfaces):
+        if isinstance(surface, ConeSideSurface) and surface.axis is not None:
+            left, right, top, bottom = boxes[index]
+            if surface.axis == 0:
+                x, y = left + surface.radius, (top + bottom) / 2
+            else:
+                x, y = (left + right) / 2, bottom + surface.radius
+            cones[index] = (x, y, surface.radius, surface.length_cylinder, surface.length_cone,
+                            surface.axis)
+
+    return cones
+
+
+def _runs(is_circle, boxes, circles, cones, rows, index, origin, cell_size: float):
+    """
+    :return: (first column, last column) of the run of cells of surfaces index in rows
+    """
+    y = origin[1] + (rows + .5) * cell_size
+
+    half_width = np.sqrt(np.clip(circles[index, 2] ** 2 - (y - circles[index, 1]) ** 2, 0, None))
+    left = np.where(is_circle[index], circles[index, 0] - half_width, boxes[index, 0])
+    right = np.where(is_circle[index], circles[index, 0] + half_width, boxes[index, 1])
+
+    # Cones: a half disk behind the base, the cylinder, then the triangle of the tip, which
+    # narrows linearly to the tip along the axis
+    x, y_base, radius, length, length_cone, axis = cones[index].T
+    offset = y - y_base
+    disk = np.sqrt(np.clip(radius ** 2 - offset ** 2, 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tip = np.clip(length_cone * (1 - np.abs(offset) / radius), 0, None)
+        width = np.select((offset < 0, offset <= length), (disk, radius),
+                          np.clip(radius * (1 - (offset - length) / length_cone), 0, None))
+
+    cone = radius > 0
+    left = np.where(cone, np.where(axis == 0, x - disk, x - width), left)
+    right = np.where(cone, np.where(axis == 0, x + length + tip, x + width), right)
+
+    return (np.ceil((left - origin[0]) / cell_size - .5).astype(int),
+            np.floor((right - origin[0]) / cell_size - .5).astype(int))
+
+
+def raster_intersections(surfaces, index_1, index_2, cell_size: float = 0.005,
+                         chunk: int = 1 << 22):
+    """
+    Approximate overlap area of selected pairs of surfaces, by counting the grid cells both
+    surfaces cover. ConeSideSurfaces of an IceCreamCone cover their silhouette, instead of the
+    bounding rectangle the analytic engines use. The runs of cells of both surfaces are
+    compared row by row for all pairs at once, which equals the bitwise and of their cell masks.
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :param index_1: Array with the index of the first surface of every pair
+    :param index_2: Array with the index of the second surface of every pair
+    :param cell_size: Width of the square grid cells
+    :param chunk: Largest number of rows compared at once, to limit memory use
+    :return: Array of overlap areas, one per pair
+    """
+    index_1, index_2 = np.asarray(index_1, dtype=int), np.asarray(index_2, dtype=int)
+    areas = np.zeros(index_1.size)
+    if not index_1.size:
+        return areas
+
+    rectangle_index, _, circle_index, circles = surface_arrays(surfaces)
+    is_circle = np.zeros(len(surfaces), dtype=bool)
+    is_circle[circle_index] = True
+    all_circles = np.zeros((len(surfaces), 3))
+    all_circles[circle_index] = circles
+
+    boxes, origin, first, last = _pixel_rows(surfaces, cell_size)
+    cones = _cone_arrays(surfaces, boxes)
+
+    row_1 = np.maximum(first[index_1], first[index_2])
+    counts = np.clip(np.minimum(last[index_1], last[index_2]) - row_1 + 1, 0, None)
+
+    # Split the pairs in chunks with a bounded total number of rows
+    ends = np.cumsum(counts)
+    bounds = np.searchsorted(ends, np.arange(chunk, ends[-1] + chunk, chunk), side='right')
+    bounds = np.unique(np.concatenate(([0], np.clip(bounds, 1, None), [index_1.size])))
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        pair = np.repeat(np.arange(start, end), counts[start:end])
+        offsets = np.arange(pair.size) - np.repeat(np.cumsum(counts[start:end]) -
+                                                   counts[start:end], counts[start:end])
+        rows = row_1[pair] + offsets
+
+        left_1, right_1 = _runs(is_circle, boxes, all_circles, cones, rows, index_1[pair],
+                                origin, cell_size)
+        left_2, right_2 = _runs(is_circle, boxes, all_circles, cones, rows, index_2[pair],
+                                origin, cell_size)
+        cells = np.clip(np.minimum(right_1, right_2) - np.maximum(left_1, left_2) + 1, 0, None)
+
+        areas[start:end] = np.bincount(pair - start, weights=cells,
+                                       minlength=end - start) * cell_size ** 2
+
+    return areas
+
+
+def raster_convergence(surfaces, cell_sizes=(0.04, 0.02, 0.01, 0.005, 0.0025)):
+    """
+    Compare the raster overlaps of all overlapping pairs of surfaces with the analytic ones of
+    tool/shapes.py, for a range of cell sizes. The analytic overlaps of IceCreamCone side
+    surfaces are those of their bounding rectangles, so pairs with them converge to a smaller
+    area; compare surfaces without cones to check the raster itself.
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :param cell_sizes: Widths of the grid cells to compare
+    :return: List of (cell size, largest absolute error, largest relative error), with the
+             relative error of every pair taken with respect to the smaller surface
+    """
+    index_1, index_2 = candidate_pairs(bounding_boxes(surfaces))
+    analytic = pair_intersections(surfaces, index_1, index_2)
+
+    area = np.array([surface.area for surface in surfaces], dtype=float)
+    smallest = np.minimum(area[index_1], area[index_2])
+
+    convergence = []
+    for cell_size in cell_sizes:
+        error = np.abs(raster_intersections(surfaces, index_1, index_2, cell_size) - analytic)
+        convergence.append((cell_size, float(error.max(initial=0.)),
+                            float((error / smallest).max(initial=0.))))
+
+    return convergence
@@ -0,0 +1,125 @@
+"""
+Collection of the results of many cases in memory, written to a single file at once
+"""
+
+import numpy as np
+
+
+class ResultSink:
+    """
+    Results of cases and their parts, kept in memory until saved
+        Cases are stored in the order they are added, parts refer to their case by its index
+    """
+    def __init__(self):
+        self.names = []
+        self.velocities = []
+        self.drag = []
+        self.drag_areas = []
+        self.cops = []
+
+        self.part_cases = []
+        self.part_names = []
+        self.part_drag = []
+        self.part_wake_factors = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __repr__(self):
+        return f"ResultSink with {len(self)} cases and {len(self.part_names)} parts"
+
+    def add_result(self, name: str, velocity: float, result: tuple, parts=()):
+        """
+        Add the result of one case
+        :param name: Name of the case
+        :param velocity: Flow velocity of the case
+        :param result: (drag, drag area, centre of pressure) as returned by Case.run_case
+        :param parts: Sequence of (part name, drag, V/V_flow) of the parts of the case
+        :return: Index of the case
+        """
+        index = len(self.names)
+        self.names.append(name)
+        self.velocities.append(float(velocity))
+        self.drag.append(float(result[0]))
+        self.drag_areas.append(float(result[1]))
+        self.cops.append(tuple(float(value) for value in result[2]))
+
+        for part_name, drag, wake_factor in parts:
+            self.part_cases.append(index)
+            self.part_names.append(part_name)
+            self.part_drag.append(float(drag))
+            self.part_wake_factors.append(float(wake_factor))
+
+        return index
+
+    def add(self, case):
+        """
+        Add a Case after run_case
+        :return: Index of the case
+        """
+        return self.add_result(case.name, case.velocity, case.result, part_results(case))
+
+    def arrays(self):
+        """
+        :return: Dictionary of the columns as arrays
+        """
+        return {'case_name': np.array(self.names, dtype=str),
+                'velocity': np.array(self.velocities, dtype=float),
+                'drag': np.array(self.drag, dtype=float),
+                'drag_area': np.array(self.drag_areas, dtype=float),
+                'cop': np.array(self.cops, dtype=float).reshape(-1, 3),
+                'part_case': np.array(self.part_cases, dtype=int),
+                'part_name': np.array(self.part_names, dtype=str),
+                'part_drag': np.array(self.part_drag, dtype=float),
+                'part_wake_factor': np.array(self.part_wake_factors, dtype=float)}
+
+    def lines(self):
+        """
+        Format the results as one long table, with a row per part and the case values repeated.
+        Cases without parts have a single row with an empty part.
+        :return: List of lines, including the line endings
+        """
+        lines = ["case, velocity, drag, drag_area, cop_x, cop_y, cop_z, "
+                 "part, part_drag, part_wake_factor\n"]
+
+        parts = {}
+        for case, name, drag, wake_factor in zip(self.part_cases, self.part_names,
+                                                 self.part_drag, self.part_wake_factors):
+            parts.setdefault(case, []).append(f"{name}, {drag!r}, {wake_factor!r}")
+
+        for index, name in enumerate(self.names):
+            case = (f"{name}, {self.velocities[index]!r}, {self.drag[index]!r}, "
+                    f"{self.drag_areas[index]!r}, " + ", ".join(repr(c) for c in self.cops[index]))
+            lines += [f"{case}, {part}\n" for part in parts.get(index, [",,"])]
+
+        return lines
+
+    def save(self, path: str):
+        """
+        Write all results in one go, as a NumPy .npz file or a long format .csv file
+        :param path: Path of the file, the extension selects the format
+        :return: None
+        """
+        if path.endswith('.npz'):
+            np.savez(path, **self.arrays())
+        elif path.endswith('.csv'):
+            with open(path, "w") as f:
+                f.write("".join(self.lines()))
+        else:
+            raise ValueError(f"Cannot save results as {path}, use a .npz or .csv file")
+
+
+def part_results(case):
+    """
+    :return: List of (part name, drag, V/V_flow) of the parts of a Case after run_case
+    """
+    return [(part.__name__, part.drag, part.wake_factor) for part in case.parts]
+
+
+def load_results(path: str):
+    """
+    Load the arrays of a results file saved as .npz by a ResultSink
+    :return: Dictionary of the columns as arrays
+    """
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
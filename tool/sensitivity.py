@@ -0,0 +1,172 @@
+"""
+Parametric sensitivity sweeps over the dimensions of parts, evaluated in memory on a PartTable
+"""
+
+import numpy as np
+
+from .geometry import SECTIONS, load_geometry
+from .index import candidate_pairs
+from .shapes import overlap_pairs
+from .table import PartTable
+from .slowdown import SlowdownModel, SlowdownCurve
+
+
+# Parameters per part that can be varied, with the case file names of PartTable columns
+parameter_columns = {'position': 'position', 'radius': 'radius', 'length': 'length',
+                     'length_cylinder': 'length', 'length_cone': 'length_cone',
+                     'dimensions': 'dimensions'}
+
+# Parameters that apply to every part class, the columns of its section in a case file
+kind_parameters = {section.part_type: {'position'} | {column.name for column in section.columns
+                                                      if column.name in parameter_columns}
+                   for section in SECTIONS.values()}
+
+
+def check_parameter(table: PartTable, rows, parameter: str):
+    """
+    Raise a ValueError if a parameter does not apply to the kind of every given part, as the
+    part would ignore the changed column
+    :param table: PartTable of the parts
+    :param rows: Index array of the parts in the table
+    :param parameter: Name of the parameter, see parameter_columns
+    :return: None
+    """
+    if parameter not in parameter_columns:
+        raise ValueError(f"Cannot vary '{parameter}', choose from {tuple(parameter_columns)}")
+
+    for kind in np.unique(table.kind[rows]).tolist():
+        part_type = PartTable.kinds[kind]
+        if parameter not in kind_parameters[part_type]:
+            raise ValueError(f"'{parameter}' does not apply to a {part_type.__name__}, choose "
+                             f"from {tuple(sorted(kind_parameters[part_type]))}")
+
+
+def _sweep_axes(table: PartTable, parameters: dict):
+    """
+    :return: List of (rows, column, component, values) for every varied parameter
+    """
+    axes = []
+    for key, values in parameters.items():
+        name, parameter, *component = key
+        if parameter not in parameter_columns:
+            raise ValueError(f"Cannot vary '{parameter}', choose from {tuple(parameter_columns)}")
+
+        column = parameter_columns[parameter]
+        if (getattr(table, column).ndim == 2) != (len(component) == 1) or len(component) > 1:
+            raise ValueError(f"Give one component index for position and dimensions, and none "
+                             f"for other parameters, got {key}")
+
+        rows = np.flatnonzero(table.name == name)
+        if not rows.size:
+            raise KeyError(f"No part named '{name}'")
+        check_parameter(table, rows, parameter)
+
+        axes.append((rows, column, component[0] if component else None,
+                     np.asarray(values, dtype=float).reshape(-1)))
+
+    return axes
+
+
+def _overlapping_boxes(boxes_1, boxes_2):
+    """
+    :return: Boolean array marking the pairs of boxes with a non-zero overlap, shape (n_1, n_2)
+    """
+    boxes_1, boxes_2 = boxes_1[:, None, :], boxes_2[None, :, :]
+    return ((boxes_1[..., 0] < boxes_2[..., 1]) & (boxes_2[..., 0] < boxes_1[..., 1]) &
+            (boxes_1[..., 3] < boxes_2[..., 2]) & (boxes_2[..., 3] < boxes_1[..., 2]))
+
+
+def sensitivity_sweep(geometry, parameters: dict, flow_direction: int,
+                      slowdown: SlowdownModel = None, wake_cutoff: float = None,
+                      wake_model: str = 'largest'):
+    """
+    Determine the total drag area for every combination of the given parameter values, as the
+    'table' engine of Case would. The frontal surfaces and overlaps of the parts that are not
+    varied are computed once, only those of the varied parts are updated for every combination.
+    :param geometry: Geometry, PartTable or name of a case or geometry file in the data folder
+    :param parameters: Dictionary of (part name, parameter) or (part name, parameter, component)
+            to the sequence of values of the parameter. Every part with the name is varied.
+            Parameters are position, radius, length, length_cylinder, length_cone and dimensions,
+            position and dimensions take a component index 0, 1 or 2. Every part should have the
+            parameter in its section of a case file, see kind_parameters.
+    :param flow_direction: Axis along which the flow is directed
+    :param slowdown: SlowdownModel of the wakes, defaults to the slowdown curve of Case
+    :param wake_cutoff: See Case
+    :param wake_model: See Case
+    :return: Array of total drag areas, with one axis per parameter in the order of parameters
+    """
+    if isinstance(geometry, str):
+        geometry = load_geometry(f"data/{geometry}.csv")
+    if isinstance(geometry, PartTable):
+        table = geometry.take(slice(None))
+    else:
+        table = PartTable.from_definitions(geometry.definitions)
+
+    axes = _sweep_axes(table, parameters)
+    slowdown = SlowdownCurve() if slowdown is None else slowdown
+    axis_1, axis_2 = [axis for axis in (0, 2, 1) if axis != flow_direction]
+
+    changed = np.unique(np.concatenate([rows for rows, *_ in axes]))
+    fixed = np.setdiff1d(np.arange(len(table)), changed)
+
+    circle, rectangles, circles, areas = table.frontal_surfaces(axis_1, axis_2)
+    lengths = table.characteristic_lengths(flow_direction)
+    smallest = table.smallest_coordinates(flow_direction)
+    base_drag_areas = table.base_drag_areas(flow_direction)
+    friction_drag_areas = table.friction_coefficients() * table.wet_areas()
+
+    # Overlaps between the parts that are not varied
+    fixed_1, fixed_2 = candidate_pairs(rectangles[fixed])
+    fixed_1, fixed_2 = fixed[fixed_1], fixed[fixed_2]
+    fixed_overlap = overlap_pairs(circle, rectangles, circles, fixed_1, fixed_2)
+    positive = fixed_overlap > 0
+    fixed_1, fixed_2, fixed_overlap = fixed_1[positive], fixed_2[positive], fixed_overlap[positive]
+
+    # The pairs of a varied part with every other part, counting pairs of varied parts once
+    other = np.arange(len(table))
+    allowed = ~np.isin(other[None, :], changed) | (other[None, :] > changed[:, None])
+
+    drag_areas = np.empty(tuple(values.size for *_, values in axes))
+    for point in np.ndindex(drag_areas.shape):
+        for (rows, column, component, values), index in zip(axes, point):
+            if component is None:
+                getattr(table, column)[rows] = values[index]
+            else:
+                getattr(table, column)[rows, component] = values[index]
+
+        varied = table.take(changed)
+        (circle[changed], rectangles[changed], circles[changed],
+         areas[changed]) = varied.frontal_surfaces(axis_1, axis_2)
+        lengths[changed] = varied.characteristic_lengths(flow_direction)
+        smallest[changed] = varied.smallest_coordinates(flow_direction)
+        base_drag_areas[changed] = varied.base_drag_areas(flow_direction)
+        friction_drag_areas[changed] = varied.friction_coefficients() * varied.wet_areas()
+
+        rows, columns = np.nonzero(_overlapping_boxes(rectangles[changed], rectangles) & allowed)
+        varied_1, varied_2 = changed[rows], other[columns]
+        varied_overlap = overlap_pairs(circle, rectangles, circles, varied_1, varied_2)
+
+        order = np.argsort(smallest, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.size)
+
+        index_1, index_2 = np.concatenate((fixed_1, varied_1)), np.concatenate((fixed_2, varied_2))
+        overlap = np.concatenate((fixed_overlap, varied_overlap))
+        index_1, index_2 = (np.where(rank[index_1] < rank[index_2], index_1, index_2),
+                            np.where(rank[index_1] < rank[index_2], index_2, index_1))
+
+        distance = (table.position[index_2, flow_direction] -
+                    table.position[index_1, flow_direction])
+        if wake_cutoff is not None:
+            keep = distance <= wake_cutoff * lengths[index_1]
+            index_1, index_2 = index_1[keep], index_2[keep]
+            distance, overlap = distance[keep], overlap[keep]
+
+        table.order = order
+        wake = table.superpose_wake if wake_model == 'superposition' else table.assign_wake
+        wake(index_1, index_2, distance, overlap, lengths, areas.copy(), rank, slowdown)
+
+        friction = np.minimum(friction_drag_areas, base_drag_areas)
+        drag_areas[point] = (friction + table.wake_factor * (base_drag_areas - friction)).sum()
+
+    return drag_areas
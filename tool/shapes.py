@@ -2,9 +2,19 @@
 
 """
 
+import math
+from collections import namedtuple
+
 import numpy as np
 
 
+# Functions of the circular segment formulas, shared by the scalar and the array versions
+Operations = namedtuple('Operations', ('sqrt', 'arcsin', 'clip', 'where'))
+ARRAY = Operations(np.sqrt, np.arcsin, np.clip, np.where)
+SCALAR = Operations(math.sqrt, math.asin, lambda x, low, high: min(max(x, low), high),
+                    lambda condition, x, y: x if condition else y)
+
+
 class Rectangle:
     """
 
@@ -43,15 +53,23 @@ class Rectangle:
 
 class ConeSideSurface(Rectangle):
     """
-
+    Side view of an IceCreamCone, stored as its bounding rectangle. With the cone dimensions,
+    the silhouette inside the rectangle is known: a half disk, a rectangle and a triangle
+    with its tip towards the right (axis 0) or the top (axis 1). Only tool/raster.py uses it.
     """
 
-    def __init__(self, geometric_centre, area, left, right, top, bottom):
+    def __init__(self, geometric_centre, area, left, right, top, bottom, radius: float = None,
+                 length_cylinder: float = None, length_cone: float = None, axis: int = None):
         super().__init__(left, right, top, bottom)
 
         self.geometric_centre = geometric_centre
         self.area = area
 
+        self.radius = radius
+        self.length_cylinder = length_cylinder
+        self.length_cone = length_cone
+        self.axis = axis
+
 
 class Circle:
     """
@@ -176,233 +194,305 @@ def area_triangle(a, b, c):
     return np.sqrt(s * (s - a) * (s - b) * (s - c))
 
 
-def find_inside_vertices(circle, rectangle):
-    dx2_left = (rectangle.left - circle.x_centre) ** 2
-    dx2_right = (rectangle.right - circle.x_centre) ** 2
-    dy2_top = (rectangle.top - circle.y_centre) ** 2
-    dy2_bottom = (rectangle.bottom - circle.y_centre) ** 2
-
-    distances = (np.sqrt(dx2_left + dy2_top), np.sqrt(dx2_right + dy2_top),
-                 np.sqrt(dx2_left + dy2_bottom), np.sqrt(dx2_right + dy2_bottom)
-                 )
-
-    vertices = ((rectangle.left, rectangle.top), (rectangle.right, rectangle.top),
-                (rectangle.left, rectangle.bottom), (rectangle.right, rectangle.bottom)
-                )
-
-    inside_vertices = [vertices[i] for i, distance in enumerate(distances)
-                       if distance < circle.radius]
-
-    outside_vertices = [vertices[i] for i, distance in enumerate(distances)
-                        if not distance >= circle.radius]
-
-    return inside_vertices, outside_vertices
-
+def intersection_rectangle_circle(rectangle, circle: Circle):
+    """
+    Overlap area of an axis aligned rectangle and a circle, by integrating the signed circular
+    segments cut off by the horizontal edges between the vertical edges of the rectangle
+    :return: Overlap area rounded to 3 decimals
+    """
+    radius = circle.radius
+    left, right = rectangle.left - circle.x_centre, rectangle.right - circle.x_centre
+    top, bottom = rectangle.top - circle.y_centre, rectangle.bottom - circle.y_centre
 
-def find_intersection(circle, rectangle):
-    intersection = []
-    intersect_lines = []
+    if radius <= 0 or left >= radius or right <= -radius or bottom >= radius or top <= -radius:
+        return 0.
 
-    for line in rectangle.lines:
-        intersect = intersection_line_circle(line, circle)
+    area = (_area_above_line(left, right, bottom, radius, SCALAR) -
+            _area_above_line(left, right, top, radius, SCALAR))
 
-        if isinstance(intersect, tuple):
+    return round(max(area, 0.), 3)
 
-            if on_line(line, intersect[0], intersect[1]):
-                intersection.append(intersect[0])
-                intersection.append(intersect[1])
-                intersect_lines.append(line)
 
-            if on_line(line, intersect[2], intersect[3]):
-                intersection.append(intersect[2])
-                intersection.append(intersect[3])
-                intersect_lines.append(line)
+def intersection_circle_circle(circle1: Circle, circle2: Circle):
+    """
+    Overlap area of two circles, using the lens formula
+    :return: Overlap area rounded to 3 decimals
+    """
+    r1, r2 = circle1.radius, circle2.radius
+    d = math.hypot(circle2.x_centre - circle1.x_centre, circle2.y_centre - circle1.y_centre)
 
-    result = find_double_intersections(intersection)
+    if d >= r1 + r2:
+        area = 0.
 
-    return result, intersect_lines
+    elif d <= abs(r1 - r2):
+        area = math.pi * min(r1, r2) ** 2
 
+    else:
+        alpha = math.acos(min(max((d ** 2 + r1 ** 2 - r2 ** 2) / (2 * d * r1), -1.), 1.))
+        beta = math.acos(min(max((d ** 2 + r2 ** 2 - r1 ** 2) / (2 * d * r2), -1.), 1.))
+        kite = math.sqrt(max((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2), 0.))
+        area = r1 ** 2 * alpha + r2 ** 2 * beta - 0.5 * kite
 
-def find_double_intersections(intersection):
-    intersects = []
-    result = []
-    for index, _ in enumerate(intersection[::2]):
-        intersect = intersection[2 * index], intersection[2 * index + 1]
-        if intersect not in intersects:
-            intersects.append(intersect)
-            result += [*intersect]
-    return result
+    return round(area, 3)
 
 
-def circle_no_intersection(circle1, circle2):
-    distance_centres = line_length(circle1.x_centre, circle1.y_centre,
-                                   circle2.x_centre, circle2.y_centre)
-    if circle1 < circle2:
-        area = circle1.area if distance_centres < circle2.radius else 0
+def intersection_rectangles(rectangle_1, rectangle_2: Rectangle):
+    left = max(rectangle_1.left, rectangle_2.left)
+    right = min(rectangle_1.right, rectangle_2.right)
+    bottom = max(rectangle_1.bottom, rectangle_2.bottom)
+    top = min(rectangle_1.top, rectangle_2.top)
 
-    elif circle2 < circle1:
-        area = circle2.area if distance_centres < circle1.radius else 0
+    in_rectangle1 = (rectangle_1.in_rectangle_x(left) and rectangle_1.in_rectangle_x(right) and
+                     rectangle_1.in_rectangle_y(top) and rectangle_1.in_rectangle_y(bottom)
+                     )
+    in_rectangle2 = (rectangle_2.in_rectangle_x(left) and rectangle_2.in_rectangle_x(right) and
+                     rectangle_2.in_rectangle_y(top) and rectangle_2.in_rectangle_y(bottom)
+                     )
 
+    if in_rectangle1 and in_rectangle2:
+        overlap = Rectangle(left, right, top, bottom)
+        area = overlap.area
     else:
         area = 0
 
     return area
 
 
-def intersection_rectangle_circle(rectangle, circle: Circle):
-    inside_vertices, outside_vertices = find_inside_vertices(circle, rectangle)
+def round_values(values, decimals: int):
+    """
+    Round every value as the built-in round does, which can differ from np.round on ties.
+    Away from ties both give the same value, so only the values close to a tie are rounded
+    one by one.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.array(np.round(values, decimals), dtype=float)
 
-    if len(inside_vertices) == 0:
-        intersection, _ = find_intersection(circle, rectangle)
+    scaled = values * 10. ** decimals
+    with np.errstate(invalid='ignore'):
+        ties = np.abs(scaled - np.floor(scaled) - .5) <= 1e-6 + 1e-12 * np.abs(scaled)
+    if np.any(ties):
+        rounded[ties] = [round(value, decimals) for value in values[ties].tolist()]
 
-        if len(intersection) == 4:
-            area = area_circular_segment(intersection, circle)
+    return rounded
 
-        elif len(intersection) > 4:
-            subtract_area = 0
-            for index in range(len(intersection) // 4):
-                intersect = intersection[4*index:4*index+4]
-                subtract_area += area_circular_segment(intersect, circle)
 
-            area = circle.area - subtract_area
+def surface_arrays(surfaces):
+    """
+    Split a sequence of frontal surfaces into rectangle and circle parameter arrays
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :return: (indices of the rectangles, array with rows [left, right, top, bottom],
+              indices of the circles, array with rows [x_centre, y_centre, radius])
+    """
+    rectangle_index, rectangles, circle_index, circles = [], [], [], []
+
+    for index, surface in enumerate(surfaces):
+        if isinstance(surface, Rectangle):
+            rectangle_index.append(index)
+            rectangles.append((surface.left, surface.right, surface.top, surface.bottom))
+        elif isinstance(surface, Circle):
+            circle_index.append(index)
+            circles.append((surface.x_centre, surface.y_centre, surface.radius))
+        else:
+            raise TypeError(f"Cannot calculate intersection of {type(surface)}")
 
-        elif (rectangle.left < circle.x_centre < rectangle.right
-              and rectangle.bottom < circle.y_centre < rectangle.top):
-            area = circle.area
+    return (np.array(rectangle_index, dtype=int), np.array(rectangles, dtype=float).reshape(-1, 4),
+            np.array(circle_index, dtype=int), np.array(circles, dtype=float).reshape(-1, 3))
 
-        else:
-            area = 0
 
-    elif len(inside_vertices) == 1:
-        intersection, _ = find_intersection(circle, rectangle)
+def overlap_rectangles(rectangles_1, rectangles_2):
+    """
+    Element wise overlap area of axis aligned rectangles
+    :param rectangles_1: Array with rows [left, right, top, bottom]
+    :param rectangles_2: Array with rows [left, right, top, bottom], broadcastable to rectangles_1
+    :return: Array of overlap areas
+    """
+    left = np.maximum(rectangles_1[..., 0], rectangles_2[..., 0])
+    right = np.minimum(rectangles_1[..., 1], rectangles_2[..., 1])
+    top = np.minimum(rectangles_1[..., 2], rectangles_2[..., 2])
+    bottom = np.maximum(rectangles_1[..., 3], rectangles_2[..., 3])
 
-        circular_area = area_circular_segment(intersection, circle)
-        p1 = intersection[0:2]
-        p2 = intersection[2:4]
-        p3 = inside_vertices[0]
+    return np.clip(right - left, 0, None) * np.clip(top - bottom, 0, None)
 
-        lengths = line_length(*intersection), line_length(*p2, *p3), line_length(*p1, *p3)
-        triangle_area = area_triangle(*lengths)
 
-        area = circular_area + triangle_area
+def overlap_circles(circles_1, circles_2):
+    """
+    Element wise overlap area of circles, using the lens formula
+    :param circles_1: Array with rows [x_centre, y_centre, radius]
+    :param circles_2: Array with rows [x_centre, y_centre, radius], broadcastable to circles_1
+    :return: Array of overlap areas rounded to 3 decimals
+    """
+    r1 = circles_1[..., 2]
+    r2 = circles_2[..., 2]
+    d = np.hypot(circles_2[..., 0] - circles_1[..., 0], circles_2[..., 1] - circles_1[..., 1])
 
-    elif len(inside_vertices) == 2:
-        intersection, intersect_lines = find_intersection(circle, rectangle)
-        circular_area = area_circular_segment(intersection, circle)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = np.arccos(np.clip((d ** 2 + r1 ** 2 - r2 ** 2) / (2 * d * r1), -1, 1))
+        beta = np.arccos(np.clip((d ** 2 + r2 ** 2 - r1 ** 2) / (2 * d * r2), -1, 1))
+        kite = np.sqrt(np.clip((-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2),
+                               0, None))
+        lens = r1 ** 2 * alpha + r2 ** 2 * beta - 0.5 * kite
 
-        p1 = intersection[0], intersection[1]
-        p2 = intersection[2], intersection[3]
+    smallest = np.minimum(r1, r2)
+    area = np.where(d >= r1 + r2, 0.,
+                    np.where(d <= np.abs(r1 - r2), np.pi * smallest ** 2, lens))
 
-        p3 = inside_vertices[0]
-        p4 = inside_vertices[1]
+    return np.round(area, 3)
 
-        a1 = line_length(*intersection)
-        b1 = line_length(*p1, *p4)
-        c1 = line_length(*p2, *p4)
-        triangle_area1 = area_triangle(a1, b1, c1)
 
-        a2 = line_length(*p1, *p3)
-        b2 = line_length(*p1, *p4)
-        c2 = line_length(*p3, *p4)
-        triangle_area2 = area_triangle(a2, b2, c2)
+def _area_above_chord(x_1, x_2, height, radius, operations: Operations = ARRAY):
+    """
+    Area of a circle centred in the origin above a horizontal line at height >= 0,
+    between the vertical lines x_1 <= x_2
+    :param operations: ARRAY for arrays, SCALAR for single floats
+    """
+    sqrt, arcsin, clip, _ = operations
+    half_chord = sqrt(clip(radius ** 2 - height ** 2, 0., math.inf))
 
-        area = circular_area + triangle_area1 + triangle_area2
+    def primitive(x):
+        x = clip(x, -half_chord, half_chord)
+        return 0.5 * (x * sqrt(clip(radius ** 2 - x ** 2, 0., math.inf)) +
+                      radius ** 2 * arcsin(clip(x / radius, -1., 1.))) - height * x
 
-    elif len(inside_vertices) == 3:
-        intersection, _ = find_intersection(circle, rectangle)
+    return primitive(x_2) - primitive(x_1)
 
-        circular_area = area_circular_segment(intersection, circle)
-        a = line_length(*intersection)
-        b = line_length(intersection[0], intersection[1], *outside_vertices[0])
-        c = line_length(intersection[2], intersection[3], *outside_vertices[0])
-        triangle_area = area_triangle(a, b, c)
 
-        area = rectangle.area - triangle_area + circular_area
+def _area_above_line(x_1, x_2, height, radius, operations: Operations = ARRAY):
+    """
+    Area of a circle centred in the origin above a horizontal line at any height,
+    between the vertical lines x_1 <= x_2
+    :param operations: ARRAY for arrays, SCALAR for single floats
+    """
+    segment = _area_above_chord(x_1, x_2, abs(height), radius, operations)
+    if operations is SCALAR and height >= 0:
+        return segment
 
-    else:
-        area = rectangle.area
+    strip = 2 * _area_above_chord(x_1, x_2, 0., radius, operations)
+    return operations.where(height >= 0, segment, strip - segment)
 
-    return round(area, 3)
 
+def overlap_rectangle_circle(rectangles, circles):
+    """
+    Element wise overlap area of rectangles and circles, by integrating the signed circular
+    segments cut off by the horizontal edges between the vertical edges of the rectangle
+    :param rectangles: Array with rows [left, right, top, bottom]
+    :param circles: Array with rows [x_centre, y_centre, radius], broadcastable to rectangles
+    :return: Array of overlap areas rounded to 3 decimals
+    """
+    x_centre, y_centre, radius = circles[..., 0], circles[..., 1], circles[..., 2]
+    left = rectangles[..., 0] - x_centre
+    right = rectangles[..., 1] - x_centre
+    top = rectangles[..., 2] - y_centre
+    bottom = rectangles[..., 3] - y_centre
 
-def intersection_circle_circle(circle1: Circle, circle2: Circle):
-    x1, y1 = circle1.transform(-circle2.x_centre, -circle2.y_centre)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        area = (_area_above_line(left, right, bottom, radius) -
+                _area_above_line(left, right, top, radius))
 
-    if x1 == y1 == 0:
-        area = circle1.area if circle1 <= circle2 else circle2.area
+    area = np.where(radius > 0, np.clip(area, 0, None), 0.)
 
-    elif y1 == 0:
-        x = (1 / (2 * x1)) * (x1 ** 2 + circle2.radius ** 2 - circle1.radius ** 2)
+    return np.round(area, 3)
 
-        if circle1.in_circle_x(x) and circle2.in_circle_x(x):
-            y_abs1 = np.sqrt((circle1.radius ** 2) - (x - x1) ** 2)
-            y_abs2 = np.sqrt((circle2.radius ** 2) - x ** 2)
 
-            if y_abs1 == y_abs2 != 0:
-                intersection = (x, y_abs1, x, -y_abs1)
+def batch_intersection_rectangles(rectangles_1, rectangles_2):
+    """
+    Overlap area of every pair of axis aligned rectangles
+    :param rectangles_1: Array with rows [left, right, top, bottom], shape (n, 4)
+    :param rectangles_2: Array with rows [left, right, top, bottom], shape (m, 4)
+    :return: Array of overlap areas, shape (n, m)
+    """
+    rectangles_1 = np.asarray(rectangles_1, dtype=float).reshape(-1, 4)
+    rectangles_2 = np.asarray(rectangles_2, dtype=float).reshape(-1, 4)
 
-                area = (area_circular_segment(intersection, circle1) +
-                        area_circular_segment(intersection, circle2))
+    return overlap_rectangles(rectangles_1[:, None, :], rectangles_2[None, :, :])
 
-            else:
-                area = circle_no_intersection(circle1, circle2)
 
-        else:
-            area = circle_no_intersection(circle1, circle2)
+def batch_intersection_circles(circles_1, circles_2):
+    """
+    Overlap area of every pair of circles
+    :param circles_1: Array with rows [x_centre, y_centre, radius], shape (n, 3)
+    :param circles_2: Array with rows [x_centre, y_centre, radius], shape (m, 3)
+    :return: Array of overlap areas rounded to 3 decimals, shape (n, m)
+    """
+    circles_1 = np.asarray(circles_1, dtype=float).reshape(-1, 3)
+    circles_2 = np.asarray(circles_2, dtype=float).reshape(-1, 3)
 
-    else:
-        p = (1 / (2 * y1)) * (x1 ** 2 + y1 ** 2 - circle1.radius ** 2 + circle2.radius ** 2)
+    return overlap_circles(circles_1[:, None, :], circles_2[None, :, :])
 
-        a = 1 + (x1 / y1) ** 2
-        b = -2 * p * (x1 / y1)
-        c = p ** 2 - circle2.radius ** 2
 
-        discriminant = b ** 2 - 4 * a * c
+def batch_intersection_rectangle_circle(rectangles, circles):
+    """
+    Overlap area of every rectangle with every circle
+    :param rectangles: Array with rows [left, right, top, bottom], shape (n, 4)
+    :param circles: Array with rows [x_centre, y_centre, radius], shape (m, 3)
+    :return: Array of overlap areas rounded to 3 decimals, shape (n, m)
+    """
+    rectangles = np.asarray(rectangles, dtype=float).reshape(-1, 4)
+    circles = np.asarray(circles, dtype=float).reshape(-1, 3)
 
-        if discriminant <= 0:
-            area = circle_no_intersection(circle1, circle2)
+    return overlap_rectangle_circle(rectangles[:, None, :], circles[None, :, :])
 
-        else:
-            x1_int = (-b + np.sqrt(discriminant)) / (2 * a)
-            y1_int = - (x1 / y1) * x1_int + p + circle2.y_centre
-            x1_int += circle2.x_centre
 
-            x2_int = (-b - np.sqrt(discriminant)) / (2 * a)
-            y2_int = - (x1 / y1) * x2_int + p + circle2.y_centre
-            x2_int += circle2.x_centre
+def intersection_matrix(surfaces):
+    """
+    Overlap area of every pair in a sequence of frontal surfaces in one call
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :return: Symmetric array of overlap areas, shape (n, n)
+    """
+    rectangle_index, rectangles, circle_index, circles = surface_arrays(surfaces)
+    areas = np.zeros((len(surfaces), len(surfaces)))
 
-            if (circle1.on_circle(x1_int, y1_int) and circle2.on_circle(x1_int, y1_int) and
-                    circle1.on_circle(x2_int, y2_int) and circle2.on_circle(x2_int, y2_int)):
+    areas[np.ix_(rectangle_index, rectangle_index)] = batch_intersection_rectangles(rectangles,
+                                                                                    rectangles)
+    areas[np.ix_(circle_index, circle_index)] = batch_intersection_circles(circles, circles)
 
-                intersection = [x1_int, y1_int, x2_int, y2_int]
-                circular_area1 = area_circular_segment(intersection, circle1)
-                circular_area2 = area_circular_segment(intersection, circle2)
+    rectangle_circle = batch_intersection_rectangle_circle(rectangles, circles)
+    areas[np.ix_(rectangle_index, circle_index)] = rectangle_circle
+    areas[np.ix_(circle_index, rectangle_index)] = rectangle_circle.T
 
-                area = circular_area1 + circular_area2
+    return areas
 
-            else:
-                area = 0
 
-    return round(area, 3)
+def overlap_pairs(is_circle, rectangles, circles, index_1, index_2):
+    """
+    Overlap area of selected pairs of surfaces stored as arrays
+    :param is_circle: Boolean array marking the circles
+    :param rectangles: Array with rows [left, right, top, bottom], used for non circles
+    :param circles: Array with rows [x_centre, y_centre, radius], used for circles
+    :param index_1: Array with the row of the first surface of every pair
+    :param index_2: Array with the row of the second surface of every pair
+    :return: Array of overlap areas, one per pair
+    """
+    circle_1, circle_2 = is_circle[index_1], is_circle[index_2]
+    areas = np.zeros(index_1.size)
 
+    select = ~circle_1 & ~circle_2
+    areas[select] = overlap_rectangles(rectangles[index_1[select]], rectangles[index_2[select]])
+    select = circle_1 & circle_2
+    areas[select] = overlap_circles(circles[index_1[select]], circles[index_2[select]])
+    select = ~circle_1 & circle_2
+    areas[select] = overlap_rectangle_circle(rectangles[index_1[select]], circles[index_2[select]])
+    select = circle_1 & ~circle_2
+    areas[select] = overlap_rectangle_circle(rectangles[index_2[select]], circles[index_1[select]])
 
-def intersection_rectangles(rectangle_1, rectangle_2: Rectangle):
-    left = max(rectangle_1.left, rectangle_2.left)
-    right = min(rectangle_1.right, rectangle_2.right)
-    bottom = max(rectangle_1.bottom, rectangle_2.bottom)
-    top = min(rectangle_1.top, rectangle_2.top)
+    return areas
 
-    in_rectangle1 = (rectangle_1.in_rectangle_x(left) and rectangle_1.in_rectangle_x(right) and
-                     rectangle_1.in_rectangle_y(top) and rectangle_1.in_rectangle_y(bottom)
-                     )
-    in_rectangle2 = (rectangle_2.in_rectangle_x(left) and rectangle_2.in_rectangle_x(right) and
-                     rectangle_2.in_rectangle_y(top) and rectangle_2.in_rectangle_y(bottom)
-                     )
 
-    if in_rectangle1 and in_rectangle2:
-        overlap = Rectangle(left, right, top, bottom)
-        area = overlap.area
-    else:
-        area = 0
+def pair_intersections(surfaces, index_1, index_2):
+    """
+    Overlap area of selected pairs in a sequence of frontal surfaces in one call
+    :param surfaces: Sequence of Rectangle, ConeSideSurface and Circle instances
+    :param index_1: Array with the index of the first surface of every pair
+    :param index_2: Array with the index of the second surface of every pair
+    :return: Array of overlap areas, one per pair
+    """
+    rectangle_index, rectangles, circle_index, circles = surface_arrays(surfaces)
 
-    return area
+    is_circle = np.zeros(len(surfaces), dtype=bool)
+    is_circle[circle_index] = True
+    all_rectangles = np.zeros((len(surfaces), 4))
+    all_rectangles[rectangle_index] = rectangles
+    all_circles = np.zeros((len(surfaces), 3))
+    all_circles[circle_index] = circles
+
+    return overlap_pairs(is_circle, all_rectangles, all_circles,
+                         np.asarray(index_1, dtype=int), np.asarray(index_2, dtype=int))
@@ -0,0 +1,83 @@
+"""
+Models of the flow velocity in the wake of a part, as a function of the distance behind it
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+from .shapes import round_values
+
+
+class SlowdownModel:
+    """
+    Ratio V / V_flow in the wake of an upstream part, as a function of x / L_char, the distance
+    behind the part over its characteristic length
+        Subclasses implement evaluate for an array of x / L_char values. The wake model uses the
+        values rounded to 4 decimals, as returned by calling the model.
+    """
+    decimals = 4
+
+    def evaluate(self, x):
+        raise NotImplementedError("Cannot execute for base class SlowdownModel")
+
+    def __call__(self, x):
+        """
+        :param x: Array of x / L_char values
+        :return: Array of rounded slowdown factors
+        """
+        return round_values(self.evaluate(np.asarray(x, dtype=float)), self.decimals)
+
+    def factor(self, x: float):
+        """
+        :return: The rounded slowdown factor of a single x / L_char value, as a float
+        """
+        return round(float(self.evaluate(np.array([x], dtype=float))[0]), self.decimals)
+
+
+class SlowdownCurve(SlowdownModel):
+    """
+    Piecewise linear curve through the points (xp, fp), constant outside them, as np.interp
+    """
+    def __init__(self, xp=(0, 2, 10, 100), fp=(0, .85, .95, 1)):
+        if len(xp) != len(fp) or len(xp) < 2:
+            raise ValueError(f"Give the same number of at least 2 points in xp and fp, "
+                             f"got {len(xp)} and {len(fp)}")
+        if any(x_1 >= x_2 for x_1, x_2 in zip(xp[:-1], xp[1:])):
+            raise ValueError(f"The points of xp should be increasing, got {xp}")
+
+        self.xp = tuple(float(x) for x in xp)
+        self.fp = tuple(float(f) for f in fp)
+
+    def __repr__(self):
+        return f"SlowdownCurve(xp={self.xp}, fp={self.fp})"
+
+    def evaluate(self, x):
+        return np.interp(x, self.xp, self.fp)
+
+    def factor(self, x: float):
+        # Same arithmetic as np.interp, without its overhead on a single value
+        xp, fp = self.xp, self.fp
+        if x >= xp[-1]:
+            return round(fp[-1], self.decimals)
+        if x < xp[0]:
+            return round(fp[0], self.decimals)
+
+        j = bisect_right(xp, x) - 1
+        slope = (fp[j + 1] - fp[j]) / (xp[j + 1] - xp[j])
+        return round(slope * (x - xp[j]) + fp[j], self.decimals)
+
+
+class SlowdownFunction(SlowdownModel):
+    """
+    User defined slowdown, such as a smooth analytic curve
+        function: Function of an array of x / L_char values, returning V / V_flow for every value
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def __repr__(self):
+        return f"SlowdownFunction({getattr(self.function, '__name__', self.function)})"
+
+    def evaluate(self, x):
+        return np.broadcast_to(np.asarray(self.function(x), dtype=float), np.shape(x))
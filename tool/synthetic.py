@@ -0,0 +1,114 @@
+"""
+Generator of synthetic assemblies of parts in the case file format, for benchmarks and tests
+"""
+
+import numpy as np
+
+from .geometry import SECTIONS, parse_case
+
+
+def synthetic_sections(size: int, seed: int = 0, flow_direction: int = 1, spacing: float = 1.):
+    """
+    Create random rows for the part sections of a case file, cycling through all part types
+    :param size: Number of parts
+    :param seed: Seed of the random generator
+    :param flow_direction: Flow direction of the case, every disk is oriented to face it
+    :param spacing: Typical distance between neighbouring parts. The parts fill a cube that
+            grows with the number of parts, so the number of overlaps per part stays constant.
+    :return: Dictionary of section name to list of rows, with the values of one part per row
+    """
+    rng = np.random.default_rng(seed)
+    extent = spacing * max(size, 1) ** (1 / 3) / 2
+
+    sections = {name: [] for name in SECTIONS}
+    for index in range(size):
+        position = tuple(rng.uniform(-extent, extent, 3).round(3).tolist())
+        radius = round(float(rng.uniform(.05, .3)), 3)
+        length_1, length_2 = rng.uniform(.1, 1., 2).round(3).tolist()
+        orientation = int(rng.integers(3))
+
+        kind = index % 5
+        if kind == 0:
+            sections['Spheres'].append((f'sphere {index}',) + position + (radius,))
+        elif kind == 1:
+            sections['Cylinders'].append((f'cylinder {index}',) + position +
+                                         (radius, length_1, orientation))
+        elif kind == 2:
+            dimensions = tuple(rng.uniform(.1, 1., 3).round(3).tolist())
+            sections['Cuboids'].append((f'cuboid {index}',) + position + dimensions)
+        elif kind == 3:
+            sections['IceCream Cones'].append((f'cone {index}',) + position +
+                                              (radius, length_1, length_2, orientation))
+        else:
+            other = int(rng.choice([axis for axis in (0, 1, 2) if axis != flow_direction]))
+            sections['Disks'].append((f'disk {index}',) + position + (radius,) +
+                                     tuple(sorted((flow_direction, other))))
+
+    return sections
+
+
+def case_lines(sections: dict, density: float = 1.225, velocity: float = 10.,
+               flow_direction: int = 1):
+    """
+    Format the flow conditions and part sections as the lines of a case file
+    :return: Generator of lines, including the line endings
+    """
+    yield "Case Definition,\n"
+    yield "Density, Velocity, flow_direction,\n"
+    yield f"{density}, {velocity}, {flow_direction},\n"
+
+    for name, section in SECTIONS.items():
+        header = ["name", "centre x", "centre y", "centre z"]
+        for column in section.columns:
+            header += [column.name] if column.width == 1 else \
+                [f"{column.name} {axis}" for axis in range(column.width)]
+
+        yield f"{name},\n"
+        yield ", ".join(header) + ",\n"
+        yield "#\n"
+        for row in sections.get(name, ()):
+            yield ", ".join(str(value) for value in row) + ",\n"
+        yield "#\n"
+
+    yield ",\n"
+
+
+def geometry_sections(geometry):
+    """
+    Rows of the part sections of a Geometry, the inverse of parsing them from a case file
+    :return: Dictionary of section name to list of rows, see synthetic_sections
+    """
+    names = {section.part_type: name for name, section in SECTIONS.items()}
+
+    sections = {name: [] for name in SECTIONS}
+    for part_type, name, parameters in geometry.definitions:
+        row = [name]
+        for value in parameters:
+            row += list(value) if isinstance(value, tuple) else [value]
+        sections[names[part_type]].append(tuple(row))
+
+    return sections
+
+
+def synthetic_case_files(size: int, seed: int = 0, density: float = 1.225, velocity: float = 10.,
+                         flow_direction: int = 1, spacing: float = 1.):
+    """
+    Create a synthetic case in memory, see synthetic_sections
+    :return: CaseFiles of the case, to pass to Case as files
+    """
+    sections = synthetic_sections(size, seed, flow_direction, spacing)
+    return parse_case(case_lines(sections, density, velocity, flow_direction),
+                      f'<synthetic {size} {seed}>')
+
+
+def write_synthetic_case(path: str, size: int, seed: int = 0, density: float = 1.225,
+                         velocity: float = 10., flow_direction: int = 1, spacing: float = 1.):
+    """
+    Write a case file with a synthetic assembly, see synthetic_sections
+    :param path: Path of the new case file
+    :return: None
+    """
+    sections = synthetic_sections(size, seed, flow_direction, spacing)
+
+    with open(path, "w") as f:
+        f.writelines(case_lines(sections, density, velocity, flow_direction))
@@ -0,0 +1,378 @@
+"""
+Columnar storage of the parts of a case, with array versions of the aerodynamic model in
+tool/objects.py
+"""
+
+import numpy as np
+
+from .objects import Part, Sphere, Cylinder, Cuboid, IceCreamCone, Disk
+from .index import candidate_pairs
+from .shapes import overlap_pairs, round_values
+from .slowdown import SlowdownModel
+from .wake import superpose_wakes
+from .instrument import CONE_SIDE, timer
+
+
+class PartTable:
+    """
+    Struct of arrays with one row per part
+        kind: index of the part class in PartTable.kinds
+        orientation: axis of a Cylinder or IceCreamCone in column 0, both axes of a Disk,
+                     -1 where not used
+        length: length of a Cylinder, or the cylinder length of an IceCreamCone
+    The wake results are stored per row, order holds the rows sorted along the flow.
+    """
+    kinds = (Sphere, Cylinder, Cuboid, IceCreamCone, Disk)
+    columns = ('name', 'kind', 'position', 'radius', 'length', 'length_cone', 'dimensions',
+               'orientation')
+
+    def __init__(self, size: int):
+        self.name = np.empty(size, dtype=object)
+        self.kind = np.zeros(size, dtype=np.int8)
+        self.position = np.zeros((size, 3))
+        self.radius = np.zeros(size)
+        self.length = np.zeros(size)
+        self.length_cone = np.zeros(size)
+        self.dimensions = np.zeros((size, 3))
+        self.orientation = np.full((size, 2), -1, dtype=np.int8)
+
+        self.order = np.arange(size)
+        self.slowdown = np.ones(size)
+        self.wake_slowdown = np.ones(size)
+        self.wake_factor = np.ones(size)
+        self.largest_intersection = np.zeros(size)
+        self.upstream = np.full(size, -1)
+        self.frontal_area = np.zeros(size)
+
+    def __len__(self):
+        return self.kind.size
+
+    def __repr__(self):
+        counts = {kind.__name__: int(np.sum(self.kind == index))
+                  for index, kind in enumerate(self.kinds)}
+        return f"PartTable with {len(self)} parts: {counts}"
+
+    @classmethod
+    def from_definitions(cls, definitions):
+        """
+        Fill a table from part definitions, such as Geometry.definitions
+        :param definitions: Sequence of (part type, name, parameters) as in tool/geometry.py
+        :return: PartTable with one row per definition
+        """
+        definitions = list(definitions)
+        table = cls(len(definitions))
+
+        for row, (part_type, name, parameters) in enumerate(definitions):
+            table.name[row] = name
+            table.kind[row] = cls.kinds.index(part_type)
+            table.position[row] = parameters[0]
+
+            if part_type is Sphere:
+                table.radius[row] = parameters[1]
+            elif part_type is Cylinder:
+                table.radius[row], table.length[row], table.orientation[row, 0] = parameters[1:]
+            elif part_type is Cuboid:
+                table.dimensions[row] = parameters[1]
+            elif part_type is IceCreamCone:
+                (table.radius[row], table.length[row], table.length_cone[row],
+                 table.orientation[row, 0]) = parameters[1:]
+            else:
+                table.radius[row] = parameters[1]
+                table.orientation[row] = parameters[2]
+
+        return table
+
+    @classmethod
+    def from_parts(cls, parts):
+        """
+        Fill a table from Part objects
+        :param parts: Sequence of Part objects
+        :return: PartTable with one row per part
+        """
+        definitions = []
+        for part in parts:
+            if isinstance(part, Sphere):
+                parameters = (part.radius,)
+            elif isinstance(part, Cylinder):
+                parameters = (part.radius, part.length, part.orientation)
+            elif isinstance(part, Cuboid):
+                parameters = (part.dimensions,)
+            elif isinstance(part, IceCreamCone):
+                parameters = (part.radius, part.length_cylinder, part.length_cone,
+                              part.orientation)
+            elif isinstance(part, Disk):
+                parameters = (part.radius, part.orientation)
+            else:
+                raise TypeError(f"Cannot store {type(part)} in a PartTable")
+
+            definitions.append((type(part), part.__name__, (part.position,) + parameters))
+
+        return cls.from_definitions(definitions)
+
+    def take(self, rows):
+        """
+        :param rows: Index array or boolean mask of the rows
+        :return: New PartTable with a copy of the part columns of the rows, without wake results
+        """
+        rows = np.arange(len(self))[rows]
+        table = type(self)(rows.size)
+        for column in self.columns:
+            getattr(table, column)[:] = getattr(self, column)[rows]
+
+        return table
+
+    def is_kind(self, part_type):
+        return self.kind == self.kinds.index(part_type)
+
+    def aligned(self, axis: int):
+        """
+        Rows with a Cylinder or IceCreamCone along the axis, or a Disk in a plane with the axis
+        """
+        return np.any(self.orientation == axis, axis=1)
+
+    def wet_areas(self):
+        r, length, length_cone = self.radius, self.length, self.length_cone
+        dimensions = self.dimensions
+
+        return np.select((self.is_kind(Sphere), self.is_kind(Cylinder), self.is_kind(Cuboid),
+                          self.is_kind(IceCreamCone), self.is_kind(Disk)),
+                         (4 * np.pi * r ** 2,
+                          2 * np.pi * r ** 2 + 2 * np.pi * r * length,
+                          2 * (dimensions[:, 0] * dimensions[:, 1] +
+                               dimensions[:, 1] * dimensions[:, 2] +
+                               dimensions[:, 0] * dimensions[:, 2]),
+                          (2 * np.pi * r ** 2 + 2 * np.pi * r * length +
+                           np.pi * r * np.sqrt(length_cone ** 2 + r ** 2)),
+                          2 * np.pi * r ** 2))
+
+    def friction_coefficients(self, friction_coefficient=None):
+        """
+        :param friction_coefficient: Value or array of values to use instead of
+                Part.friction_coefficient, array values broadcast as leading axes of the rows
+        """
+        if friction_coefficient is None:
+            friction_coefficient = Part.friction_coefficient
+        return np.where(self.is_kind(Disk), 0.005, friction_coefficient)
+
+    def smallest_coordinates(self, axis: int):
+        offset = np.select((self.is_kind(Cylinder) & self.aligned(axis), self.is_kind(Cuboid),
+                            self.is_kind(Disk) & ~self.aligned(axis)),
+                           (self.length / 2, self.dimensions[:, axis] / 2, 0.005),
+                           self.radius)
+        return self.position[:, axis] - offset
+
+    def characteristic_lengths(self, axis: int):
+        aligned = self.aligned(axis)
+        return np.select((self.is_kind(Cylinder) & aligned, self.is_kind(Cuboid),
+                          self.is_kind(IceCreamCone) & aligned, self.is_kind(Disk) & ~aligned),
+                         (self.length, self.dimensions[:, axis],
+                          self.length_cone + self.length + self.radius, 0.01),
+                         2 * self.radius)
+
+    def frontal_surfaces(self, axis_1: int, axis_2: int):
+        """
+        Determine the frontal surfaces on a given plane, as the Part classes do
+        :param axis_1: First axis defining the plane
+        :param axis_2: Second axis defining the plane
+        :return: (Boolean array marking the circles,
+                  Array with rows [left, right, top, bottom], the bounding box of circles,
+                  Array with rows [x_centre, y_centre, radius], zero for rectangles,
+                  Array with the surface areas)
+        """
+        p1, p2 = self.position[:, axis_1], self.position[:, axis_2]
+        r, length, dimensions = self.radius, self.length, self.dimensions
+        cylinder, cone = self.is_kind(Cylinder), self.is_kind(IceCreamCone)
+        disk = self.is_kind(Disk)
+        along_1, along_2 = self.orientation[:, 0] == axis_1, self.orientation[:, 0] == axis_2
+
+        disk_1 = disk & self.aligned(axis_1)
+        disk_circle = disk_1 & self.aligned(axis_2)
+        circle = (self.is_kind(Sphere) | ((cylinder | cone) & ~along_1 & ~along_2) |
+                  disk_circle)
+
+        half_1 = np.select((cylinder & along_1, cylinder, self.is_kind(Cuboid), disk_1),
+                           (length / 2, r, dimensions[:, axis_1] / 2, r), r)
+        half_2 = np.select((cylinder & along_2, cylinder, self.is_kind(Cuboid), disk_1),
+                           (length / 2, r, dimensions[:, axis_2] / 2, 0.005), r)
+
+        rectangles = round_values(np.column_stack((p1 - half_1, p1 + half_1,
+                                                   p2 + half_2, p2 - half_2)), 3)
+
+        # Disks on edge in the second axis swap the axes of their rectangle
+        swap = disk & ~disk_1
+        rectangles[swap] = round_values(np.column_stack((p2 - 0.005, p2 + 0.005,
+                                                         p1 + r, p1 - r))[swap], 3)
+
+        # Side view of an IceCreamCone, not rounded, with axes swapped along the second axis
+        cone_side = cone & (along_1 | along_2)
+        tip = p1 + length + self.length_cone
+        cone_boxes = np.where(along_1[:, None],
+                              np.column_stack((p1 - r, tip, p2 + r, p2 - r)),
+                              np.column_stack((p2 - r, p2 + r, tip, p1 - r)))
+        rectangles[cone_side] = cone_boxes[cone_side]
+
+        circles = np.column_stack((round_values(p1, 3), round_values(p2, 3), r)) * circle[:, None]
+        rectangles[circle] = np.column_stack((circles[:, 0] - r, circles[:, 0] + r,
+                                              circles[:, 1] + r, circles[:, 1] - r))[circle]
+
+        areas = np.where(circle, np.pi * r ** 2,
+                         (rectangles[:, 1] - rectangles[:, 0]) *
+                         (rectangles[:, 2] - rectangles[:, 3]))
+        areas[cone_side] = (0.5 * np.pi * r ** 2 + 2 * r * length +
+                            r * self.length_cone)[cone_side]
+
+        return circle, rectangles, circles, areas
+
+    def base_drag_areas(self, direction: int, drag_coefficients: dict = None):
+        """
+        Determine the drag area of every part without the wake of other parts
+        :param direction: Axis along which the flow is directed
+        :param drag_coefficients: Dictionary of part class to a value or array of values to use
+                instead of its drag_coefficient, array values broadcast as leading axes of the rows
+        :return: Array of drag areas
+        """
+        coefficients = {part_type: part_type.drag_coefficient
+                        for part_type in (Sphere, Cylinder, Cuboid, IceCreamCone)}
+        coefficients.update(drag_coefficients or {})
+
+        r, length, dimensions = self.radius, self.length, self.dimensions
+        aligned = self.aligned(direction)
+        disk = self.is_kind(Disk)
+
+        if np.any(disk & ~aligned):
+            raise ValueError(f"Drag calculation along {direction} axis not supported for Disk")
+
+        axis_1, axis_2 = [axis for axis in (0, 1, 2) if axis != direction]
+        volume = ((2 * np.pi * r ** 3) / 3 + (np.pi * r ** 2) * length +
+                  (np.pi * self.length_cone * r ** 2) / 3)
+        side_area = 0.5 * np.pi * r ** 2 + 2 * r * length + r * self.length_cone
+
+        return np.select(
+            (self.is_kind(Sphere), self.is_kind(Cylinder) & aligned, self.is_kind(Cylinder),
+             self.is_kind(Cuboid), self.is_kind(IceCreamCone) & aligned, self.is_kind(IceCreamCone),
+             disk),
+            (coefficients[Sphere] * (np.pi * r ** 2),
+             coefficients[Cuboid] * (np.pi * r ** 2),
+             coefficients[Cylinder] * (2 * length * r),
+             coefficients[Cuboid] * (dimensions[:, axis_1] * dimensions[:, axis_2]),
+             coefficients[IceCreamCone] * (volume ** (2 / 3)),
+             coefficients[Cylinder] * side_area,
+             0.005 * self.wet_areas()))
+
+    def solve_wake(self, flow_direction: int, slowdown: SlowdownModel, wake_cutoff=None,
+                   profile=None, wake_model: str = 'largest'):
+        """
+        Determine the wake slowdown of all parts. With the 'largest' wake model every part takes
+        the slowdown of the first upstream part with the largest intersection of the frontal
+        surfaces, as in Case.run_case. The 'superposition' model combines the wakes of all
+        upstream parts, see tool/wake.py.
+        :param flow_direction: Axis along which the flow is directed
+        :param slowdown: SlowdownModel of the wakes, see tool/slowdown.py
+        :param wake_cutoff: Skip pairs further apart than wake_cutoff times the characteristic
+                length of the upstream part
+        :param profile: CaseProfile to record the phase times and intersection counters on
+        :param wake_model: 'largest' or 'superposition'
+        :return: None
+        """
+        with timer(profile, 'frontal_surfaces'):
+            axis_1, axis_2 = [axis for axis in (0, 2, 1) if axis != flow_direction]
+            circle, rectangles, circles, areas = self.frontal_surfaces(axis_1, axis_2)
+            lengths = self.characteristic_lengths(flow_direction)
+
+        with timer(profile, 'sort'):
+            self.order = np.argsort(self.smallest_coordinates(flow_direction), kind='stable')
+            rank = np.empty_like(self.order)
+            rank[self.order] = np.arange(self.order.size)
+
+        with timer(profile, 'intersections'):
+            index_1, index_2 = candidate_pairs(rectangles)
+            index_1, index_2 = (np.where(rank[index_1] < rank[index_2], index_1, index_2),
+                                np.where(rank[index_1] < rank[index_2], index_2, index_1))
+
+            distance = (self.position[index_2, flow_direction] -
+                        self.position[index_1, flow_direction])
+            if wake_cutoff is not None:
+                keep = distance <= wake_cutoff * lengths[index_1]
+                index_1, index_2, distance = index_1[keep], index_2[keep], distance[keep]
+
+            overlap = overlap_pairs(circle, rectangles, circles, index_1, index_2)
+
+        if profile is not None:
+            kinds = np.where(self.is_kind(IceCreamCone) & ~self.aligned(flow_direction),
+                             CONE_SIDE, circle.astype(int))
+            profile.count_pairs(kinds[index_1], kinds[index_2], overlap)
+
+        with timer(profile, 'slowdown'):
+            if wake_model == 'superposition':
+                self.superpose_wake(index_1, index_2, distance, overlap, lengths, areas, rank,
+                                    slowdown)
+            else:
+                self.assign_wake(index_1, index_2, distance, overlap, lengths, areas, rank,
+                                 slowdown)
+
+    def assign_wake(self, index_1, index_2, distance, overlap, lengths, areas, rank,
+                    slowdown: SlowdownModel):
+        """
+        Give every part the slowdown of the first upstream part with the largest overlap
+        :param slowdown: SlowdownModel of the wakes
+        :return: None
+        """
+        # The last update of every downstream part comes from its first largest overlap
+        positive = overlap > 0
+        index_1, index_2 = index_1[positive], index_2[positive]
+        distance, overlap = distance[positive], overlap[positive]
+        winner = np.lexsort((rank[index_1], -overlap, rank[index_2]))
+        first = np.ones(winner.size, dtype=bool)
+        first[1:] = index_2[winner][1:] != index_2[winner][:-1]
+        winner = winner[first]
+
+        factors = slowdown(distance[winner] / lengths[index_1[winner]])
+
+        self.slowdown[:] = 1.
+        self.wake_slowdown[:] = 1.
+        self.wake_factor[:] = 1.
+        self.largest_intersection[:] = 0.
+        self.upstream[:] = -1
+
+        self.upstream[index_2[winner]] = index_1[winner]
+        self.largest_intersection[index_2[winner]] = overlap[winner]
+
+        wake_slowdown = self.wake_slowdown.tolist()
+        for upstream, downstream, factor, area in zip(index_1[winner].tolist(),
+                                                      index_2[winner].tolist(),
+                                                      factors.tolist(), overlap[winner].tolist()):
+            slowdown = wake_slowdown[upstream] * factor
+            self.slowdown[downstream] = slowdown
+            wake_slowdown[downstream] = ((slowdown * area + areas[downstream] - area) /
+                                         areas[downstream])
+        self.wake_slowdown[:] = wake_slowdown
+
+        self.frontal_area = areas
+        self.wake_factor[:] = (((self.slowdown ** 2) * self.largest_intersection +
+                                areas - self.largest_intersection) / areas)
+
+    def superpose_wake(self, index_1, index_2, distance, overlap, lengths, areas, rank,
+                       slowdown: SlowdownModel):
+        """
+        Give every part the combined wake of all upstream parts it overlaps with, see
+        superpose_wakes. The largest_intersection of a part holds its area covered by wakes, and
+        upstream is not used.
+        :return: None
+        """
+        factors = slowdown(distance / lengths[index_1])
+        (self.slowdown[:], self.wake_slowdown[:], self.wake_factor[:],
+         self.largest_intersection[:]) = superpose_wakes(index_1, index_2, overlap, factors,
+                                                         areas, rank)
+        self.upstream[:] = -1
+        self.frontal_area = areas
+
+    def drag_areas(self, direction: int):
+        """
+        Determine the drag per unit dynamic pressure of every part, including the wake
+        :param direction: Axis along which the flow is directed
+        :return: Array of drag areas
+        """
+        base_drag_areas = self.base_drag_areas(direction)
+        friction_drag_areas = np.minimum(self.friction_coefficients() * self.wet_areas(),
+                                         base_drag_areas)
+        return friction_drag_areas + self.wake_factor * (base_drag_areas - friction_drag_areas)
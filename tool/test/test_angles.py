@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..angles import flow_vectors, run_flow_angles, run_flow_vectors, silhouette_overlaps, \
+    _plane_bases, _support
+from ..case import Case
+from ..geometry import load_geometry
+from ..objects import Cylinder, Cuboid
+from ..table import PartTable
+
+
+class TestSilhouettes(unittest.TestCase):
+    def setUp(self):
+        self.table = PartTable.from_definitions(load_geometry('data/final_concept.csv').definitions)
+        alpha, beta = np.meshgrid(np.arange(0, 360, 45), np.arange(-60, 61, 30))
+        self.vectors = flow_vectors(alpha, beta).reshape(-1, 3)
+
+    def test_flow_vectors(self):
+        self.assertTrue(np.allclose(flow_vectors([0, 90, 0], [0, 0, 90]), np.eye(3)))
+
+        first, second = _plane_bases(self.vectors)
+        self.assertTrue(np.allclose(np.sum(first * self.vectors, axis=1), 0))
+        self.assertTrue(np.allclose(np.cross(first, second), self.vectors))
+
+    def test_support(self):
+        # The largest projection of the corners of the cuboids and rims of the cylinders
+        theta = np.linspace(0, 2 * np.pi, 3601)
+        for row in range(len(self.table)):
+            part = self.table.take([row])
+            support = _support(part, self.vectors[:, None, :])[:, 0]
+
+            if part.is_kind(Cuboid)[0]:
+                corners = np.array(np.meshgrid(*[(-.5, .5)] * 3)).reshape(3, -1).T
+                points = part.position + corners * part.dimensions
+            elif part.is_kind(Cylinder)[0]:
+                axis = part.orientation[0, 0]
+                rim = np.zeros((theta.size, 3))
+                rim[:, (axis + 1) % 3] = part.radius[0] * np.cos(theta)
+                rim[:, (axis + 2) % 3] = part.radius[0] * np.sin(theta)
+                rim = np.concatenate((rim, rim))
+                rim[:theta.size, axis] = -part.length[0] / 2
+                rim[theta.size:, axis] = part.length[0] / 2
+                points = part.position + rim
+            else:
+                continue
+
+            self.assertTrue(np.allclose(support, (points @ self.vectors.T).max(axis=0),
+                                        atol=1e-5))
+
+    def test_areas(self):
+        # A circle of radius 1 and a 2 by 1 rectangle, overlapping over a quarter circle
+        angles = 96
+        theta = 2 * np.pi * np.arange(angles) / angles
+        corners = np.array([[0, 0], [2, 0], [2, 1], [0, 1]])
+        support = np.stack((np.ones(angles),
+                            (corners @ np.stack((np.cos(theta), np.sin(theta)))).max(axis=0)))
+
+        areas = silhouette_overlaps(support, np.array([0, 1, 0]), np.array([0, 1, 1]), 512)
+        self.assertAlmostEqual(areas[0], np.pi, places=2)
+        self.assertAlmostEqual(areas[1], 2, places=6)
+        self.assertAlmostEqual(areas[2], np.pi / 4, places=2)
+
+
+class TestFlowAngles(CaseTest):
+    def test_axes(self):
+        for name, geometry, directions in (('sub_main/5_0', 'final_concept', (0, 2)),
+                                           ('sub_main/5_1', 'final_concept_1', (0, 1, 2))):
+            drag, drag_area, cop = run_flow_vectors(Case(name, geometry), np.eye(3)[directions,])
+
+            for index, direction in enumerate(directions):
+                case = Case(name, geometry)
+                case.flow_direction = direction
+                _, expected = case.run_case()
+
+                self.assertAlmostEqual(drag[index], expected[0], delta=.02)
+                self.assertAlmostEqual(drag_area[index], expected[1], delta=.002)
+                self.assertTrue(np.allclose(cop[index], expected[2], atol=.002))
+
+    def test_grid(self):
+        alpha, beta = np.meshgrid(np.arange(-180, 180, 30), np.arange(-90, 91, 30),
+                                  indexing='ij')
+        drag, drag_area, cop = run_flow_angles(Case('sub_main/5_1', 'final_concept_1'),
+                                               alpha, beta)
+
+        self.assertEqual(drag_area.shape, alpha.shape)
+        self.assertEqual(cop.shape, alpha.shape + (3,))
+        # The geometry is symmetric in z, and the same flow vectors give the same drag
+        self.assertTrue(np.allclose(drag_area, drag_area[:, ::-1], atol=2e-3))
+        self.assertTrue(np.allclose(drag_area[:, 0], drag_area[0, 0]))
+        self.assertTrue(np.all(drag_area > 0))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, run_flow_vectors, Case('sub_main/5_0', 'final_concept'),
+                          [1, 0, 0], angles=30)
+
+
+if __name__ == '__main__':
+    unittest.main()
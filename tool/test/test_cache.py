@@ -0,0 +1,131 @@
+import tempfile
+import unittest
+
+from ..batch import run_batch
+from ..cache import IntersectionCache, ResultCache, intersection_cache
+from ..case import Case
+from ..objects import Cuboid
+from ..results import part_results
+from ..slowdown import SlowdownCurve
+from ..shapes import Rectangle, Circle
+from .test_case import CaseTest
+
+
+class TestIntersectionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = IntersectionCache(maxsize=2)
+
+    def test_translated(self):
+        area = self.cache.intersection(Rectangle(0, 2, 2, 0), Rectangle(1, 3, 3, 1))
+        moved = self.cache.intersection(Rectangle(5.1, 7.1, -1, -3), Rectangle(6.1, 8.1, 0, -2))
+
+        self.assertEqual(area, 1)
+        self.assertAlmostEqual(moved, area)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_different(self):
+        self.cache.intersection(Rectangle(0, 2, 2, 0), Rectangle(1, 3, 3, 1))
+        self.cache.intersection(Rectangle(0, 2, 2, 0), Circle(1, 1, .5))
+        self.cache.intersection(Circle(1, 1, .5), Rectangle(0, 2, 2, 0))
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+
+    def test_eviction(self):
+        rectangles = [Rectangle(0, 2, 2, 0), Rectangle(1, 3, 3, 1), Rectangle(1, 4, 3, 1)]
+        self.cache.intersection(rectangles[0], rectangles[1])
+        self.cache.intersection(rectangles[0], rectangles[2])
+        self.cache.intersection(rectangles[0], rectangles[1])
+        self.cache.intersection(rectangles[1], rectangles[2])
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+
+        # The least recently used pair was evicted, the pair used again was kept
+        self.cache.intersection(rectangles[0], rectangles[1])
+        self.cache.intersection(rectangles[0], rectangles[2])
+        self.assertEqual(self.cache.stats(), {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 4,
+                                              'evictions': 2})
+
+
+class TestCaseCache(CaseTest):
+    def test_run_case(self):
+        intersection_cache.clear()
+        expected = Case('sub_main/5_0', 'final_concept').run_case()
+
+        self.assertEqual(Case('sub_main/5_0', 'final_concept', cache=True).run_case(), expected)
+        misses = intersection_cache.misses
+        self.assertEqual(Case('sub_main/7-5_0', 'final_concept', cache=True).run_case()[1][1],
+                         expected[1][1])
+        self.assertEqual(intersection_cache.misses, misses)
+        self.assertGreater(intersection_cache.hits, 0)
+
+    def test_engines(self):
+        for engine in ('batch', 'table', 'raster'):
+            with self.subTest(engine=engine):
+                self.assertRaises(ValueError, Case, 'sub_main/5_0', 'final_concept',
+                                  engine=engine, cache=True)
+
+
+class TestResultCache(CaseTest):
+    def setUp(self):
+        super().setUp()
+        self.cache = ResultCache(tempfile.mkdtemp())
+
+    def test_run_case(self):
+        case = Case('validation/validation-12_95')
+        expected = case.run_case()
+        parts = part_results(case)
+
+        self.assertEqual(Case('validation/validation-12_95', result_cache=self.cache).run_case(),
+                         expected)
+        self.assertEqual((self.cache.hits, self.cache.misses, len(self.cache)), (0, 1, 1))
+
+        cached = Case('validation/validation-12_95', result_cache=self.cache)
+        cached.solve_case = None
+        self.assertEqual(cached.run_case(), expected)
+        self.assertEqual(part_results(cached), parts)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_key(self):
+        case = Case('sub_main/5_0', 'final_concept')
+        key = self.cache.key(case)
+
+        self.assertEqual(self.cache.key(Case('sub_main/5_0', 'final_concept')), key)
+        # The same inputs under another name share the key
+        renamed = Case('sub_main/5_0', 'final_concept')
+        renamed.name = 'renamed'
+        self.assertEqual(self.cache.key(renamed), key)
+
+        changes = [Case('sub_main/7-5_0', 'final_concept'),
+                   Case('sub_main/5_0', 'final_concept_1'),
+                   Case('sub_main/5_0', 'final_concept', wake_cutoff=10.),
+                   Case('sub_main/5_0', 'final_concept', wake_model='superposition'),
+                   Case('sub_main/5_0', 'final_concept', slowdown_model=SlowdownCurve(
+                       (0, 2, 10, 100), (0, .8, .95, 1)))]
+        changes[0].flow_direction = 0
+        moved = Case('sub_main/5_0', 'final_concept')
+        x, y, z = moved.parts[0].position
+        moved.parts[0].position = (x + 1e-6, y, z)
+        changes.append(moved)
+
+        keys = {self.cache.key(case) for case in changes}
+        self.assertEqual(len(keys), len(changes))
+        self.assertNotIn(key, keys)
+
+        drag_coefficient = Cuboid.drag_coefficient
+        try:
+            Cuboid.drag_coefficient = .2
+            self.assertNotEqual(self.cache.key(case), key)
+        finally:
+            Cuboid.drag_coefficient = drag_coefficient
+
+    def test_batch(self):
+        cases = ['validation/validation-12_95', ('sub_main/5_0', 'final_concept')]
+        expected = run_batch(cases, workers=1, write=False)
+
+        self.assertEqual(run_batch(cases, workers=2, write=False, result_cache=self.cache),
+                         expected)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(run_batch(cases, workers=1, write=False, result_cache=self.cache),
+                         expected)
+        self.assertEqual(self.cache.hits, 2)
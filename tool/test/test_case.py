@@ -0,0 +1,186 @@
+import contextlib
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from ..batch import expand_cases, run_batch
+from ..case import Case
+
+
+class CaseTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+
+class TestRunSweep(CaseTest):
+    def test_matches_run_case(self):
+        velocities = []
+        expected_results = []
+        for velocity in ('0-1', '2-5', '5', '7-5', '10', '11-1'):
+            case = Case(f'sub_main/{velocity}_0', geometry='final_concept')
+            velocity, result = case.run_case()
+            velocities.append(velocity)
+            expected_results.append(result)
+
+        sweep_velocities, (drag, drag_area, cop) = Case('sub_main/5_0', 'final_concept').run_sweep(
+            velocities)
+
+        self.assertTrue(np.array_equal(sweep_velocities, velocities))
+        for index, result in enumerate(expected_results):
+            self.assertAlmostEqual(drag[index], result[0], places=3)
+            self.assertAlmostEqual(drag_area[index], result[1], places=3)
+            self.assertTrue(np.allclose(cop[index], result[2]))
+
+    def test_densities(self):
+        case = Case('validation/validation-12_95')
+        _, (drag, drag_area, _) = case.run_sweep([10, 10, 20], densities=[1, 2, 1])
+
+        self.assertAlmostEqual(drag[1], 2 * drag[0], places=2)
+        self.assertAlmostEqual(drag[2], 4 * drag[0], places=2)
+        self.assertTrue(np.all(drag_area == drag_area[0]))
+
+    def test_repeated_solve(self):
+        case = Case('validation/validation-12_95')
+        _, first = case.run_case()
+        _, second = case.run_case()
+
+        self.assertEqual(first, second)
+
+
+class TestRunDirections(CaseTest):
+    def test_matches_run_case(self):
+        for engine in ('batch', 'table'):
+            results = Case('sub_main/5_0', 'final_concept', engine=engine).run_directions((0, 2))
+
+            for direction in (0, 2):
+                _, expected = Case(f'sub_main/5_{direction}', 'final_concept',
+                                   engine=engine).run_case()
+                self.assertEqual(results[direction], expected)
+
+    def test_final_concept(self):
+        # The default directions of a sub_main case, as run_final_concept of main.py
+        results = Case('sub_main/5_0', 'final_concept', engine='table').run_directions(
+            geometries={1: 'final_concept_1'})
+
+        self.assertEqual(list(results), [0, 1, 2])
+        for direction in (0, 1, 2):
+            geometry = 'final_concept_1' if direction == 1 else 'final_concept'
+            _, expected = Case(f'sub_main/5_{direction}', geometry, engine='table').run_case()
+            self.assertEqual(results[direction], expected)
+
+        with self.assertRaises(ValueError):
+            Case('sub_main/5_0', 'final_concept').run_directions()
+
+    def test_flow_direction(self):
+        case = Case('validation/validation-12_95', engine='table')
+        results = case.run_directions((1, 0))
+
+        self.assertEqual(list(results), [1, 0])
+        self.assertEqual(case.flow_direction, 0)
+        self.assertEqual(case.run_case()[1], results[0])
+
+
+class TestRunBatch(CaseTest):
+    def test_expand_cases(self):
+        cases = expand_cases(['validation/validation-1*', ('sub_main/5_?', 'final_concept')])
+
+        self.assertEqual(cases[0], ('validation/validation-12_95', None))
+        self.assertEqual(len(cases), 8)
+        self.assertEqual(cases[-3:], [('sub_main/5_0', 'final_concept'),
+                                      ('sub_main/5_1', 'final_concept'),
+                                      ('sub_main/5_2', 'final_concept')])
+
+    def test_order(self):
+        cases = ['validation/validation-14_78', 'validation/validation-12_95',
+                 ('sub_main/10_0', 'final_concept'), 'validation/validation-13_34']
+
+        serial = run_batch(cases, workers=1, write=False)
+        parallel = run_batch(cases, workers=2, write=False)
+
+        self.assertEqual([name for name, _, _ in parallel],
+                         [case if isinstance(case, str) else case[0] for case in cases])
+        self.assertEqual(serial, parallel)
+
+    def test_duplicates(self):
+        self.assertRaises(ValueError, run_batch, ['icecream', 'icecream'])
+
+
+class TestProfile(CaseTest):
+    def test_engines(self):
+        profiles = {}
+        for engine in Case.engines:
+            case = Case('validation/validation-12_95', engine=engine, profile=True)
+            case.run_case()
+            profiles[engine] = case.profile
+
+        self.assertEqual(profiles['batch'].calls, profiles['table'].calls)
+        self.assertEqual(profiles['batch'].overlaps, profiles['table'].overlaps)
+        self.assertEqual(profiles['batch'].calls, profiles['pairwise'].calls)
+        self.assertEqual(profiles['batch'].calls['rectangle/circle'], 16)
+
+        self.assertIn('intersections', profiles['pairwise'].times)
+        self.assertIn('table', profiles['table'].times)
+        self.assertTrue(profiles['table'].report().startswith('Phase'))
+
+    def test_disabled(self):
+        self.assertIsNone(Case('icecream').profile)
+
+
+class TestImports(CaseTest):
+    def test_lazy_plotting(self):
+        # Running cases without plots should not import matplotlib
+        script = ("import sys, main, tool.optimize; "
+                  "print(any(name.startswith('matplotlib') for name in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                check=True).stdout
+
+        self.assertEqual(output.strip(), 'False')
+
+
+class TestArguments(CaseTest):
+    def test_unused_options(self):
+        from main import parse_arguments
+
+        for arguments in (['validation', '-g', 'final_concept'], ['slowdown', '-o', 'out.csv'],
+                          ['-g', 'final_concept'], ['v', '-o', 'out.npz'], ['-o', 'out.npz']):
+            with self.subTest(arguments=arguments), contextlib.redirect_stderr(io.StringIO()):
+                self.assertRaises(SystemExit, parse_arguments, arguments)
+
+        self.assertEqual(parse_arguments(['-o', 'out.csv']).output, 'out.csv')
+        self.assertEqual(parse_arguments(['case', '-g', 'final_concept']).geometry,
+                         'final_concept')
+
+    def test_final_concept_output(self):
+        from main import main
+
+        results = glob.glob(os.path.join('data', 'result_sub_main', '*.csv')) + \
+            [os.path.join('data', 'result_final_concept.csv')]
+        modified = {path: os.stat(path).st_mtime_ns for path in results}
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'final_concept.csv')
+            main(['-o', output, '-w', '1'])
+
+            self.assertEqual(os.listdir(directory), ['final_concept.csv'])
+            with open(output) as f:
+                lines = f.readlines()
+
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('Flow direction, Drag Area [m2]'))
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['x', 'y', 'z'])
+        # No result file per case, nor the default summary
+        self.assertEqual({path: os.stat(path).st_mtime_ns for path in results}, modified)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from ..case import Case
+from ..differential import case_engine, compare, differential_test, random_case_files, shrink
+from ..geometry import parse_case
+from ..slowdown import SlowdownCurve, SlowdownFunction
+
+
+class TestDifferential(unittest.TestCase):
+    def test_exact_engines(self):
+        report = differential_test({'batch': case_engine(engine='batch'),
+                                    'table': case_engine(engine='table')}, cases=20)
+
+        self.assertEqual(report.mismatches, [])
+        self.assertEqual(set(report.speedups()), {'batch', 'table'})
+        self.assertIn('table', report.report())
+
+    def test_random_options(self):
+        # The reference and the engine run every case with the same random options
+        reference, options = case_engine(), []
+
+        def recording(files, **case_options):
+            options.append(case_options)
+            return reference(files, **case_options)
+
+        report = differential_test({'recording': recording}, reference, cases=30, max_parts=8)
+
+        self.assertEqual(report.mismatches, [])
+        self.assertEqual({option['wake_model'] for option in options}, set(Case.wake_models))
+        self.assertEqual({option['wake_cutoff'] is None for option in options}, {True, False})
+        self.assertEqual({type(option['slowdown_model']) for option in options},
+                         {type(None), SlowdownCurve, SlowdownFunction})
+
+    def test_compare(self):
+        reference = ((10., .5, (0., 1., 0.)), {'a': .9, 'b': 1.})
+
+        self.assertEqual(compare(reference, ((10.001, .5, (0., 1.001, 0.)), {'a': .9, 'b': 1.})),
+                         [])
+        self.assertEqual(len(compare(reference, ((10.1, .6, (0., 1., .1)), {'a': .8, 'b': 1.}))),
+                         4)
+        self.assertEqual(len(compare(reference, ((10., .5, (0., 1., 0.)), {'a': .9}))), 1)
+        self.assertEqual(compare(reference, ValueError('failed')), ['ValueError: failed'])
+
+    def test_shrink(self):
+        # An engine that is wrong for every cone is reduced to a single cone
+        reference = case_engine()
+
+        def faulty(files, **options):
+            result, wake_factors = reference(files, **options)
+            return result, {name: value + ('cone' in name) for name, value in
+                            wake_factors.items()}
+
+        report = differential_test({'faulty': faulty}, cases=3, max_parts=20, seed=1)
+
+        self.assertTrue(report.mismatches)
+        for mismatch in report.mismatches:
+            self.assertEqual([definition.name[:4] for definition in mismatch.files.geometry],
+                             ['cone'])
+            conditions, geometry = parse_case(mismatch.lines())
+            self.assertEqual(conditions, mismatch.files.conditions)
+            self.assertEqual(geometry.definitions, mismatch.files.geometry.definitions)
+
+    def test_shrink_pairs(self):
+        files = random_case_files(np.random.default_rng(0), 30)
+        names = [definition.name for definition in files.geometry][::7][:2]
+
+        shrunk = shrink(files, lambda candidate: set(names) <=
+                        {definition.name for definition in candidate.geometry})
+        self.assertEqual([definition.name for definition in shrunk.geometry], names)
+
+
+if __name__ == '__main__':
+    unittest.main()
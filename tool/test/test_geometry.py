@@ -0,0 +1,154 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from .. import geometry, synthetic
+from ..objects import Sphere, Cylinder, Cuboid, Disk
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+
+
+class TestGeometryCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'geometry.csv')
+        shutil.copy(os.path.join(DATA, 'final_concept.csv'), self.path)
+        geometry.clear_geometry_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        geometry.clear_geometry_cache()
+
+    def test_shared(self):
+        self.assertIs(geometry.load_geometry(self.path), geometry.load_geometry(self.path))
+
+    def test_modified(self):
+        first = geometry.load_geometry(self.path)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        second = geometry.load_geometry(self.path)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(first.definitions, second.definitions)
+        self.assertEqual(len(geometry._geometry_cache), 1)
+
+    def test_build_parts(self):
+        shared = geometry.load_geometry(self.path)
+        parts_1 = shared.build_parts(1.225, 5)
+        parts_2 = shared.build_parts(1., 10)
+
+        self.assertEqual(len(parts_1), len(shared))
+        self.assertEqual([type(part) for part in parts_1[:8]], [Cylinder] * 4 + [Cuboid] * 4)
+        self.assertIsInstance(parts_1[-1], Disk)
+        self.assertEqual(parts_1[0].dynamic_pressure, 0.5 * 1.225 * 5 ** 2)
+        self.assertEqual(parts_2[0].dynamic_pressure, 0.5 * 10 ** 2)
+        self.assertIsNot(parts_1[0], parts_2[0])
+
+    def test_spheres(self):
+        shared = geometry.load_geometry(os.path.join(DATA, 'validation', 'validation-12_95.csv'))
+
+        self.assertEqual(shared.definitions[0],
+                         geometry.PartDefinition(Sphere, 'head', ((-0.43, -0.125, 0.), 0.115)))
+
+    def test_case_files(self):
+        name = os.path.join('validation', 'validation-12_95')
+        with mock.patch.object(geometry, 'open', side_effect=open, create=True) as opened:
+            files = geometry.read_case_files(name)
+            self.assertEqual(opened.call_count, 1)
+            again = geometry.read_case_files(name)
+            self.assertEqual(opened.call_count, 2)
+
+        self.assertIs(again.geometry, files.geometry)
+        self.assertEqual(again.conditions, files.conditions)
+        self.assertIs(geometry.load_geometry(os.path.join('data', f"{name}.csv")), files.geometry)
+
+
+CASE_FILE = """Case Definition,
+Density, Velocity, Reynolds number, flow_direction,
+1.225, 10, 100000, 2,
+Cuboids,
+name, centre x, centre y, centre z, dimension x, dimension y, dimension z,
+#
+body, 0, 0, 0, 1, 2, 3,
+#
+Spheres,
+name, centre x, centre y, centre z, radius,
+head, 0, 1.5, 0, 0.5
+Disks,
+name, centre x, centre y, centre z, radius, orientation1, orientation2,
+rotor, 0, 2, 0, 1, 0, 2,
+,
+"""
+
+
+class TestParseGeometry(unittest.TestCase):
+    def parse(self, text):
+        return geometry.parse_geometry(io.StringIO(text), 'case.csv')
+
+    def test_sections_by_name(self):
+        parsed = self.parse(CASE_FILE)
+
+        self.assertEqual([definition.name for definition in parsed], ['body', 'head', 'rotor'])
+        self.assertEqual(parsed.definitions[0].parameters, ((0., 0., 0.), (1., 2., 3.)))
+        self.assertEqual(parsed.definitions[2].parameters, ((0., 2., 0.), 1., (0, 2)))
+
+    def test_columns(self):
+        columns = self.parse(CASE_FILE).columns
+
+        self.assertEqual(set(columns), {'Cuboids', 'Spheres', 'Disks'})
+        self.assertTrue(np.array_equal(columns['Cuboids']['dimensions'], [[1, 2, 3]]))
+        self.assertEqual(columns['Disks']['orientation'].dtype, int)
+        self.assertEqual(columns['Spheres']['position'].shape, (1, 3))
+        self.assertFalse(columns['Spheres']['radius'].flags.writeable)
+
+    def test_conditions(self):
+        path = os.path.join(tempfile.mkdtemp(), 'case.csv')
+        with open(path, 'w') as f:
+            f.write(CASE_FILE)
+
+        conditions = geometry.read_conditions(path)
+        shutil.rmtree(os.path.dirname(path))
+
+        self.assertEqual(conditions['Density'], 1.225)
+        self.assertEqual(conditions['flow_direction'], 2)
+
+    def test_truncated(self):
+        truncated = CASE_FILE[:CASE_FILE.index('Disks')]
+
+        with self.assertRaises(geometry.CaseFileError) as context:
+            self.parse(truncated)
+
+        self.assertIn('file ends early', str(context.exception))
+        self.assertEqual(context.exception.line_number, 11)
+
+    def test_malformed(self):
+        for text, line_number in ((CASE_FILE.replace('0, 1.5, 0, 0.5', '0, 1.5, 0'), 11),
+                                  (CASE_FILE.replace('body, 0, 0, 0, 1,', 'body, 0, 0, 0, a,'), 7),
+                                  (CASE_FILE.replace('Spheres', 'Balls'), 9),
+                                  (CASE_FILE.replace('Disks', 'Cuboids'), 12),
+                                  (CASE_FILE.replace('Case Definition', 'Case'), 1)):
+            with self.assertRaises(geometry.CaseFileError) as context:
+                self.parse(text)
+
+            self.assertEqual(context.exception.line_number, line_number)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestSyntheticCase(unittest.TestCase):
+    def test_parse(self):
+        sections = synthetic.synthetic_sections(23, flow_direction=2)
+        parsed = geometry.parse_geometry(synthetic.case_lines(sections, flow_direction=2))
+
+        self.assertEqual(len(parsed), 23)
+        self.assertEqual(len(parsed.columns['Disks']['name']), 4)
+        self.assertTrue(np.any(parsed.columns['Disks']['orientation'] == 2, axis=1).all())
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..case import Case
+from ..incremental import IncrementalCase
+
+
+class TestIncrementalCase(CaseTest):
+    def test_initial(self):
+        for name, geometry in (('sub_main/5_0', 'final_concept'),
+                               ('validation/validation-12_95', None)):
+            expected = Case(name, geometry, engine='table').run_case()
+            self.assertEqual(IncrementalCase(Case(name, geometry)).result, expected)
+
+    def test_updates(self):
+        case = Case('sub_main/5_2', 'final_concept')
+        incremental = IncrementalCase(case)
+        rng = np.random.default_rng(0)
+
+        for _ in range(50):
+            row = int(rng.integers(len(incremental.table)))
+            incremental.update(row, position=incremental.table.position[row] +
+                               rng.normal(0, .1, 3))
+            table = incremental.table.take(slice(None))
+            table.solve_wake(case.flow_direction, case.get_slowdown_model())
+
+            self.assertTrue(np.allclose(incremental.drag_areas,
+                                        table.drag_areas(case.flow_direction)))
+            self.assertAlmostEqual(incremental.total_drag_area,
+                                   table.drag_areas(case.flow_direction).sum())
+
+    def test_resize(self):
+        incremental = IncrementalCase(Case('sub_main/5_0', 'final_concept'))
+        _, (drag, drag_area, _) = incremental.update('battery', dimensions=(.82, .5, .46))
+
+        case = Case('sub_main/5_0', 'final_concept', engine='table')
+        next(part for part in case.parts if part.__name__ == 'battery').dimensions = (.82, .5, .46)
+        _, expected = case.run_case()
+
+        self.assertAlmostEqual(drag, expected[0], places=3)
+        self.assertAlmostEqual(drag_area, expected[1], places=3)
+
+    def test_invalid(self):
+        incremental = IncrementalCase(Case('sub_main/5_0', 'final_concept'))
+
+        self.assertRaises(KeyError, incremental.update, 'tail', radius=1.)
+        self.assertRaises(ValueError, incremental.update, 'battery', mass=1.)
+
+        # Parameters that the kind of the part does not have, which it would ignore
+        result = incremental.result
+        self.assertRaises(ValueError, incremental.update, 'battery', radius=1.)
+        self.assertRaises(ValueError, incremental.update, 'FL motor', length_cone=1.)
+        self.assertEqual(incremental.result, result)
+
+
+if __name__ == '__main__':
+    unittest.main()
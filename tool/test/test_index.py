@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from .. import index, shapes
+
+
+class TestBoundingBoxes(unittest.TestCase):
+    def test_boxes(self):
+        surfaces = [shapes.Rectangle(0, 2, 1, -1), shapes.Circle(1, 2, 0.5),
+                    shapes.ConeSideSurface(0.5, 1, -1, 3, 4, 2)]
+
+        expected_boxes = [[0, 2, 1, -1], [0.5, 1.5, 2.5, 1.5], [-1, 3, 4, 2]]
+
+        self.assertTrue(np.array_equal(index.bounding_boxes(surfaces), expected_boxes))
+
+
+class TestCandidatePairs(unittest.TestCase):
+    def test_touching(self):
+        boxes = [[0, 1, 1, 0], [1, 2, 1, 0], [0, 1, 2, 1], [0.5, 1.5, 1.5, 0.5]]
+
+        index_1, index_2 = index.candidate_pairs(boxes)
+
+        self.assertEqual(list(zip(index_1, index_2)), [(0, 3), (1, 3), (2, 3)])
+
+    def test_brute_force(self):
+        rng = np.random.default_rng(0)
+        corners = rng.uniform(0, 10, (300, 2))
+        sizes = rng.uniform(0, 1, (300, 2))
+        boxes = np.column_stack((corners[:, 0], corners[:, 0] + sizes[:, 0],
+                                 corners[:, 1] + sizes[:, 1], corners[:, 1]))
+
+        expected_pairs = [(i, j) for i in range(300) for j in range(i + 1, 300)
+                          if boxes[i, 0] < boxes[j, 1] and boxes[j, 0] < boxes[i, 1] and
+                          boxes[i, 3] < boxes[j, 2] and boxes[j, 3] < boxes[i, 2]]
+
+        index_1, index_2 = index.candidate_pairs(boxes)
+
+        self.assertEqual(list(zip(index_1, index_2)), expected_pairs)
+
+    def test_empty(self):
+        index_1, index_2 = index.candidate_pairs(np.empty((0, 4)))
+
+        self.assertEqual(index_1.size, 0)
+        self.assertEqual(index_2.size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..case import Case
+from ..optimize import LayoutEvaluator, optimize_layout
+
+
+class TestOptimizeLayout(CaseTest):
+    bounds = {'battery': ((-.3, .3), (-.7, -.4), None), 'main body top': (None, (.5, .8), None)}
+
+    def test_optimum(self):
+        case = Case('sub_main/5_0', 'final_concept')
+        _, (_, initial, _) = case.run_case()
+        result = optimize_layout(case, self.bounds, max_evaluations=500)
+
+        self.assertLessEqual(result.evaluations, 500)
+        self.assertLess(result.objective, initial)
+        self.assertEqual(result.history[-1], result.objective)
+        self.assertTrue(all(a >= b for a, b in zip(result.history, result.history[1:])))
+
+        self.assertTrue(-.3 <= result.positions['battery'][0] <= .3)
+        self.assertTrue(-.7 <= result.positions['battery'][1] <= -.4)
+        self.assertTrue(.5 <= result.positions['main body top'][1] <= .8)
+        self.assertEqual(result.positions['battery'][2], 0.)
+
+        # The optimum equals a full evaluation of the optimised layout
+        check = Case('sub_main/5_0', 'final_concept', engine='table')
+        for part in check.parts:
+            if part.__name__ in result.positions:
+                part.position = result.positions[part.__name__]
+        _, (_, drag_area, _) = check.run_case()
+        self.assertAlmostEqual(result.objective, drag_area, places=3)
+
+    def test_workers(self):
+        case = Case('sub_main/5_0', 'final_concept')
+        expected = optimize_layout(case, self.bounds, max_evaluations=100)
+        result = optimize_layout(case, self.bounds, max_evaluations=100, workers=2)
+
+        self.assertAlmostEqual(result.objective, expected.objective)
+        self.assertEqual(result.evaluations, expected.evaluations)
+
+    def test_trials(self):
+        # Trial moves leave the totals exactly as they were
+        evaluator = LayoutEvaluator(Case('sub_main/5_0', 'final_concept'), (0, 2))
+        totals = [(case.total_drag_area, list(case.total_moments)) for case in evaluator.cases]
+        row = evaluator.cases[0].row('battery')
+        evaluator.evaluate([(row, (x, -.5, 0.)) for x in np.linspace(-.3, .3, 200)])
+
+        self.assertEqual([(case.total_drag_area, case.total_moments) for case in evaluator.cases],
+                         totals)
+
+    def test_velocities(self):
+        case = Case('sub_main/5_0', 'final_concept')
+        area = optimize_layout(case, self.bounds, directions=(0, 2), max_evaluations=0)
+        drag = optimize_layout(case, self.bounds, directions=(0, 2), velocities=(5, 10),
+                               max_evaluations=0)
+
+        self.assertAlmostEqual(drag.objective, area.objective * .5 * case.density * 62.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
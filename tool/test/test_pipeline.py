@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from .test_case import CaseTest
+from ..batch import expand_cases, run_batch, run_single
+from ..case import Case
+from ..geometry import read_case_files
+from ..pipeline import BackgroundWriter, prefetch
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_order(self):
+        def square(value):
+            time.sleep(.001 * (value % 3))
+            return value ** 2
+
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(list(prefetch(square, [(value,) for value in range(50)], executor, 8)),
+                             [value ** 2 for value in range(50)])
+        self.assertEqual(list(prefetch(square, [(2,), (3,)])), [4, 9])
+
+    def test_bounded(self):
+        submitted = []
+
+        def arguments():
+            for value in range(20):
+                submitted.append(value)
+                yield value,
+
+        with ThreadPoolExecutor(2) as executor:
+            for index, _ in enumerate(prefetch(abs, arguments(), executor, 4)):
+                self.assertLessEqual(len(submitted), index + 4)
+
+
+class TestBackgroundWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_write(self):
+        with BackgroundWriter(2) as writer:
+            for index in range(10):
+                writer.write(os.path.join(self.directory, f'{index}.csv'), [f'{index},\n', 'a\n'])
+
+        self.assertEqual(writer.written, 10)
+        with open(os.path.join(self.directory, '7.csv')) as f:
+            self.assertEqual(f.read(), '7,\na\n')
+        self.assertRaises(RuntimeError, writer.write, os.path.join(self.directory, 'x.csv'), [])
+
+    def test_error(self):
+        writer = BackgroundWriter()
+        writer.write(os.path.join(self.directory, 'missing', 'file.csv'), ['a\n'])
+        self.assertRaises(FileNotFoundError, writer.close)
+
+
+class TestPipeline(CaseTest):
+    def test_files(self):
+        files = read_case_files('sub_main/5_0', 'final_concept')
+        case = Case('sub_main/5_0', 'final_concept', files=files)
+
+        self.assertEqual(case.run_case(), Case('sub_main/5_0', 'final_concept').run_case())
+        self.assertEqual(case.result_path(), 'data/result_sub_main/5_0.csv')
+        self.assertEqual(len(case.result_lines()), 5 + len(case.parts))
+
+    def test_batch(self):
+        cases = ['validation/*', ('sub_main/*_1', 'final_concept_1')]
+        expected = [run_single(name, geometry, False) for name, geometry in expand_cases(cases)]
+
+        for workers in (1, 2):
+            results = run_batch(cases, workers=workers, write=False, readers=2, queue_size=3)
+            self.assertEqual(results, expected)
+            self.assertEqual(threading.active_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
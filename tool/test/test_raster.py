@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from .. import shapes
+from ..case import Case
+from ..geometry import parse_case
+from ..synthetic import case_lines
+from ..raster import raster_intersections, raster_convergence
+
+
+class TestRasterIntersections(unittest.TestCase):
+    def setUp(self):
+        self.surfaces = [shapes.Rectangle(0, 2, 2, 0), shapes.Rectangle(1, 3, 3, 1),
+                         shapes.Circle(0, 0, 1), shapes.Circle(1, 1, 1),
+                         shapes.ConeSideSurface(0.5, 1, 1, 3, 3, 1), shapes.Rectangle(5, 6, 6, 5)]
+
+    def test_areas(self):
+        index_1, index_2 = np.triu_indices(len(self.surfaces), 1)
+        analytic = shapes.pair_intersections(self.surfaces, index_1, index_2)
+        raster = raster_intersections(self.surfaces, index_1, index_2, cell_size=0.001)
+
+        self.assertTrue(np.allclose(raster, analytic, atol=5e-3))
+        self.assertEqual(raster[-1], 0)
+
+    def test_chunks(self):
+        index_1, index_2 = np.triu_indices(len(self.surfaces), 1)
+        self.assertTrue(np.array_equal(
+            raster_intersections(self.surfaces, index_1, index_2, 0.01, chunk=100),
+            raster_intersections(self.surfaces, index_1, index_2, 0.01)))
+
+    def test_convergence(self):
+        errors = [error for _, error, _ in raster_convergence(self.surfaces, (0.1, 0.01, 0.001))]
+
+        self.assertLess(errors[2], errors[0])
+        self.assertLess(errors[2], 5e-3)
+
+    def test_no_pairs(self):
+        self.assertEqual(raster_intersections(self.surfaces, [], []).size, 0)
+
+    def test_cone_silhouette(self):
+        # Cones with the base at the origin, radius 1, cylinder length 1 and cone length 2, with
+        # a rectangle in the corner of their bounding box next to the tip
+        area = np.pi / 2 + 2 + 2
+        for cone, other in ((shapes.ConeSideSurface(0, area, -1, 3, 1, -1, 1, 1, 2, 0),
+                             shapes.Rectangle(2.5, 3, 1, .6)),
+                            (shapes.ConeSideSurface(0, area, -1, 1, 3, -1, 1, 1, 2, 1),
+                             shapes.Rectangle(.6, 1, 3, 2.5))):
+            surfaces = [cone, other]
+            raster = raster_intersections(surfaces, [0, 0], [0, 1], cell_size=0.001)
+
+            self.assertAlmostEqual(raster[0], area, places=3)
+            self.assertEqual(raster[1], 0)
+            self.assertGreater(shapes.pair_intersections(surfaces, [0], [1])[0], 0)
+
+
+class TestRasterEngine(CaseTest):
+    def test_run_case(self):
+        _, expected = Case('sub_main/5_0', 'final_concept', engine='batch').run_case()
+        _, result = Case('sub_main/5_0', 'final_concept', engine='raster',
+                         cell_size=0.001).run_case()
+
+        self.assertAlmostEqual(result[0], expected[0], places=1)
+        self.assertAlmostEqual(result[1], expected[1], places=2)
+
+    def test_cone_tip(self):
+        # A cuboid downstream of the tip of a cone, inside the bounding box of its side view
+        files = parse_case(case_lines({'IceCream Cones': [('cone', 0, 0, 0, 1, 1, 2, 0)],
+                                       'Cuboids': [('cuboid', 2.75, 3, .8, .5, .5, .4)]}))
+
+        wake_factors = {}
+        for engine in ('batch', 'raster'):
+            case = Case('cone_tip', engine=engine, files=files)
+            case.run_case()
+            wake_factors[engine] = {part.__name__: part.wake_factor for part in case.parts}
+
+        self.assertLess(wake_factors['batch']['cuboid'], 1)
+        self.assertEqual(wake_factors['raster']['cuboid'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..batch import run_batch
+from ..case import Case
+from ..results import ResultSink, load_results
+
+
+class TestResultSink(CaseTest):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def test_batch(self):
+        cases = ['validation/validation-12_95', ('sub_main/5_0', 'final_concept')]
+        sink = ResultSink()
+        results = run_batch(cases, workers=2, write=False, sink=sink)
+
+        self.assertEqual(results, run_batch(cases, workers=1, write=False))
+        self.assertEqual(sink.names, ['validation/validation-12_95', 'sub_main/5_0'])
+        self.assertEqual(sink.part_cases.count(1), 15)
+
+        path = os.path.join(self.directory, 'results.npz')
+        sink.save(path)
+        arrays = load_results(path)
+
+        self.assertEqual(list(arrays['case_name']), sink.names)
+        self.assertTrue(np.array_equal(arrays['drag'], [result[2][0] for result in results]))
+        self.assertEqual(arrays['cop'].shape, (2, 3))
+        self.assertEqual(arrays['part_name'].size, arrays['part_wake_factor'].size)
+
+    def test_csv(self):
+        case = Case('sub_main/5_0', 'final_concept')
+        case.run_case()
+
+        sink = ResultSink()
+        sink.add(case)
+        sink.add_result('empty', 5., (0., 0., (0., 0., 0.)))
+
+        path = os.path.join(self.directory, 'results.csv')
+        sink.save(path)
+        with open(path) as f:
+            lines = f.readlines()
+
+        self.assertEqual(len(lines), 1 + len(case.parts) + 1)
+        self.assertTrue(all(len(line.split(',')) == 10 for line in lines))
+        self.assertTrue(lines[1].startswith(f"sub_main/5_0, 5.0, {float(case.result[0])!r}"))
+
+    def test_format(self):
+        self.assertRaises(ValueError, ResultSink().save, 'results.txt')
+
+
+if __name__ == '__main__':
+    unittest.main()
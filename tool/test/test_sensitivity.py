@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..geometry import load_geometry
+from ..sensitivity import sensitivity_sweep
+from ..slowdown import SlowdownCurve
+from ..table import PartTable
+
+
+class TestSensitivitySweep(CaseTest):
+    def setUp(self):
+        super().setUp()
+        self.geometry = load_geometry('data/final_concept.csv')
+        self.parameters = {('battery', 'dimensions', 1): (.1, .3, .5),
+                           ('FL motor', 'radius'): (.05, .1),
+                           ('main body', 'position', 0): (-.2, .3)}
+
+    def test_full_solve(self):
+        drag_areas = sensitivity_sweep(self.geometry, self.parameters, 0)
+        self.assertEqual(drag_areas.shape, (3, 2, 2))
+
+        base = PartTable.from_definitions(self.geometry.definitions)
+        for point in np.ndindex(drag_areas.shape):
+            table = base.take(slice(None))
+            for ((name, column, *component), values), index in zip(self.parameters.items(),
+                                                                    point):
+                getattr(table, column)[(table.name == name,) + tuple(component)] = values[index]
+
+            table.solve_wake(0, SlowdownCurve())
+            self.assertEqual(drag_areas[point], table.drag_areas(0).sum())
+
+    def test_base_geometry(self):
+        drag_area = sensitivity_sweep('final_concept', {('battery', 'dimensions', 0): ()}, 0)
+        self.assertEqual(drag_area.shape, (0,))
+
+        drag_area = sensitivity_sweep('final_concept', {('battery', 'dimensions', 1): (.232,)}, 0)
+        table = PartTable.from_definitions(self.geometry.definitions)
+        table.solve_wake(0, SlowdownCurve())
+        self.assertAlmostEqual(drag_area[0], table.drag_areas(0).sum())
+
+    def test_invalid(self):
+        self.assertRaises(KeyError, sensitivity_sweep, self.geometry, {('tail', 'radius'): (1,)}, 0)
+        self.assertRaises(ValueError, sensitivity_sweep, self.geometry,
+                          {('battery', 'dimensions'): (1,)}, 0)
+        self.assertRaises(ValueError, sensitivity_sweep, self.geometry,
+                          {('battery', 'mass'): (1,)}, 0)
+
+        # Parameters that the kind of the part does not have
+        for key in (('battery', 'length'), ('battery', 'radius'), ('battery', 'length_cone'),
+                    ('FL motor', 'dimensions', 0)):
+            with self.subTest(key=key):
+                self.assertRaises(ValueError, sensitivity_sweep, self.geometry, {key: (1,)}, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,7 +63,7 @@ class TestIntersectionRectangleCircle(unittest.TestCase):
         rectangle = shapes.Rectangle(-1, 1, 4, -4)
         circle = shapes.Circle(0, 0, 2)
 
-        expected_area = 4 * np.sqrt(3) + 2 * (circle.area * 1.047 / (2 * np.pi) - np.sqrt(3))
+        expected_area = 4 * np.sqrt(3) + 2 * (circle.area * (np.pi / 3) / (2 * np.pi) - np.sqrt(3))
 
         self.assertEqual(shapes.intersection_rectangle_circle(rectangle, circle),
                          round(expected_area, 3))
@@ -102,16 +102,14 @@ class TestIntersectionRectangleCircle(unittest.TestCase):
         circle = shapes.Circle(0, 0, 1)
 
         self.assertEqual(shapes.intersection_rectangle_circle(rectangle, circle),
-                         round(0.25 * circle.area - 0.01, 3))
+                         round(0.25 * circle.area, 3))
 
     def test_two_inside_vertex(self):
         rectangle = shapes.Rectangle(0, 3, 1, 0)
         circle = shapes.Circle(0, 0, 2)
 
-        helper_rectangle1 = shapes.Rectangle(0, 3, 3, 0)
-        helper_rectangle2 = shapes.Rectangle(0, 3, 3, 1)
-        expected_area = shapes.intersection_rectangle_circle(helper_rectangle1, circle) - (
-                        shapes.intersection_rectangle_circle(helper_rectangle2, circle))
+        # Sector of 30 degrees and the triangle above it, split at the intersection (sqrt(3), 1)
+        expected_area = circle.area / 12 + np.sqrt(3) / 2
 
         self.assertEqual(shapes.intersection_rectangle_circle(rectangle, circle),
                          round(expected_area, 3))
@@ -120,7 +118,10 @@ class TestIntersectionRectangleCircle(unittest.TestCase):
         rectangle = shapes.Rectangle(0, 1.8, 1.8, 0)
         circle = shapes.Circle(0, 0, 2)
 
-        expected_area = rectangle.area - 0.431 + 0.1064 * circle.area - 1.2397
+        # Integrate the height of the overlap from the intersection with the top edge
+        x = np.sqrt(2 ** 2 - 1.8 ** 2)
+        primitive = lambda x: 0.5 * (x * np.sqrt(4 - x ** 2) + 4 * np.arcsin(x / 2))
+        expected_area = 1.8 * x + primitive(1.8) - primitive(x)
 
         self.assertEqual(shapes.intersection_rectangle_circle(rectangle, circle),
                          round(expected_area, 3))
@@ -263,5 +264,142 @@ class TestAreaTriangle(unittest.TestCase):
         self.assertEqual(shapes.area_triangle(*sides), 6)
 
 
+def column_overlap(x, intervals_1, intervals_2):
+    """
+    Integrate the overlap of two vertical intervals over the columns x, as a reference
+    """
+    bottom = np.maximum(intervals_1[0], intervals_2[0])
+    top = np.minimum(intervals_1[1], intervals_2[1])
+    return np.sum(np.clip(top - bottom, 0, None)) * (x[1] - x[0])
+
+
+def circle_columns(x, circle):
+    height = np.sqrt(np.clip(circle[2] ** 2 - (x - circle[0]) ** 2, 0, None))
+    return circle[1] - height, circle[1] + height
+
+
+class TestRandomIntersection(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.x = np.linspace(-3, 3, 200001)
+        self.x = 0.5 * (self.x[1:] + self.x[:-1])
+
+    def random_circle(self):
+        return tuple(self.rng.uniform(-1, 1, 2).round(2).tolist()) + \
+            (round(self.rng.uniform(.1, 1), 2),)
+
+    def test_rectangle_circle(self):
+        for _ in range(100):
+            left, right = np.sort(self.rng.uniform(-2, 2, 2).round(2)).tolist()
+            bottom, top = np.sort(self.rng.uniform(-2, 2, 2).round(2)).tolist()
+            circle = self.random_circle()
+
+            rectangle = np.where((left < self.x) & (self.x < right), bottom, 0), \
+                np.where((left < self.x) & (self.x < right), top, 0)
+            expected_area = column_overlap(self.x, rectangle, circle_columns(self.x, circle))
+
+            area = shapes.intersection_rectangle_circle(shapes.Rectangle(left, right, top, bottom),
+                                                        shapes.Circle(*circle))
+            self.assertAlmostEqual(area, expected_area, delta=1e-3)
+            self.assertEqual(area, shapes.batch_intersection_rectangle_circle(
+                [(left, right, top, bottom)], [circle])[0, 0])
+
+    def test_circles(self):
+        for _ in range(100):
+            circle_1, circle_2 = self.random_circle(), self.random_circle()
+            expected_area = column_overlap(self.x, circle_columns(self.x, circle_1),
+                                           circle_columns(self.x, circle_2))
+
+            area = shapes.intersection_circle_circle(shapes.Circle(*circle_1),
+                                                     shapes.Circle(*circle_2))
+            self.assertAlmostEqual(area, expected_area, delta=1e-3)
+            self.assertEqual(area, shapes.batch_intersection_circles([circle_1], [circle_2])[0, 0])
+
+    def test_boundaries(self):
+        circle = shapes.Circle(0, 0, 1)
+
+        # Tangent and touching configurations have no overlap
+        self.assertEqual(shapes.intersection_circle_circle(circle, shapes.Circle(2, 0, 1)), 0)
+        self.assertEqual(shapes.intersection_circle_circle(circle, shapes.Circle(0, -2, 1)), 0)
+        self.assertEqual(shapes.intersection_rectangle_circle(shapes.Rectangle(1, 2, 1, -1),
+                                                              circle), 0)
+        self.assertEqual(shapes.intersection_rectangle_circle(shapes.Rectangle(-1, 1, 2, 1),
+                                                              circle), 0)
+
+        # Internally tangent circles and edges through the centre
+        self.assertEqual(shapes.intersection_circle_circle(circle, shapes.Circle(.5, 0, .5)),
+                         round(.25 * np.pi, 3))
+        self.assertEqual(shapes.intersection_rectangle_circle(shapes.Rectangle(0, 1, 1, -1),
+                                                              circle), round(.5 * np.pi, 3))
+        self.assertEqual(shapes.intersection_rectangle_circle(shapes.Rectangle(0, 0, 1, -1),
+                                                              circle), 0)
+        self.assertEqual(shapes.intersection_rectangle_circle(shapes.Rectangle(-1, 1, 1, -1),
+                                                              shapes.Circle(0, 0, 0)), 0)
+
+
+class TestBatchIntersection(unittest.TestCase):
+    def test_rectangles(self):
+        rectangles = [(0, 2, 2, 0), (1, 3, 3, 1), (2, 3, 1, 0), (-2, 2, 2, -2)]
+        areas = shapes.batch_intersection_rectangles(rectangles, rectangles)
+
+        for index_1, rectangle_1 in enumerate(rectangles):
+            for index_2, rectangle_2 in enumerate(rectangles):
+                expected_area = shapes.intersection_rectangles(shapes.Rectangle(*rectangle_1),
+                                                               shapes.Rectangle(*rectangle_2))
+                self.assertEqual(areas[index_1, index_2], expected_area)
+
+    def test_circles(self):
+        circles = [(0, 0, 1), (1, 1, 1), (0, 1, 1), (0.2, 0, 0.5), (2, 0, 1)]
+        expected_areas = (np.pi, 0.5 * np.pi - 1, 2 * np.pi / 3 - 0.5 * np.sqrt(3), 0.25 * np.pi, 0)
+
+        areas = shapes.batch_intersection_circles(circles[:1], circles)
+
+        for area, expected_area in zip(areas[0], expected_areas):
+            self.assertEqual(area, round(expected_area, 3))
+
+        for circle_1, circle_2 in [((1, 1, 1), (0, 0, 1)), ((1, 1, 1), (0, 1, 1)),
+                                   ((0, 0, 2), (1, 0, 1)), ((0, 0, 1), (0, 0, 1))]:
+            area = shapes.batch_intersection_circles([circle_1], [circle_2])[0, 0]
+            self.assertEqual(area, shapes.intersection_circle_circle(shapes.Circle(*circle_1),
+                                                                     shapes.Circle(*circle_2)))
+
+    def test_rectangle_circle(self):
+        circle = shapes.Circle(0, 0, 1)
+        rectangles = [(0, 2, 2, 0), (-2, 2, 2, 0), (-2, 2, 2, -2), (2, 3, 1, 0), (-.5, .5, .5, -.5)]
+        expected_areas = [0.25 * circle.area, 0.5 * circle.area, circle.area, 0, 1]
+
+        areas = shapes.batch_intersection_rectangle_circle(rectangles, [(0, 0, 1)])
+
+        for area, expected_area in zip(areas[:, 0], expected_areas):
+            self.assertEqual(area, round(expected_area, 3))
+
+    def test_rectangle_circle_monte_carlo(self):
+        rectangle = (-0.791, -0.229, 0.124, -1.390)
+        circle = (-0.394, -0.093, 0.177)
+
+        points = np.random.default_rng(0).uniform(-1, 1, (1000000, 2))
+        inside = ((rectangle[0] < points[:, 0]) & (points[:, 0] < rectangle[1]) &
+                  (rectangle[3] < points[:, 1]) & (points[:, 1] < rectangle[2]) &
+                  (np.hypot(points[:, 0] - circle[0], points[:, 1] - circle[1]) < circle[2]))
+
+        area = shapes.batch_intersection_rectangle_circle([rectangle], [circle])[0, 0]
+        self.assertAlmostEqual(area, 4 * inside.mean(), places=2)
+
+    def test_intersection_matrix(self):
+        surfaces = [shapes.Rectangle(0, 2, 2, 0), shapes.Circle(0, 0, 1),
+                    shapes.ConeSideSurface(0.5, 1, 1, 3, 3, 1), shapes.Circle(1, 1, 1)]
+        areas = shapes.intersection_matrix(surfaces)
+
+        self.assertTrue(np.array_equal(areas, areas.T))
+        for index_1, surface in enumerate(surfaces):
+            for index_2, other_surface in enumerate(surfaces):
+                if index_1 != index_2:
+                    self.assertAlmostEqual(areas[index_1, index_2],
+                                           surface.intersection(other_surface), places=3)
+
+    def test_unsupported_surface(self):
+        self.assertRaises(TypeError, shapes.intersection_matrix, [shapes.Circle(0, 0, 1), None])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..case import Case
+from ..incremental import IncrementalCase
+from ..slowdown import SlowdownCurve, SlowdownFunction
+
+
+class TestSlowdownCurve(unittest.TestCase):
+    def setUp(self):
+        self.curve = SlowdownCurve()
+        self.x = np.concatenate((np.random.default_rng(0).uniform(-1, 120, 1000),
+                                 [0, 2, 10, 100, 1., 6.]))
+
+    def test_interp(self):
+        expected = [round(float(np.interp(x, self.curve.xp, self.curve.fp)), 4)
+                    for x in self.x.tolist()]
+
+        self.assertEqual(self.curve(self.x).tolist(), expected)
+        self.assertEqual([self.curve.factor(x) for x in self.x.tolist()], expected)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, SlowdownCurve, (0, 1), (0, .5, 1))
+        self.assertRaises(ValueError, SlowdownCurve, (0, 2, 1), (0, .5, 1))
+
+
+class TestSlowdownFunction(CaseTest):
+    def setUp(self):
+        super().setUp()
+        self.model = SlowdownFunction(lambda x: 1 - np.exp(-np.clip(x, 0, None) / 3))
+
+    def test_factor(self):
+        x = np.linspace(0, 20, 41)
+        self.assertTrue(np.array_equal(self.model(x), [self.model.factor(v) for v in x]))
+
+    def test_engines(self):
+        results = [Case('sub_main/5_2', 'final_concept', engine=engine,
+                        slowdown_model=self.model).run_case()
+                   for engine in ('pairwise', 'batch', 'table')]
+        default = Case('sub_main/5_2', 'final_concept').run_case()
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertNotEqual(results[0], default)
+
+        incremental = IncrementalCase(Case('sub_main/5_2', 'final_concept',
+                                           slowdown_model=self.model))
+        self.assertEqual(incremental.result, results[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..case import Case
+from ..geometry import load_geometry
+from ..table import PartTable, round_values
+
+
+class TestRoundValues(unittest.TestCase):
+    def test_ties(self):
+        values = np.array([-0.8875, 0.0845, 2.675, 1.0005])
+
+        self.assertEqual(list(round_values(values, 3)),
+                         [round(value, 3) for value in values.tolist()])
+
+    def test_random(self):
+        rng = np.random.default_rng(0)
+        values = np.concatenate((rng.uniform(-10, 10, 10000),
+                                 np.round(rng.uniform(-10, 10, 10000), 4) + 5e-5))
+
+        for decimals in (3, 4):
+            self.assertEqual(round_values(values, decimals).tolist(),
+                             [round(value, decimals) for value in values.tolist()])
+
+
+class TestPartTable(CaseTest):
+    cases = (('validation/validation-12_95', None), ('sub_main/5_0', 'final_concept'),
+             ('sub_main/5_1', 'final_concept_1'), ('icecream', None),
+             ('quadcopter_geometry', None))
+
+    def test_from_definitions(self):
+        geometry = load_geometry('data/final_concept.csv')
+        from_definitions = PartTable.from_definitions(geometry.definitions)
+        from_parts = PartTable.from_parts(geometry.build_parts(1.225, 5))
+
+        for column in ('name', 'kind', 'position', 'radius', 'length', 'dimensions', 'orientation'):
+            self.assertTrue(np.array_equal(getattr(from_definitions, column),
+                                           getattr(from_parts, column)))
+
+    def test_frontal_surfaces(self):
+        for name, geometry in self.cases:
+            for direction in (0, 1, 2):
+                case = Case(name, geometry=geometry, engine='batch')
+                case.flow_direction = direction
+                case.solve_wake()
+
+                table = PartTable.from_parts(case.parts)
+                plane = [axis for axis in (0, 2, 1) if axis != direction]
+                circle, rectangles, circles, areas = table.frontal_surfaces(*plane)
+
+                for row, part in enumerate(case.parts):
+                    surface = part.get_frontal_surface()
+                    self.assertEqual(areas[row], surface.area)
+                    if circle[row]:
+                        self.assertEqual(tuple(circles[row]),
+                                         (surface.x_centre, surface.y_centre, surface.radius))
+                    else:
+                        self.assertEqual(tuple(rectangles[row]),
+                                         (surface.left, surface.right, surface.top, surface.bottom))
+
+    def test_matches_batch_engine(self):
+        for name, geometry in self.cases:
+            for direction in (0, 1, 2):
+                cases = [Case(name, geometry=geometry, engine=engine)
+                         for engine in ('batch', 'table')]
+                for case in cases:
+                    case.flow_direction = direction
+                    case.velocity = case.velocity or 1.
+
+                try:
+                    _, result = cases[0].run_case()
+                except ValueError:
+                    self.assertRaises(ValueError, cases[1].run_case)
+                    continue
+
+                _, table_result = cases[1].run_case()
+
+                self.assertEqual(result, table_result)
+                self.assertEqual([part.__name__ for part in cases[0].parts],
+                                 [part.__name__ for part in cases[1].parts])
+                for part, table_part in zip(*(case.parts for case in cases)):
+                    self.assertAlmostEqual(part.wake_factor, table_part.wake_factor, places=12)
+                    self.assertAlmostEqual(part.drag, table_part.drag, places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
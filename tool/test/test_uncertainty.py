@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..case import Case
+from ..uncertainty import monte_carlo, _interp
+
+
+class TestInterp(unittest.TestCase):
+    def test_interp(self):
+        rng = np.random.default_rng(0)
+        x = np.concatenate((rng.uniform(-5, 120, 50), [0, 2, 10, 100]))
+        xp = np.sort(rng.uniform(0, 100, (20, 4)), axis=1)
+        fp = rng.uniform(0, 1, (20, 4))
+
+        expected = np.array([np.interp(x, xp[i], fp[i]) for i in range(20)])
+        self.assertTrue(np.allclose(_interp(x, xp, fp), expected, rtol=0, atol=1e-12))
+
+
+class TestMonteCarlo(CaseTest):
+    def test_nominal(self):
+        for name, geometry in (('sub_main/5_0', 'final_concept'),
+                               ('sub_main/5_2', 'final_concept'),
+                               ('validation/validation-12_95', None)):
+            _, (_, drag_area, cop) = Case(name, geometry, engine='table').run_case()
+            result = monte_carlo(Case(name, geometry), {}, samples=4, chunk=3)
+
+            self.assertTrue(np.all(np.round(result.drag_area, 3) == drag_area))
+            self.assertTrue(np.all(np.round(result.cop, 3) + 0. == cop))
+
+    def test_samples(self):
+        case = Case('sub_main/5_2', 'final_concept')
+        coefficients = np.array([.6, .8, 1.])
+        result = monte_carlo(case, {'Cuboid': coefficients, 'friction_coefficient': .03,
+                                    'slowdown_fp': (0, .8, .9, 1)}, samples=3)
+
+        for coefficient, drag_area in zip(coefficients, result.drag_area):
+            expected = Case('sub_main/5_2', 'final_concept', engine='table')
+            expected.slowdown_fp = (0, .8, .9, 1)
+            expected.solve_wake()
+            table = expected.table
+            base_drag_areas = table.base_drag_areas(2, {table.kinds[2]: coefficient})
+            friction = np.minimum(table.friction_coefficients(.03) * table.wet_areas(),
+                                  base_drag_areas)
+            self.assertAlmostEqual(drag_area, (friction + table.wake_factor *
+                                               (base_drag_areas - friction)).sum())
+
+    def test_percentiles(self):
+        result = monte_carlo(Case('sub_main/5_0', 'final_concept'),
+                             {'Cylinder': lambda rng, size: rng.normal(.4, .05, size)},
+                             samples=1000)
+        drag_area, cop = result.percentiles((5, 50, 95))
+
+        self.assertEqual(len(result), 1000)
+        self.assertTrue(drag_area[0] < drag_area[1] < drag_area[2])
+        self.assertEqual(cop.shape, (3, 3))
+        self.assertEqual(len(result.report().splitlines()), 4)
+
+    def test_invalid(self):
+        case = Case('sub_main/5_0', 'final_concept')
+
+        self.assertRaises(ValueError, monte_carlo, case, {'Disk': .1})
+        self.assertRaises(ValueError, monte_carlo, case, {'Cuboid': [.8, .9]}, samples=3)
+        self.assertRaises(ValueError, monte_carlo, case, {'slowdown_xp': (0, 2, 10)})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+
+from .test_case import CaseTest
+from ..case import Case
+from ..incremental import IncrementalCase
+from ..objects import Sphere
+from ..sensitivity import sensitivity_sweep
+from ..wake import superpose_wakes
+
+
+class TestSuperposeWakes(unittest.TestCase):
+    def test_single_upstream(self):
+        # With one upstream part, the model of Part.set_slowdown
+        part = Sphere(1.225, 10, (0, 0, 0), 1)
+        part.set_frontal_surface(0, 2)
+        part.set_slowdown(.9, 1.)
+
+        slowdown, wake_slowdown, wake_factor, area = superpose_wakes(
+            [0], [1], [1.], [.9], np.array([1., np.pi]), np.arange(2))
+
+        self.assertEqual(slowdown[1], .9)
+        self.assertAlmostEqual(wake_slowdown[1], part.wake_slowdown)
+        self.assertAlmostEqual(wake_factor[1], part.wake_factor)
+        self.assertEqual(area[1], 1.)
+        self.assertEqual((slowdown[0], wake_slowdown[0], wake_factor[0], area[0]), (1, 1, 1, 0))
+
+    def test_two_upstream(self):
+        # Two wakes each covering a quarter of part 2
+        slowdown, wake_slowdown, wake_factor, area = superpose_wakes(
+            [0, 1], [2, 2], [1., 1.], [.8, .6], np.array([1., 1., 4.]), np.arange(3))
+
+        self.assertAlmostEqual(slowdown[2], .7)
+        self.assertAlmostEqual(wake_slowdown[2], 1 - .25 * .2 - .25 * .4)
+        self.assertAlmostEqual(wake_factor[2], .5 + .25 * .64 + .25 * .36)
+        self.assertAlmostEqual(area[2], 2.)
+
+    def test_covered(self):
+        # Overlaps exceeding the frontal area are scaled down to cover it once
+        _, wake_slowdown, wake_factor, area = superpose_wakes(
+            [0, 1], [2, 2], [3., 1.], [.5, .5], np.array([4., 4., 2.]), np.arange(3))
+
+        self.assertAlmostEqual(wake_slowdown[2], .5)
+        self.assertAlmostEqual(wake_factor[2], .25)
+        self.assertAlmostEqual(area[2], 2.)
+
+    def test_chain(self):
+        # Part 0 is upstream of part 2, which is upstream of part 1
+        _, wake_slowdown, _, _ = superpose_wakes(
+            [2, 0, 0], [1, 2, 1], [1., 1., 0.], [.5, .8, .9], np.ones(3), np.array([0, 2, 1]))
+
+        self.assertTrue(np.allclose(wake_slowdown, [1., .4, .8]))
+
+    def test_upstream_order(self):
+        # A pair against the order along the flow would make a cycle of wakes
+        self.assertRaises(ValueError, superpose_wakes, [1, 0], [0, 1], [1., 1.], [.5, .5],
+                          np.ones(2), np.arange(2))
+
+
+class TestSuperpositionModel(CaseTest):
+    def test_engines(self):
+        for name, geometry in (('sub_main/5_0', 'final_concept'),
+                               ('validation/validation-12_95', None)):
+            results = [Case(name, geometry, engine=engine, wake_model='superposition').run_case()
+                       for engine in ('pairwise', 'batch', 'table')]
+
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(results[0], results[2])
+            # Combining all wakes shields more than the largest wake alone
+            self.assertLess(results[0][1][0], Case(name, geometry).run_case()[1][0])
+
+    def test_sensitivity(self):
+        values = (-.6, -.5445, -.5)
+        sweep = sensitivity_sweep('final_concept', {('battery', 'position', 1): values}, 0,
+                                  wake_model='superposition')
+
+        for value, drag_area in zip(values, sweep):
+            case = Case('sub_main/5_0', 'final_concept', engine='table',
+                        wake_model='superposition')
+            next(part for part in case.parts if part.__name__ == 'battery').position = (0, value, 0)
+            case.solve_wake()
+            self.assertAlmostEqual(drag_area, case.drag_areas().sum())
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Case, 'sub_main/5_0', 'final_concept', wake_model='all')
+        self.assertRaises(ValueError, IncrementalCase,
+                          Case('sub_main/5_0', 'final_concept', wake_model='superposition'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Monte Carlo uncertainty quantification of the drag area and centre of pressure of a case, over
+the drag coefficients of the parts and the slowdown curve
+"""
+
+import numpy as np
+
+from .objects import Part, Sphere, Cylinder, Cuboid, IceCreamCone
+from .shapes import round_values
+from .table import PartTable
+
+
+# Uncertain model constants, with the part class of every drag coefficient
+drag_coefficient_types = {'Sphere': Sphere, 'Cylinder': Cylinder, 'Cuboid': Cuboid,
+                          'IceCreamCone': IceCreamCone}
+uncertain_parameters = tuple(drag_coefficient_types) + ('friction_coefficient', 'slowdown_xp',
+                                                        'slowdown_fp')
+
+
+class UncertaintyResult:
+    """
+    Samples of the total drag area and the centre of pressure of a case
+        drag_area: Array with one drag area per sample
+        cop: Array with one row [x, y, z] per sample
+    """
+    def __init__(self, drag_area, cop):
+        self.drag_area = drag_area
+        self.cop = cop
+
+    def __len__(self):
+        return self.drag_area.size
+
+    def __repr__(self):
+        return f"UncertaintyResult with {len(self)} samples"
+
+    def percentiles(self, q=(5, 50, 95)):
+        """
+        :param q: Percentiles to determine, between 0 and 100
+        :return: (Array of drag area percentiles, Array with a row [x, y, z] per percentile)
+        """
+        return np.percentile(self.drag_area, q), np.percentile(self.cop, q, axis=0)
+
+    def report(self, q=(5, 50, 95)):
+        """
+        :return: Text table of the percentiles of the drag area and centre of pressure
+        """
+        drag_area, cop = self.percentiles(q)
+        lines = [f"{'Percentile':>10} {'Drag Area [m2]':>15} {'CoP x [m]':>10} {'CoP y [m]':>10} "
+                 f"{'CoP z [m]':>10}"]
+        for percentile, area, (x, y, z) in zip(q, drag_area, cop):
+            lines.append(f"{percentile:>10} {area:>15.4f} {x:>10.4f} {y:>10.4f} {z:>10.4f}")
+
+        return "\n".join(lines)
+
+
+def _sample(distribution, rng, size: int, shape=()):
+    """
+    :param distribution: Function of (rng, size) returning the samples, an array of samples,
+            or a single value for all samples
+    :return: Array of samples with shape (size, ) + shape
+    """
+    values = distribution(rng, size) if callable(distribution) else distribution
+    values = np.asarray(values, dtype=float)
+    if values.shape == shape:
+        values = np.broadcast_to(values, (size,) + shape)
+
+    if values.shape != (size,) + shape:
+        raise ValueError(f"Expected samples of shape {(size,) + shape}, got {values.shape}")
+    return values
+
+
+def _interp(x, xp, fp):
+    """
+    np.interp of the points x on a separate curve per sample
+    :param x: Array of points, shape (n, )
+    :param xp: Array with the increasing x points of the curve of every sample, shape (s, k)
+    :param fp: Array with the curve values of every sample, shape (s, k)
+    :return: Array of interpolated values, shape (s, n)
+    """
+    index = np.clip((xp[:, None, :] <= x[None, :, None]).sum(axis=2) - 1, 0, xp.shape[1] - 2)
+    x_0, x_1 = np.take_along_axis(xp, index, 1), np.take_along_axis(xp, index + 1, 1)
+    f_0, f_1 = np.take_along_axis(fp, index, 1), np.take_along_axis(fp, index + 1, 1)
+
+    values = (f_1 - f_0) / (x_1 - x_0) * (x[None, :] - x_0) + f_0
+    values = np.where(x[None, :] < xp[:, :1], fp[:, :1], values)
+    return np.where(x[None, :] >= xp[:, -1:], fp[:, -1:], values)
+
+
+def monte_carlo(case, distributions: dict, samples: int = 10000, seed: int = 0,
+                chunk: int = 4096):
+    """
+    Sample the drag coefficients and the slowdown curve, and determine the drag area and centre
+    of pressure of the case for every sample at once. The intersections, and with them the
+    upstream part every part takes its wake from, do not depend on the samples and are
+    determined once with the table engine.
+    :param case: Case to evaluate, with its flow direction, slowdown curve and wake_cutoff
+    :param distributions: Dictionary of uncertain parameter to its distribution. The parameters
+            are the drag coefficients 'Sphere', 'Cylinder', 'Cuboid' and 'IceCreamCone',
+            'friction_coefficient', and the points of the slowdown curve 'slowdown_xp' and
+            'slowdown_fp'. A distribution is a function of (numpy Generator, number of samples),
+            an array of samples or a single value. The slowdown points take a row per sample.
+            Parameters that are not given keep their value in the model. Without slowdown
+            points, the SlowdownModel of the case is used for all samples.
+    :param samples: Number of samples
+    :param seed: Seed of the random number generator passed to the distributions
+    :param chunk: Largest number of samples evaluated at once, to limit memory use
+    :return: UncertaintyResult with the drag area and centre of pressure of every sample
+    """
+    if case.wake_model != 'largest':
+        raise ValueError(f"Monte Carlo sampling only supports the 'largest' wake model, "
+                         f"got {case.wake_model}")
+
+    unknown = set(distributions) - set(uncertain_parameters)
+    if unknown:
+        raise ValueError(f"Cannot sample {sorted(unknown)}, choose from {uncertain_parameters}")
+
+    rng = np.random.default_rng(seed)
+    points = len(case.slowdown_xp)
+    nominal = {'friction_coefficient': Part.friction_coefficient, 'slowdown_xp': case.slowdown_xp,
+               'slowdown_fp': case.slowdown_fp}
+    nominal.update({name: part_type.drag_coefficient
+                    for name, part_type in drag_coefficient_types.items()})
+    values = {name: _sample(distributions.get(name, nominal[name]), rng, samples,
+                            (points,) if name.startswith('slowdown') else ())
+              for name in uncertain_parameters}
+
+    # The wake structure of the case, which does not depend on the samples
+    direction = case.flow_direction
+    table = PartTable.from_parts(case.parts)
+    table.solve_wake(direction, case.get_slowdown_model(), case.wake_cutoff)
+
+    areas, largest = table.frontal_area, table.largest_intersection
+    downstream = table.order[table.upstream[table.order] >= 0]
+    upstream = table.upstream[downstream]
+    lengths = table.characteristic_lengths(direction)
+    x = (table.position[downstream, direction] - table.position[upstream, direction]) / \
+        lengths[upstream]
+
+    # Parts in the same generation of the wake only depend on earlier generations
+    generation = np.zeros(len(table), dtype=int)
+    for row, other in zip(downstream.tolist(), upstream.tolist()):
+        generation[row] = generation[other] + 1
+    generations = [generation[downstream] == level for level in range(1, generation.max() + 1)]
+
+    rotor = np.array(['rotor' in name for name in table.name], dtype=bool)
+    moment_arms = np.where(rotor[:, None], 0., table.position)
+    moment_arms[:, direction] = 0.
+    wet_areas = table.wet_areas()
+
+    sample_curve = 'slowdown_xp' in distributions or 'slowdown_fp' in distributions
+    if sample_curve:
+        factors = np.empty((samples, x.size))
+    else:
+        factors = np.broadcast_to(case.get_slowdown_model()(x), (samples, x.size))
+
+    drag_area, cop = np.empty(samples), np.empty((samples, 3))
+    for start in range(0, samples, chunk):
+        sample = slice(start, min(start + chunk, samples))
+        size = sample.stop - sample.start
+
+        if sample_curve:
+            factors[sample] = round_values(_interp(x, values['slowdown_xp'][sample],
+                                                   values['slowdown_fp'][sample]), 4)
+        slowdown, wake_slowdown = np.ones((size, len(table))), np.ones((size, len(table)))
+        for level in generations:
+            rows = downstream[level]
+            slowdown[:, rows] = wake_slowdown[:, upstream[level]] * factors[sample, level]
+            wake_slowdown[:, rows] = ((slowdown[:, rows] * largest[rows] + areas[rows] -
+                                       largest[rows]) / areas[rows])
+        wake_factor = ((slowdown ** 2) * largest + areas - largest) / areas
+
+        base_drag_areas = table.base_drag_areas(direction, {
+            part_type: values[name][sample, None] for name, part_type in
+            drag_coefficient_types.items()})
+        friction = np.minimum(table.friction_coefficients(
+            values['friction_coefficient'][sample, None]) * wet_areas, base_drag_areas)
+        drag_areas = friction + wake_factor * (base_drag_areas - friction)
+
+        drag_area[sample] = drag_areas.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cop[sample] = (drag_areas @ moment_arms) / drag_area[sample, None]
+
+    return UncertaintyResult(drag_area, cop)
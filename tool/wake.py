@@ -0,0 +1,71 @@
+"""
+Wake model that superposes the wakes of all upstream parts a part overlaps with
+"""
+
+import numpy as np
+
+
+def superpose_wakes(index_1, index_2, overlap, factors, areas, rank):
+    """
+    Combine the wakes of every overlapping upstream part into an area weighted velocity deficit.
+    The wake of an upstream part carries its own mean velocity times the slowdown factor, so
+    wakes of wakes propagate along the flow. Every part only depends on parts earlier along the
+    flow, so the parts are solved one generation of this graph at a time, with all pairs of a
+    generation accumulated at once. The generations themselves take one pass over the pairs in
+    Python, as a pass per generation with array operations is slower on deep chains of parts.
+        Every upstream part covers its overlap as a fraction of the frontal area of the
+        downstream part. Where the overlaps together exceed the frontal area, the fractions are
+        scaled down to cover it exactly. With a single upstream part, this is the model of
+        Part.set_slowdown.
+    :param index_1: Array with the upstream index of every pair
+    :param index_2: Array with the downstream index of every pair
+    :param overlap: Array with the area of intersection of every pair
+    :param factors: Array with the slowdown factor of every pair, see SlowdownModel
+    :param areas: Array with the frontal area of every part
+    :param rank: Array with the position of every part in the order along the flow
+    :return: (Array with the mean V / V_flow in the wakes covering every part,
+              Array with the mean V / V_flow over every part (wake slowdown),
+              Array with the mean (V / V_flow) ** 2 over every part (wake factor),
+              Array with the area of every part covered by wakes)
+    """
+    size = areas.size
+    positive = np.asarray(overlap) > 0
+    index_1, index_2 = np.asarray(index_1)[positive], np.asarray(index_2)[positive]
+    overlap, factors = np.asarray(overlap)[positive], np.asarray(factors)[positive]
+
+    covered = np.bincount(index_2, weights=overlap, minlength=size)
+    weights = overlap / np.maximum(areas, covered)[index_2]
+
+    if np.any(rank[index_1] >= rank[index_2]):
+        raise ValueError("Every upstream part should come before its downstream part in rank")
+
+    # Generation of every part: one more than the latest generation of its upstream parts. As
+    # the upstream parts come first in rank, a single pass over the pairs in rank order suffices.
+    order = np.argsort(rank[index_2], kind='stable')
+    generation = [0] * size
+    for upstream, downstream in zip(index_1[order].tolist(), index_2[order].tolist()):
+        if generation[downstream] <= generation[upstream]:
+            generation[downstream] = generation[upstream] + 1
+    generation = np.array(generation, dtype=int)
+
+    pair_generation = generation[index_2]
+    order = np.argsort(pair_generation, kind='stable')
+    bounds = np.searchsorted(pair_generation[order], np.arange(1, generation.max() + 2))
+
+    wake_slowdown = np.ones(size)
+    velocity = np.empty(index_1.size)
+    for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        pairs = order[start:end]
+        velocity[pairs] = wake_slowdown[index_1[pairs]] * factors[pairs]
+        deficit = np.bincount(index_2[pairs], weights=weights[pairs] * (1 - velocity[pairs]),
+                              minlength=size)
+        rows = index_2[pairs]
+        wake_slowdown[rows] = 1 - deficit[rows]
+
+    shadow = np.bincount(index_2, weights=weights, minlength=size)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slowdown = np.where(shadow > 0, np.bincount(index_2, weights=weights * velocity,
+                                                    minlength=size) / shadow, 1.)
+    wake_factor = 1 - np.bincount(index_2, weights=weights * (1 - velocity ** 2), minlength=size)
+
+    return slowdown, wake_slowdown, wake_factor, shadow * areas